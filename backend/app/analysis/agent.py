@@ -8,30 +8,39 @@ from typing import Any
 
 from app.core.config import settings
 from app.rules.store import Rule
+from app.services.llm_cache import cache_key, get_response_cache
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = "You are a code refactoring assistant. Output valid JSON only."
+MODELS = {"openai": "gpt-4o", "anthropic": "claude-3-opus-20240229", "gemini": "gemini-1.5-flash"}
+# None means the provider's default temperature.
+TEMPERATURES: dict[str, float | None] = {"openai": 0.0, "anthropic": None, "gemini": None}
+
+
 class RefactorAgent:
     def __init__(self, api_key: str | None = None, provider: str | None = None):
         self.provider = "none"
         self.client: Any = None
-        
+
         # Clean inputs
         api_key = api_key.strip() if api_key else None
-        
+
         # Helper to check if key is a real key (not a placeholder)
         def is_real(k: str | None) -> bool:
             return bool(k and len(k) > 10 and not k.startswith("sk-...") and not k.endswith("..."))
 
         # Use provided credentials only if BOTH are present, valid, and provider != "none"
         use_provided = api_key and is_real(api_key) and provider and provider != "none"
-        
+
         if use_provided:
             logger.info(f"Using provided {provider} credentials")
             self._setup_provider(provider, api_key)
         else:
             # Fallback to settings
-            logger.debug(f"Falling back to settings. OpenAI: {is_real(settings.openai_api_key)}, Anthropic: {is_real(settings.anthropic_api_key)}, Gemini: {is_real(settings.google_api_key)}")
+            logger.debug(
+                f"Falling back to settings. OpenAI: {is_real(settings.openai_api_key)}, Anthropic: {is_real(settings.anthropic_api_key)}, Gemini: {is_real(settings.google_api_key)}"
+            )
             if is_real(settings.openai_api_key):
                 logger.info("Using OpenAI from settings")
                 self._setup_provider("openai", settings.openai_api_key)
@@ -47,19 +56,27 @@ class RefactorAgent:
     def _setup_provider(self, provider: str, api_key: str):
         if not api_key:
             return
-            
+
         self.provider = provider
         try:
             if provider == "openai":
                 from openai import OpenAI
-                self.client = OpenAI(api_key=api_key)
+
+                # Retries are handled by the provider executor, with rate limiting.
+                self.client = OpenAI(
+                    api_key=api_key, base_url=settings.openai_base_url, max_retries=0
+                )
             elif provider == "anthropic":
                 import anthropic
-                self.client = anthropic.Anthropic(api_key=api_key)
+
+                self.client = anthropic.Anthropic(
+                    api_key=api_key, base_url=settings.anthropic_base_url, max_retries=0
+                )
             elif provider == "gemini":
                 import google.generativeai as genai
+
                 genai.configure(api_key=api_key)
-                self.client = genai.GenerativeModel("gemini-1.5-flash")
+                self.client = genai.GenerativeModel(MODELS["gemini"])
         except Exception as e:
             logger.error(f"Failed to setup provider {provider}: {e}")
             self.provider = "none"
@@ -67,43 +84,79 @@ class RefactorAgent:
     def _call_openai(self, prompt: str) -> str | None:
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4o",
+                model=MODELS["openai"],
                 messages=[
-                    {"role": "system", "content": "You are a code refactoring assistant. Output valid JSON only."},
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
                 ],
-                temperature=0.0,
-                response_format={"type": "json_object"}
+                temperature=TEMPERATURES["openai"],
+                response_format={"type": "json_object"},
             )
             return response.choices[0].message.content
         except Exception as e:
+            _raise_if_retryable(e)
             logger.error(f"OpenAI error: {e}")
             return None
 
     def _call_anthropic(self, prompt: str) -> str | None:
         try:
             response = self.client.messages.create(
-                model="claude-3-opus-20240229",
+                model=MODELS["anthropic"],
                 max_tokens=2048,
-                system="You are a code refactoring assistant. Output valid JSON only.",
-                messages=[{"role": "user", "content": prompt}]
+                system=SYSTEM_PROMPT,
+                messages=[{"role": "user", "content": prompt}],
             )
             return response.content[0].text
         except Exception as e:
+            _raise_if_retryable(e)
             logger.error(f"Anthropic error: {e}")
             return None
 
     def _call_gemini(self, prompt: str) -> str | None:
         try:
             response = self.client.generate_content(
-                f"You are a code refactoring assistant. Output valid JSON only.\n\n{prompt}",
-                generation_config={"response_mime_type": "application/json"}
+                f"{SYSTEM_PROMPT}\n\n{prompt}",
+                generation_config={"response_mime_type": "application/json"},
             )
             return response.text
         except Exception as e:
+            _raise_if_retryable(e)
             logger.error(f"Gemini error: {e}")
             return None
 
+    def complete(self, prompt: str) -> str | None:
+        """Send ``prompt`` to the configured provider, answering repeats from the response cache."""
+        call = {
+            "openai": self._call_openai,
+            "anthropic": self._call_anthropic,
+            "gemini": self._call_gemini,
+        }.get(self.provider)
+        if call is None:
+            return None
+
+        cache = get_response_cache()
+        model = MODELS[self.provider]
+        key = cache_key(self.provider, model, TEMPERATURES[self.provider], SYSTEM_PROMPT, prompt)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        # Imported here: the orchestrator package imports this module.
+        from app.engine.llm_orchestrator.executor import (
+            RetryableProviderError,
+            get_provider_executor,
+        )
+
+        try:
+            content = get_provider_executor().call(self.provider, call, prompt)
+        except RetryableProviderError as e:
+            logger.error(f"{self.provider} request failed after retries: {e}")
+            return None
+        if content and cache is not None:
+            cache.put(key, content, self.provider, model)
+        return content
+
     def generate_rule(self, snippet: str, context: str, inferred_intent: str) -> Rule | None:
         if self.provider == "none":
             logger.warning("No AI API keys found. Skipping refactor.")
@@ -139,29 +192,22 @@ OUTPUT FORMAT (JSON):
 
 Return ONLY the raw JSON. No markdown formatting.
 """
-        content = None
-        if self.provider == "openai":
-            content = self._call_openai(prompt)
-        elif self.provider == "anthropic":
-            content = self._call_anthropic(prompt)
-        elif self.provider == "gemini":
-            content = self._call_gemini(prompt)
-
+        content = self.complete(prompt)
         if not content:
             return None
-            
+
         try:
             # Clean up markdown code blocks if any (Gemini tends to add ```json)
             content = content.replace("```json", "").replace("```", "").strip()
             data = json.loads(content)
-            
+
             # Basic validation
             if "replacement_code" not in data:
                 return None
-            
+
             # Force the intent to match what we requested to ensure store lookup works
             data["intent"] = inferred_intent
-            
+
             if "id" not in data:
                 data["id"] = f"gen_{inferred_intent}_{int(time.time())}"
             if "language" not in data:
@@ -176,5 +222,27 @@ Return ONLY the raw JSON. No markdown formatting.
             return None
 
 
+def _raise_if_retryable(exc: Exception) -> None:
+    """Re-raise rate limits, timeouts and 5xx responses as ``RetryableProviderError``."""
+    from app.engine.llm_orchestrator.executor import RetryableProviderError, is_retryable_status
+
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    code = getattr(exc, "code", None)
+    if status is None and isinstance(code, int):
+        status = code  # google.api_core errors
+    transient = type(exc).__name__ in ("APIConnectionError", "APITimeoutError", "DeadlineExceeded")
+    if not (is_retryable_status(status) or transient):
+        return
+    retry_after = None
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            retry_after = float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+    raise RetryableProviderError(str(exc), status, retry_after) from exc
+
+
 def get_agent(api_key: str | None = None, provider: str | None = None) -> RefactorAgent:
     return RefactorAgent(api_key=api_key, provider=provider)
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+
+from app.analysis.types import DetectionHit
+from app.engine.pattern_registry.ast_utils import compute_signatures, detect_language
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass(slots=True)
+class HitCluster:
+    """Call sites sharing a snippet signature and prompt; planned once through ``representative``."""
+
+    key: str
+    hits: list[DetectionHit] = field(default_factory=list)
+
+    @property
+    def representative(self) -> DetectionHit:
+        return self.hits[0]
+
+
+def cluster_key(hit: DetectionHit) -> str:
+    """Digest of the hit's language, AST signature and whitespace-normalized prompt.
+
+    The AST signature abstracts identifiers and literals, so copies of a call site
+    that only rename variables or reformat land in the same cluster.
+    """
+    language = detect_language(file_path=hit.file)
+    signature = compute_signatures(hit.snippet, language).ast_signature
+    prompt = WHITESPACE_RE.sub(" ", hit.prompt).strip()
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (language, signature, prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def cluster_hits(hits: list[DetectionHit]) -> list[HitCluster]:
+    """Group duplicate call sites, keeping clusters and their members in scan order."""
+    clusters: dict[str, HitCluster] = {}
+    for hit in hits:
+        key = cluster_key(hit)
+        cluster = clusters.get(key)
+        if cluster is None:
+            cluster = clusters[key] = HitCluster(key)
+        cluster.hits.append(hit)
+    return list(clusters.values())
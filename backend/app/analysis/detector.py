@@ -1,12 +1,30 @@
 from __future__ import annotations
 
 import json
+import logging
+import os
 import re
 import subprocess
+import sys
+from collections.abc import Collection, Iterable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import islice
+from multiprocessing import get_context
 from pathlib import Path
 
-from app.analysis.types import DetectionHit
+from app.analysis.file_walker import WalkStats, iter_source_files
+from app.analysis.source_unit import SCANNABLE_SUFFIXES, SourceUnit, load_source_unit
 from app.analysis.treesitter_extractor import extract_calls
+from app.analysis.types import DetectionHit
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
 
 AI_HINT_RE = re.compile(
     r"openai|anthropic|gemini|chat\.completions|generate(Content)?\(|\.messages\.create\(|\.generate\(",
@@ -33,7 +51,7 @@ def _extract_prompt(snippet: str) -> str:
     match = PROMPT_RE.search(snippet)
     if not match:
         return snippet[:300]
-    prompt = match.group(1).strip('"\'`')
+    prompt = match.group(1).strip("\"'`")
     return prompt[:1000]
 
 
@@ -44,7 +62,7 @@ def _is_noise(line: str) -> bool:
         return True
     if re.search(r"=\s*require\(", s):
         return True
-    
+
     # Class definitions
     if s.startswith("class ") and ("OpenAI" in s or "Anthropic" in s):
         return True
@@ -52,140 +70,303 @@ def _is_noise(line: str) -> bool:
     # Instantiation / Setup
     # JS: new OpenAI(...)
     if "new OpenAI" in s or "new Anthropic" in s:
-         return True
-    
+        return True
+
     # Python/General: client = OpenAI(...) or client = openai.OpenAI(...)
     # Heuristic: = (optional namespace.)Provider(
     if re.search(r"=\s*(\w+\.)?(OpenAI|Anthropic|Gemini|GoogleGenerativeAI)\(", s, re.IGNORECASE):
         return True
-    
+
     # Catch simple assignment like: client = OpenAI()
-    if re.match(r"^[\w\s,]+=\s*(\w+\.)?(OpenAI|Anthropic|Gemini|GoogleGenerativeAI)\(", s, re.IGNORECASE):
+    if re.match(
+        r"^[\w\s,]+=\s*(\w+\.)?(OpenAI|Anthropic|Gemini|GoogleGenerativeAI)\(", s, re.IGNORECASE
+    ):
         return True
 
     # Catch bare class usage if it looks like a type hint or simple reference
     if re.match(r"^\s*(\w+\.)?(OpenAI|Anthropic|Gemini|GoogleGenerativeAI)\s*$", s, re.IGNORECASE):
         return True
-        
+
     return False
 
 
-def _get_context(file_path: str, line_start: int, window_up: int = 15, window_down: int = 5) -> str:
-    try:
-        path = Path(file_path)
-        text = path.read_text(encoding="utf-8", errors="ignore").splitlines()
-        start = max(0, line_start - 1 - window_up)
-        end = min(len(text), line_start + window_down)
-        return "\n".join(text[start:end])
-    except Exception:
+def _get_context(
+    unit: SourceUnit | None, line_start: int, window_up: int = 15, window_down: int = 5
+) -> str:
+    if unit is None:
         return ""
+    return unit.context(line_start, window_up, window_down)
+
+
+def _get_unit(units: dict[str, SourceUnit | None], file_path: str) -> SourceUnit | None:
+    if file_path not in units:
+        units[file_path] = load_source_unit(Path(file_path))
+    return units[file_path]
 
 
-def _fallback_scan(path: Path) -> list[DetectionHit]:
+def _hint_lines(unit: SourceUnit) -> list[int]:
+    seen: set[int] = set()
+    lines: list[int] = []
+    for match in AI_HINT_RE.finditer(unit.text):
+        idx = unit.line_at(match.start())
+        if idx not in seen:
+            seen.add(idx)
+            lines.append(idx)
+    return lines
+
+
+def _scan_unit(unit: SourceUnit) -> list[DetectionHit]:
     hits: list[DetectionHit] = []
-    for file in path.rglob("*"):
-        if file.suffix.lower() not in {".py", ".js", ".ts", ".tsx", ".jsx"}:
+    file = str(unit.path)
+    for line_start, line_end, snippet in extract_calls(unit):
+        if _is_noise(snippet):
             continue
-        text = file.read_text(encoding="utf-8", errors="ignore")
-        ts_calls = extract_calls(file)
-        for line_start, line_end, snippet in ts_calls:
-            if _is_noise(snippet):
-                continue
-            # Use larger context for prompt extraction
-            context = _get_context(str(file), line_start)
-            
-            hits.append(
-                DetectionHit(
-                    file=str(file),
-                    line_start=line_start,
-                    line_end=line_end,
-                    snippet=snippet,
-                    provider=_provider_from_snippet(snippet),
-                    prompt=_extract_prompt(context),
-                )
+        # Use larger context for prompt extraction
+        context = _get_context(unit, line_start)
+
+        hits.append(
+            DetectionHit(
+                file=file,
+                line_start=line_start,
+                line_end=line_end,
+                snippet=snippet,
+                provider=_provider_from_snippet(snippet),
+                prompt=_extract_prompt(context),
             )
-        for idx, line in enumerate(text.splitlines(), start=1):
-            if AI_HINT_RE.search(line):
-                if _is_noise(line):
-                    continue
-                snippet = "\n".join(text.splitlines()[max(0, idx - 1) : idx + 3])
-                # Use larger context for prompt extraction
-                context = "\n".join(text.splitlines()[max(0, idx - 15) : idx + 5])
-                
-                hits.append(
-                    DetectionHit(
-                        file=str(file),
-                        line_start=idx,
-                        line_end=min(idx + 2, len(text.splitlines())),
-                        snippet=snippet,
-                        provider=_provider_from_snippet(snippet),
-                        prompt=_extract_prompt(context),
-                    )
-                )
+        )
+    lines = unit.lines
+    for idx in _hint_lines(unit):
+        if _is_noise(lines[idx - 1]):
+            continue
+        snippet = unit.segment(idx - 1, idx + 2)
+        # Use larger context for prompt extraction
+        context = _get_context(unit, idx, window_up=14)
+
+        hits.append(
+            DetectionHit(
+                file=file,
+                line_start=idx,
+                line_end=min(idx + 2, len(lines)),
+                snippet=snippet,
+                provider=_provider_from_snippet(snippet),
+                prompt=_extract_prompt(context),
+            )
+        )
     return hits
 
 
-import sys
+def _scan_files(files: list[str]) -> list[list[DetectionHit]]:
+    """Scan a batch of files; runs inside pool workers, one hit list per file."""
+    results: list[list[DetectionHit]] = []
+    for file in files:
+        unit = load_source_unit(Path(file))
+        results.append(_scan_unit(unit) if unit is not None else [])
+    return results
+
+
+def _parallel_scan(
+    files: list[str], workers: int, batch_size: int
+) -> dict[str, list[DetectionHit]]:
+    batches = [files[i : i + batch_size] for i in range(0, len(files), batch_size)]
+    results: dict[str, list[DetectionHit]] = {}
+    # Spawned workers import the detector fresh and keep their own parser cache.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        for batch, batch_hits in zip(batches, pool.map(_scan_files, batches)):
+            results.update(zip(batch, batch_hits))
+    return results
 
-def _semgrep_scan(path: Path, rules_path: Path) -> list[DetectionHit]:
-    # Attempt to find semgrep in the same directory as the python executable
-    semgrep_bin = "semgrep"
+
+def iter_target_files(path: Path, stats: WalkStats | None = None) -> Iterator[str]:
+    """Scannable files under ``path`` as the walker finds them; see ``iter_source_files``."""
+    if path.is_file():
+        return iter([str(path)] if path.suffix.lower() in SCANNABLE_SUFFIXES else [])
+    return iter_source_files(path, stats)
+
+
+def list_source_files(path: Path, stats: WalkStats | None = None) -> list[str]:
+    """Scannable files under ``path``, sorted so scans are deterministic."""
+    return sorted(iter_target_files(path, stats))
+
+
+def _collect(files: Iterable[str], sink: list[str]) -> Iterator[str]:
+    for file in files:
+        sink.append(file)
+        yield file
+
+
+def _fallback_scan(
+    path: Path,
+    units: dict[str, SourceUnit | None] | None = None,
+    workers: int | None = None,
+    batch_size: int | None = None,
+    files: list[str] | None = None,
+    keep: dict[str, SourceUnit | None] | None = None,
+    keep_files: Collection[str] = (),
+) -> list[DetectionHit]:
+    units = units if units is not None else {}
+    workers = settings.scan_workers if workers is None else workers
+    batch_size = max(1, settings.scan_batch_size if batch_size is None else batch_size)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+
+    # Sorted so hit order is identical for any worker count.
+    files = list_source_files(path) if files is None else sorted(files)
+    pending = [f for f in files if f not in units]
+    scanned: dict[str, list[DetectionHit]] = {}
+    if workers > 1 and len(pending) > batch_size:
+        scanned = _parallel_scan(pending, workers, batch_size)
+
+    hits: list[DetectionHit] = []
+    for file in files:
+        if file in scanned:
+            hits.extend(scanned[file])
+            continue
+        # Units already loaded by semgrep are reused, then released once scanned
+        # unless ``keep`` collects them for files with hits.
+        unit = units.pop(file, None) or load_source_unit(Path(file))
+        if unit is None:
+            continue
+        unit_hits = _scan_unit(unit)
+        if keep is not None and (unit_hits or file in keep_files):
+            keep[file] = unit
+        hits.extend(unit_hits)
+    return hits
+
+
+def _semgrep_binary() -> str:
+    # Prefer the semgrep installed next to the running interpreter.
     try:
         potential_bin = Path(sys.executable).parent / "semgrep"
         if potential_bin.exists():
-            semgrep_bin = str(potential_bin)
+            return str(potential_bin)
     except Exception:
         pass
+    return "semgrep"
+
+
+def _semgrep_batch(command: list[str], batch: list[str], timeout: float) -> list[dict]:
+    """Run semgrep over one shard of files; raises ``subprocess.TimeoutExpired``."""
+    result = subprocess.run(
+        [*command, *batch], check=False, capture_output=True, text=True, timeout=timeout
+    )
+    if result.returncode not in (0, 1):
+        logger.warning(
+            "detector.semgrep.failed",
+            extra={
+                "returncode": result.returncode,
+                "files": len(batch),
+                "stderr": result.stderr[-2000:],
+            },
+        )
+        return []
+    return json.loads(result.stdout or "{}").get("results", [])
+
+
+def _semgrep_findings(
+    rules_path: Path,
+    files: Iterable[str],
+    jobs: int,
+    batch_size: int,
+    timeout: float,
+) -> list[dict]:
+    """Semgrep findings for ``files``, run as parallel shards of ``batch_size`` files.
 
-    cmd = [
-        semgrep_bin,
+    Shards are submitted while ``files`` is still being produced, and each is
+    parsed as soon as it finishes. A shard that times out is split in half and
+    retried once, and whatever still times out is skipped, so a slow file costs
+    its shard's findings rather than the whole scan's; the tree-sitter pass still
+    covers skipped files.
+    """
+    # Version checks and metrics are network round trips that dominate startup.
+    command = [
+        _semgrep_binary(),
         "--config",
         str(rules_path),
         "--json",
-        str(path),
+        "--quiet",
+        "--metrics=off",
+        "--disable-version-check",
+        "--jobs=1",
     ]
-    
-    try:
-        result = subprocess.run(cmd, check=False, capture_output=True, text=True, timeout=30)
-    except subprocess.TimeoutExpired:
-        print(f"Error: semgrep timed out after 30s on {path}")
-        return []
-    except FileNotFoundError:
-        print(f"Error: semgrep binary not found at '{semgrep_bin}' or in PATH.")
-        return []
-    except Exception as e:
-        print(f"Error running semgrep: {e}")
-        return []
+    # Keyed by shard position; a retried half extends its parent's key, so sorting
+    # the keys keeps findings in file order.
+    findings: dict[tuple[int, ...], list[dict]] = {}
+    skipped = 0
+    total = 0
+    source = iter(files)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures: dict[Future, tuple[tuple[int, ...], list[str]]] = {}
+        for idx, batch in enumerate(iter(lambda: list(islice(source, batch_size)), [])):
+            futures[pool.submit(_semgrep_batch, command, batch, timeout)] = ((idx,), batch)
+            total += len(batch)
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, batch = futures.pop(future)
+                try:
+                    findings[key] = future.result()
+                except subprocess.TimeoutExpired:
+                    if len(key) == 1 and len(batch) > 1:
+                        half = len(batch) // 2
+                        for part, sub_batch in enumerate((batch[:half], batch[half:])):
+                            future = pool.submit(_semgrep_batch, command, sub_batch, timeout)
+                            futures[future] = ((*key, part), sub_batch)
+                        continue
+                    skipped += len(batch)
+                    logger.warning(
+                        "detector.semgrep.timeout", extra={"files": len(batch), "timeout": timeout}
+                    )
+                except FileNotFoundError:
+                    logger.error("detector.semgrep.missing", extra={"binary": command[0]})
+                    for pending in futures:
+                        pending.cancel()
+                    return []
+                except Exception:
+                    logger.exception("detector.semgrep.error", extra={"files": len(batch)})
+    if skipped:
+        logger.warning("detector.semgrep.partial", extra={"skipped_files": skipped, "files": total})
+    return [finding for idx in sorted(findings) for finding in findings[idx]]
 
-    if result.returncode not in (0, 1):
-        if result.stderr:
-            print(f"Semgrep Error: {result.stderr}")
-        return []
 
-    payload = json.loads(result.stdout or "{}")
-    findings = payload.get("results", [])
+def _semgrep_scan(
+    path: Path,
+    rules_path: Path,
+    units: dict[str, SourceUnit | None] | None = None,
+    files: Iterable[str] | None = None,
+) -> list[DetectionHit]:
+    files = iter_target_files(path) if files is None else files
+    findings = _semgrep_findings(
+        rules_path,
+        files,
+        jobs=settings.semgrep_jobs,
+        batch_size=max(1, settings.semgrep_batch_size),
+        timeout=settings.semgrep_timeout_seconds,
+    )
+    units = units if units is not None else {}
     hits: list[DetectionHit] = []
     for finding in findings:
         start = finding.get("start", {})
         end = finding.get("end", {})
         extra = finding.get("extra", {})
         file_path = finding.get("path", "")
-        
+
+        unit = _get_unit(units, file_path)
+
         # If semgrep returns masked lines or no lines, read from file
         snippet = extra.get("lines", "").strip()
         if not snippet or snippet == "requires login":
-            try:
-                line_start = int(start.get("line", 1))
-                line_end = int(end.get("line", line_start))
-                snippet = _extract_segment(Path(file_path).read_text(encoding="utf-8", errors="ignore"), line_start - 1, line_end - 1)
-            except Exception:
+            line_start = int(start.get("line", 1))
+            line_end = int(end.get("line", line_start))
+            if unit is not None:
+                snippet = unit.segment(line_start - 1, line_end - 1)
+            else:
                 snippet = extra.get("message", "")
 
         if _is_noise(snippet):
             continue
 
-        local_context = _get_context(file_path, int(start.get("line", 1)))
-        
+        local_context = _get_context(unit, int(start.get("line", 1)))
+
         hits.append(
             DetectionHit(
                 file=file_path,
@@ -198,15 +379,42 @@ def _semgrep_scan(path: Path, rules_path: Path) -> list[DetectionHit]:
         )
     return hits
 
-def _extract_segment(text: str, start_row: int, end_row: int) -> str:
-    lines = text.splitlines()
-    return "\n".join(lines[start_row : min(end_row + 1, len(lines))])
 
+def scan_for_ai_calls(
+    target_path: str,
+    rules_path: str,
+    files: list[str] | None = None,
+    stats: WalkStats | None = None,
+    units: dict[str, SourceUnit | None] | None = None,
+) -> list[DetectionHit]:
+    """Detect AI calls under ``target_path``, or only in ``files`` when given.
 
-def scan_for_ai_calls(target_path: str, rules_path: str) -> list[DetectionHit]:
+    Without ``files`` the target is walked once, with skipped files counted in
+    ``stats``; semgrep starts on the first shard before the walk finishes. When
+    ``units`` is given it receives the loaded source of files with hits, so
+    planning does not read them again.
+    """
     path = Path(target_path).resolve()
-    semgrep_hits = _semgrep_scan(path, Path(rules_path).resolve())
-    fallback_hits = _fallback_scan(path)
+    if files is not None and not files:
+        return []
+    walked: list[str] = []
+    if files is None:
+        source = _collect(iter_target_files(path, stats), walked)
+    else:
+        source = iter(sorted(files))
+    # Files are loaded once and shared between the semgrep and tree-sitter passes.
+    loaded: dict[str, SourceUnit | None] = {}
+    semgrep_hits = _semgrep_scan(path, Path(rules_path).resolve(), loaded, source)
+    # Finish the walk if semgrep stopped early, e.g. when its binary is missing.
+    for _ in source:
+        pass
+    fallback_hits = _fallback_scan(
+        path,
+        loaded,
+        files=walked if files is None else files,
+        keep=units,
+        keep_files={hit.file for hit in semgrep_hits},
+    )
 
     merged: dict[tuple[str, int, str], DetectionHit] = {}
     for hit in semgrep_hits + fallback_hits:
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import os
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.analysis.source_unit import SCANNABLE_SUFFIXES
+from app.core.config import settings
+
+SNIFF_BYTES = 8192
+MINIFIED_SUFFIXES = (".min.js", ".bundle.js")
+# Only JavaScript is shipped minified; long lines in other sources are usually prompts.
+BUNDLE_SUFFIXES = (".js",)
+# Minified bundles are almost solid code (a few percent whitespace) while hand-written
+# source is usually a fifth or more; a tenth leaves margin for dense hand-written files.
+MINIFIED_WHITESPACE_RATIO = 0.1
+# WalkStats counter bumped for each skip reason.
+SKIP_COUNTERS = {
+    "excluded": "pruned_dirs",
+    "ignored directory": "pruned_dirs",
+    "ignored": "ignored",
+    "too large": "too_large",
+    "binary": "binary",
+    "minified": "minified",
+}
+
+
+@dataclass(slots=True)
+class WalkStats:
+    files: int = 0
+    pruned_dirs: int = 0
+    ignored: int = 0
+    too_large: int = 0
+    binary: int = 0
+    minified: int = 0
+    # (path, reason) for every pruned directory and skipped file, in walk order.
+    skipped_paths: list[tuple[str, str]] = field(default_factory=list)
+
+    def skip(self, path: str, reason: str) -> None:
+        self.skipped_paths.append((path, reason))
+        counter = SKIP_COUNTERS[reason]
+        setattr(self, counter, getattr(self, counter) + 1)
+
+    @property
+    def skipped(self) -> int:
+        return self.ignored + self.too_large + self.binary + self.minified
+
+    def summary(self) -> str:
+        return (
+            f"{self.skipped} files skipped ({self.ignored} ignored, {self.too_large} over the size cap, "
+            f"{self.binary} binary, {self.minified} minified), {self.pruned_dirs} directories pruned."
+        )
+
+
+@dataclass(slots=True)
+class IgnoreRule:
+    base: str  # directory of the .gitignore, relative to the walk root ("" for the root)
+    regex: re.Pattern[str]
+    negate: bool
+    dir_only: bool
+
+
+def _glob_to_regex(pattern: str) -> str:
+    out: list[str] = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1 :]:
+            end = pattern.index("]", i + 1)
+            body = pattern[i + 1 : end]
+            out.append("[" + ("^" + body[1:] if body.startswith("!") else body) + "]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+def parse_gitignore(text: str, base: str = "") -> list[IgnoreRule]:
+    """Rules from a .gitignore file: globs, ``**``, ``!`` negation, ``/`` anchoring and dir-only patterns."""
+    rules: list[IgnoreRule] = []
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        if line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # A pattern with a slash before its end is relative to the .gitignore's directory;
+        # otherwise it matches a name at any depth below it.
+        anchored = "/" in line
+        body = _glob_to_regex(line.lstrip("/"))
+        regex = re.compile(("^" if anchored else "(?:^|.*/)") + body + "$")
+        rules.append(IgnoreRule(base, regex, negate, dir_only))
+    return rules
+
+
+def is_ignored(rules: list[IgnoreRule], rel_path: str, is_dir: bool) -> bool:
+    """Whether ``rel_path`` (relative to the walk root) is ignored; the last matching rule wins."""
+    ignored = False
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        if rule.base:
+            if not rel_path.startswith(rule.base + "/"):
+                continue
+            candidate = rel_path[len(rule.base) + 1 :]
+        else:
+            candidate = rel_path
+        if rule.regex.match(candidate):
+            ignored = not rule.negate
+    return ignored
+
+
+def _looks_minified(name: str, head: bytes, max_line_length: int) -> bool:
+    """Whether a JavaScript file is a minified bundle, judged by name or by its first block.
+
+    One long line is not enough: the whole block must average more than
+    ``max_line_length`` characters per line and be nearly free of whitespace.
+    """
+    if name.endswith(MINIFIED_SUFFIXES):
+        return True
+    if not name.endswith(BUNDLE_SUFFIXES) or not head:
+        return False
+    average_line = len(head) / (head.count(b"\n") + 1)
+    whitespace = sum(head.count(char) for char in b" \t\r\n") / len(head)
+    return average_line > max_line_length and whitespace < MINIFIED_WHITESPACE_RATIO
+
+
+def iter_source_files(
+    root: Path,
+    stats: WalkStats | None = None,
+    exclude_dirs: Iterable[str] | None = None,
+    max_file_bytes: int | None = None,
+    respect_gitignore: bool | None = None,
+    max_line_length: int | None = None,
+) -> Iterator[str]:
+    """Yield scannable files under ``root`` lazily, in sorted depth-first order.
+
+    Directories named in ``exclude_dirs`` or ignored by a .gitignore are never
+    entered. Files above ``max_file_bytes``, containing NUL bytes in their first
+    block, or looking like minified JavaScript are skipped. Everything skipped is
+    counted and listed in ``stats``.
+    """
+    stats = stats if stats is not None else WalkStats()
+    excluded = frozenset(settings.scan_exclude_dirs if exclude_dirs is None else exclude_dirs)
+    max_file_bytes = settings.scan_max_file_bytes if max_file_bytes is None else max_file_bytes
+    respect_gitignore = (
+        settings.scan_respect_gitignore if respect_gitignore is None else respect_gitignore
+    )
+    max_line_length = (
+        settings.scan_minified_line_length if max_line_length is None else max_line_length
+    )
+
+    stack: list[tuple[str, str, list[IgnoreRule]]] = [(str(root), "", [])]
+    while stack:
+        directory, rel_dir, rules = stack.pop()
+        if respect_gitignore:
+            try:
+                with open(
+                    os.path.join(directory, ".gitignore"), encoding="utf-8", errors="ignore"
+                ) as handle:
+                    rules = rules + parse_gitignore(handle.read(), rel_dir)
+            except OSError:
+                pass
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirs: list[tuple[str, str, list[IgnoreRule]]] = []
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                if entry.name in excluded:
+                    stats.skip(entry.path, "excluded")
+                    continue
+                if rules and is_ignored(rules, rel_path, True):
+                    stats.skip(entry.path, "ignored directory")
+                    continue
+                subdirs.append((entry.path, rel_path, rules))
+                continue
+            if os.path.splitext(entry.name)[1].lower() not in SCANNABLE_SUFFIXES:
+                continue
+            if rules and is_ignored(rules, rel_path, False):
+                stats.skip(entry.path, "ignored")
+                continue
+            try:
+                if entry.stat().st_size > max_file_bytes:
+                    stats.skip(entry.path, "too large")
+                    continue
+                with open(entry.path, "rb") as handle:
+                    head = handle.read(SNIFF_BYTES)
+            except OSError:
+                continue
+            if b"\0" in head:
+                stats.skip(entry.path, "binary")
+                continue
+            if _looks_minified(entry.name, head, max_line_length):
+                stats.skip(entry.path, "minified")
+                continue
+            stats.files += 1
+            yield entry.path
+        # Reversed so the stack pops subdirectories in name order.
+        stack.extend(reversed(subdirs))
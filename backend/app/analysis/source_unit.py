@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+try:
+    from tree_sitter_language_pack import get_parser
+except Exception:  # pragma: no cover
+    get_parser = None
+
+LANGUAGE_BY_SUFFIX = {
+    ".py": "python",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+}
+SCANNABLE_SUFFIXES = frozenset(LANGUAGE_BY_SUFFIX)
+
+
+@lru_cache(maxsize=None)
+def parser_for(language: str) -> Any:
+    if get_parser is None:
+        return None
+    try:
+        return get_parser(language)
+    except Exception:
+        return None
+
+
+@dataclass(slots=True)
+class SourceUnit:
+    """A file loaded once and shared by every detector stage.
+
+    Lines, the line-offset table and the tree-sitter tree are computed on first
+    use and cached, so no consumer has to touch the disk or re-split the text.
+    """
+
+    path: Path
+    data: bytes
+    text: str
+    language: str | None = None
+    _lines: list[str] | None = field(default=None, repr=False)
+    _line_offsets: list[int] | None = field(default=None, repr=False)
+    _tree: Any = field(default=None, repr=False)
+    _parsed: bool = field(default=False, repr=False)
+
+    @property
+    def lines(self) -> list[str]:
+        if self._lines is None:
+            self._lines = self.text.splitlines()
+        return self._lines
+
+    @property
+    def line_offsets(self) -> list[int]:
+        """Character offset of the start of each line, plus the end of the text."""
+        if self._line_offsets is None:
+            offsets = [0]
+            for line in self.text.splitlines(keepends=True):
+                offsets.append(offsets[-1] + len(line))
+            self._line_offsets = offsets
+        return self._line_offsets
+
+    @property
+    def tree(self) -> Any:
+        if not self._parsed:
+            self._parsed = True
+            parser = parser_for(self.language) if self.language else None
+            if parser is not None:
+                self._tree = parser.parse(self.data)
+        return self._tree
+
+    def line_at(self, offset: int) -> int:
+        """1-based line number containing character ``offset``."""
+        return bisect_right(self.line_offsets, offset)
+
+    def segment(self, start_row: int, end_row: int) -> str:
+        lines = self.lines
+        return "\n".join(lines[max(0, start_row) : min(end_row + 1, len(lines))])
+
+    def context(self, line_start: int, window_up: int = 15, window_down: int = 5) -> str:
+        lines = self.lines
+        start = max(0, line_start - 1 - window_up)
+        end = min(len(lines), line_start + window_down)
+        return "\n".join(lines[start:end])
+
+
+def load_source_unit(path: Path) -> SourceUnit | None:
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    return SourceUnit(
+        path=path,
+        data=data,
+        text=data.decode("utf-8", errors="ignore"),
+        language=LANGUAGE_BY_SUFFIX.get(path.suffix.lower()),
+    )
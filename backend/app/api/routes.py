@@ -5,25 +5,47 @@ import time
 import zipfile
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, Form
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
 from git import Repo
-from sqlalchemy import func
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.api.deps import require_local_auth
-from app.db.session import get_db
+from app.db.session import SessionLocal, get_db
 from app.models.candidate import Candidate
 from app.models.job import Job
 from app.models.scan import Scan
-from app.schemas.candidate import CandidateOut, PatchResponse, ShadowRunResponse
-from app.schemas.metrics import MetricsResponse
-from app.schemas.scan import ScanRequest, GitScanRequest, ScanResponse, StatusResponse
-from app.services.git_service import apply_patch_in_branch, revert_branch
 from app.refactor.planner import get_rule_code
-from app.workers.queue import enqueue_job
+from app.schemas.candidate import (
+    CandidateOut,
+    CandidatePage,
+    CandidateSummary,
+    PatchResponse,
+    ShadowRunResponse,
+)
+from app.schemas.job import JobOut
+from app.schemas.metrics import LLMCacheStats, MetricsBucket, MetricsResponse
+from app.schemas.scan import (
+    GitScanRequest,
+    ScanLogEntryOut,
+    ScanRequest,
+    ScanResponse,
+    StatusResponse,
+)
+from app.services.git_service import apply_patch_in_branch, revert_branch
+from app.services.llm_cache import get_response_cache
+from app.services.metrics import daily_rollups, get_rollup, record_scan
+from app.services.results import CandidateFilters, candidate_page, candidate_query
+from app.services.scan_events import stream_scan
+from app.services.scan_log import tail_entries
+from app.workers.queue import enqueue_job, wait_for_job
 
 router = APIRouter(prefix="/api", dependencies=[Depends(require_local_auth)])
 
+# Seconds a shadow-run request waits for its job before pointing the client at /api/jobs.
+SHADOW_RUN_TIMEOUT = 5.0
+
 
 @router.post("/scan", response_model=ScanResponse)
 def start_scan(payload: ScanRequest, db: Session = Depends(get_db)) -> ScanResponse:
@@ -31,42 +53,43 @@ def start_scan(payload: ScanRequest, db: Session = Depends(get_db)) -> ScanRespo
     if not target.exists():
         raise HTTPException(status_code=400, detail="Path not found")
 
-    scan = Scan(target_path=str(target), status="queued", progress=0, logs="")
+    scan = Scan(target_path=str(target), status="queued", progress=0)
     db.add(scan)
+    record_scan(db)
     db.commit()
     db.refresh(scan)
 
     enqueue_job(
-        "scan", 
+        "scan",
         {
-            "scan_id": scan.id, 
+            "scan_id": scan.id,
             "target_path": str(target),
             "api_key": payload.api_key,
-            "api_provider": payload.api_provider
-        }, 
-        scan_id=scan.id
+            "api_provider": payload.api_provider,
+        },
+        scan_id=scan.id,
+        priority=payload.priority,
     )
     return ScanResponse(scan_id=scan.id, status=scan.status)
 
 
-
 @router.post("/scan/upload", response_model=ScanResponse)
 async def upload_scan(
-    file: UploadFile = File(...), 
+    file: UploadFile = File(...),
     api_key: str | None = Form(None),
     api_provider: str | None = Form(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
 ) -> ScanResponse:
     if not file.filename.endswith(".zip"):
         raise HTTPException(status_code=400, detail="Only .zip files are supported")
 
     upload_dir = Path(tempfile.gettempdir()) / "llminate_uploads"
     upload_dir.mkdir(exist_ok=True)
-    
+
     # create a unique directory for this scan
     scan_subdir = upload_dir / f"scan_{int(time.time())}"
     scan_subdir.mkdir(exist_ok=True)
-    
+
     zip_path = scan_subdir / file.filename
 
     with zip_path.open("wb") as buffer:
@@ -74,7 +97,7 @@ async def upload_scan(
 
     extract_path = scan_subdir / "extracted"
     extract_path.mkdir(exist_ok=True)
-    
+
     try:
         with zipfile.ZipFile(zip_path, "r") as zip_ref:
             zip_ref.extractall(extract_path)
@@ -90,20 +113,21 @@ async def upload_scan(
     else:
         target = extract_path
 
-    scan = Scan(target_path=str(target.resolve()), status="queued", progress=0, logs="")
+    scan = Scan(target_path=str(target.resolve()), status="queued", progress=0)
     db.add(scan)
+    record_scan(db)
     db.commit()
     db.refresh(scan)
 
     enqueue_job(
-        "scan", 
+        "scan",
         {
-            "scan_id": scan.id, 
+            "scan_id": scan.id,
             "target_path": str(target.resolve()),
             "api_key": api_key,
-            "api_provider": api_provider
-        }, 
-        scan_id=scan.id
+            "api_provider": api_provider,
+        },
+        scan_id=scan.id,
     )
     return ScanResponse(scan_id=scan.id, status=scan.status)
 
@@ -112,46 +136,94 @@ async def upload_scan(
 def start_git_scan(payload: GitScanRequest, db: Session = Depends(get_db)) -> ScanResponse:
     clone_dir = Path(tempfile.gettempdir()) / "llminate_clones"
     clone_dir.mkdir(exist_ok=True)
-    
+
     # create a unique directory for this repo
     # Extract repo name for readability if possible
     repo_name = payload.url.rstrip("/").split("/")[-1].replace(".git", "")
     target_dir = clone_dir / f"{repo_name}_{int(time.time())}"
-    
+
     try:
         Repo.clone_from(payload.url, target_dir, depth=1)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Git clone failed: {str(e)}")
 
-    scan = Scan(target_path=str(target_dir.resolve()), status="queued", progress=0, logs="")
+    scan = Scan(target_path=str(target_dir.resolve()), status="queued", progress=0)
     db.add(scan)
+    record_scan(db)
     db.commit()
     db.refresh(scan)
 
     enqueue_job(
-        "scan", 
+        "scan",
         {
-            "scan_id": scan.id, 
+            "scan_id": scan.id,
             "target_path": str(target_dir.resolve()),
             "api_key": payload.api_key,
-            "api_provider": payload.api_provider
-        }, 
-        scan_id=scan.id
+            "api_provider": payload.api_provider,
+        },
+        scan_id=scan.id,
+        priority=payload.priority,
     )
     return ScanResponse(scan_id=scan.id, status=scan.status)
 
 
 @router.get("/status/{scan_id}", response_model=StatusResponse)
-def get_status(scan_id: int, db: Session = Depends(get_db)) -> StatusResponse:
+def get_status(
+    scan_id: int,
+    limit: int = Query(default=200, ge=1, le=1000),
+    before: int | None = None,
+    db: Session = Depends(get_db),
+) -> StatusResponse:
     scan = db.get(Scan, scan_id)
     if not scan:
         raise HTTPException(status_code=404, detail="Scan not found")
-    return StatusResponse(scan_id=scan.id, status=scan.status, progress=scan.progress, logs=scan.logs)
+    entries = tail_entries(db, scan_id, limit, before)
+    return StatusResponse(
+        scan_id=scan.id,
+        status=scan.status,
+        progress=scan.progress,
+        logs="\n".join(entry.message for entry in entries),
+        entries=[ScanLogEntryOut.model_validate(entry) for entry in entries],
+        next_before=entries[0].seq if entries and entries[0].seq > 1 else None,
+    )
+
+
+@router.get("/status/{scan_id}/stream")
+def stream_status(
+    scan_id: int,
+    offset: int | None = None,
+    last_event_id: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    if not db.get(Scan, scan_id):
+        raise HTTPException(status_code=404, detail="Scan not found")
+    if offset is None:
+        offset = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    return StreamingResponse(
+        stream_scan(scan_id, offset),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def candidate_filters(
+    risk: list[str] = Query(default=[]),
+    intent: list[str] = Query(default=[]),
+    min_score: float | None = None,
+    max_score: float | None = None,
+) -> CandidateFilters:
+    return CandidateFilters(
+        risk_levels=risk, intents=intent, min_score=min_score, max_score=max_score
+    )
 
 
 @router.get("/results/{scan_id}", response_model=dict[str, list[CandidateOut]])
-def get_results(scan_id: int, db: Session = Depends(get_db)) -> dict[str, list[CandidateOut]]:
-    rows = db.query(Candidate).filter(Candidate.scan_id == scan_id).order_by(Candidate.file.asc(), Candidate.line_start.asc()).all()
+def get_results(
+    scan_id: int,
+    filters: CandidateFilters = Depends(candidate_filters),
+    db: Session = Depends(get_db),
+) -> dict[str, list[CandidateOut]]:
+    rows = db.scalars(candidate_query(scan_id, filters))
     grouped: dict[str, list[CandidateOut]] = {}
     for row in rows:
         c = CandidateOut.model_validate(row)
@@ -161,6 +233,26 @@ def get_results(scan_id: int, db: Session = Depends(get_db)) -> dict[str, list[C
     return grouped
 
 
+@router.get("/scans/{scan_id}/candidates", response_model=CandidatePage)
+def list_candidates(
+    scan_id: int,
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = None,
+    view: str = Query(default="summary", pattern="^(summary|full)$"),
+    filters: CandidateFilters = Depends(candidate_filters),
+    db: Session = Depends(get_db),
+) -> CandidatePage:
+    full = view == "full"
+    try:
+        rows, next_cursor = candidate_page(db, scan_id, filters, limit, cursor, full)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    schema = CandidateOut if full else CandidateSummary
+    return CandidatePage(
+        items=[schema.model_validate(row) for row in rows], next_cursor=next_cursor
+    )
+
+
 @router.get("/patch/{scan_id}/{candidate_id}", response_model=PatchResponse)
 def get_patch(scan_id: int, candidate_id: int, db: Session = Depends(get_db)) -> PatchResponse:
     candidate = (
@@ -200,7 +292,9 @@ def apply_patch(
     if not safety_flag:
         raise HTTPException(status_code=400, detail="Set safety_flag=true to apply patch")
 
-    branch = apply_patch_in_branch(str(Path(__file__).resolve().parents[3]), scan_id, candidate_id, candidate.patch_diff)
+    branch = apply_patch_in_branch(
+        str(Path(__file__).resolve().parents[3]), scan_id, candidate_id, candidate.patch_diff
+    )
     return {"status": "applied", "branch": branch}
 
 
@@ -211,41 +305,83 @@ def revert_patch(scan_id: int, candidate_id: int) -> dict[str, str]:
     return {"status": "reverted", "branch": branch}
 
 
-@router.post("/shadow-run/{scan_id}/{candidate_id}", response_model=ShadowRunResponse)
-def shadow_run(scan_id: int, candidate_id: int, db: Session = Depends(get_db)) -> ShadowRunResponse:
-    candidate = (
-        db.query(Candidate)
-        .filter(Candidate.scan_id == scan_id, Candidate.id == candidate_id)
-        .first()
+def _enqueue_shadow(scan_id: int, candidate_id: int) -> int:
+    # Runs in a worker thread, so it opens its own session rather than sharing the request's.
+    with SessionLocal() as db:
+        candidate = (
+            db.query(Candidate)
+            .filter(Candidate.scan_id == scan_id, Candidate.id == candidate_id)
+            .first()
+        )
+        if not candidate:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+    return enqueue_job(
+        "shadow", {"candidate_id": candidate_id}, scan_id=scan_id, candidate_id=candidate_id
     )
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate not found")
 
-    job_id = enqueue_job("shadow", {"candidate_id": candidate.id}, scan_id=scan_id, candidate_id=candidate.id)
 
-    for _ in range(50):
+def _job_outcome(job_id: int) -> tuple[str, str]:
+    with SessionLocal() as db:
         job = db.get(Job, job_id)
-        if job and job.status == "completed":
-            data = json.loads(job.result or "{}")
-            return ShadowRunResponse(**data)
-        db.expire_all()
-        time.sleep(0.1)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job.result, job.error
+
 
-    raise HTTPException(status_code=504, detail="Shadow run timed out")
+@router.post("/shadow-run/{scan_id}/{candidate_id}", response_model=ShadowRunResponse)
+async def shadow_run(scan_id: int, candidate_id: int) -> ShadowRunResponse:
+    job_id = await run_in_threadpool(_enqueue_shadow, scan_id, candidate_id)
+    status = await wait_for_job(job_id, SHADOW_RUN_TIMEOUT, session_factory=SessionLocal)
+    if status == "completed":
+        result, _ = await run_in_threadpool(_job_outcome, job_id)
+        return ShadowRunResponse(**json.loads(result or "{}"))
+    if status == "failed":
+        _, error = await run_in_threadpool(_job_outcome, job_id)
+        raise HTTPException(status_code=500, detail=f"Shadow run failed: {error}")
+
+    raise HTTPException(
+        status_code=504, detail=f"Shadow run still in progress; poll /api/jobs/{job_id}"
+    )
 
 
-@router.get("/metrics", response_model=MetricsResponse)
-def metrics(db: Session = Depends(get_db)) -> MetricsResponse:
-    total_scans = db.query(func.count(Scan.id)).scalar() or 0
-    total_candidates = db.query(func.count(Candidate.id)).scalar() or 0
-    calls_saved = db.query(func.coalesce(func.sum(Candidate.estimated_api_calls_saved), 0)).scalar() or 0
-    avg_score = db.query(func.coalesce(func.avg(Candidate.rule_solvability_score), 0.0)).scalar() or 0.0
-    avg_latency = db.query(func.coalesce(func.avg(Candidate.latency_improvement_ms), 0.0)).scalar() or 0.0
+@router.get("/jobs/{job_id}", response_model=JobOut)
+def get_job(job_id: int, db: Session = Depends(get_db)) -> JobOut:
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobOut.model_validate(job)
 
+
+@router.get("/metrics", response_model=MetricsResponse)
+def metrics(
+    days: int = Query(default=30, ge=0, le=366), db: Session = Depends(get_db)
+) -> MetricsResponse:
+    total = MetricsBucket.from_rollup(get_rollup(db, "total", "all"))
+    cache = get_response_cache()
+    cache_stats = None
+    if cache is not None:
+        lookups = cache.stats.hits + cache.stats.misses
+        cache_stats = LLMCacheStats(
+            hits=cache.stats.hits,
+            misses=cache.stats.misses,
+            hit_rate=cache.stats.hits / lookups if lookups else 0.0,
+            expired=cache.stats.expired,
+            evictions=cache.stats.evictions,
+            entries=cache.entries(),
+        )
     return MetricsResponse(
-        total_scans=int(total_scans),
-        total_candidates=int(total_candidates),
-        estimated_api_calls_saved=int(calls_saved),
-        avg_rule_solvability_score=float(avg_score),
-        avg_latency_improvement_ms=float(avg_latency),
+        total_scans=total.scans,
+        total_candidates=total.candidates,
+        estimated_api_calls_saved=total.estimated_api_calls_saved,
+        avg_rule_solvability_score=total.avg_rule_solvability_score,
+        avg_latency_improvement_ms=total.avg_latency_improvement_ms,
+        daily=[MetricsBucket.from_rollup(row) for row in daily_rollups(db, days)] if days else [],
+        llm_cache=cache_stats,
     )
+
+
+@router.get("/metrics/scans/{scan_id}", response_model=MetricsBucket)
+def scan_metrics(scan_id: int, db: Session = Depends(get_db)) -> MetricsBucket:
+    if not db.get(Scan, scan_id):
+        raise HTTPException(status_code=404, detail="Scan not found")
+    return MetricsBucket.from_rollup(get_rollup(db, "scan", str(scan_id)), key=str(scan_id))
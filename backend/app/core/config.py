@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,17 +8,88 @@ class Settings(BaseSettings):
     db_url: str = "sqlite:///./app.db"
     local_auth_token: str = "local-dev"
     suggest_only_default: bool = True
-    
+
+    # Database
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_busy_timeout_ms: int = 5000
+    db_sqlite_wal: bool = True
+    db_sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    db_sqlite_cache_kb: int = 65536
+
     # AI Keys
     openai_api_key: str | None = None
     anthropic_api_key: str | None = None
     google_api_key: str | None = None
+    # Override provider endpoints, e.g. for a proxy or a local fake server in tests
+    openai_base_url: str | None = None
+    anthropic_base_url: str | None = None
+
+    # Detector
+    scan_workers: int = 1  # 1 scans in-process, 0 uses every core
+    scan_batch_size: int = 64
+    scan_exclude_dirs: tuple[str, ...] = (
+        ".git",
+        ".hg",
+        ".svn",
+        "node_modules",
+        ".venv",
+        "venv",
+        "__pycache__",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".tox",
+        "dist",
+        ".next",
+        "third_party",
+        "site-packages",
+    )
+    scan_respect_gitignore: bool = True
+    scan_max_file_bytes: int = 1_000_000  # larger files are skipped
+    # Average line length above which dense .js counts as minified.
+    scan_minified_line_length: int = 300
+    semgrep_jobs: int = 2  # semgrep processes run in parallel
+    semgrep_batch_size: int = 200  # files per semgrep process
+    semgrep_timeout_seconds: float = 60.0  # per batch; a timed-out batch is split and retried once
+    incremental_scan: bool = True
+    dedupe_call_sites: bool = True  # plan call sites with identical signature and prompt once
+    scan_flush_every: int = 64  # candidates buffered before a scan commits
+    scan_flush_interval_ms: int = 500  # longest a scan's progress waits to be committed
+
+    # Job queue
+    job_workers: int = 2  # threads serving every kind without a dedicated pool
+    job_worker_pools: dict[str, int] = {}  # e.g. {"shadow": 2} gives shadow runs their own threads
+    job_poll_interval: float = 5.0  # seconds; only catches jobs enqueued by other processes
+    # A running job is requeued if its worker stops renewing the lease for this long.
+    job_lease_seconds: int = 60
 
     # Progressive certainty engine
     similarity_threshold: float = 0.78
     similarity_top_k: int = 3
+    similarity_backend: str = "exact"  # "exact" or "lsh"
+    lsh_tables: int = 32
+    lsh_bits: int = 12
+    lsh_probes: int = 2
+    lsh_max_candidates: int = 128
+    lsh_exact_below: int = 2000
     normalization_similarity_threshold: float = 0.7
     llm_enabled: bool = False
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = "./llm_cache.db"
+    llm_cache_ttl_seconds: int = 30 * 24 * 3600
+    llm_cache_max_entries: int = 20000
+    plan_cache_enabled: bool = True
+    plan_cache_path: str = "./plan_cache.db"
+    plan_cache_max_entries: int = 50000
+    llm_concurrency: int = 8  # provider requests in flight per process
+    llm_rate_per_second: float = 5.0  # per provider; 0 disables rate limiting
+    llm_rate_burst: int = 10
+    llm_rate_limits: dict[str, float] = {}  # per-provider overrides, e.g. {"anthropic": 2}
+    llm_max_retries: int = 4
+    llm_backoff_base: float = 0.5
+    llm_backoff_max: float = 20.0
+    plan_batch_size: int = 32
     deterministic_capable_intents: tuple[str, ...] = (
         "yes_no_classification",
         "structured_extraction",
@@ -26,7 +99,7 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file="../.env",  # Look for .env in the project root (one level up from backend/)
         env_file_encoding="utf-8",
-        extra="ignore"
+        extra="ignore",
     )
 
 
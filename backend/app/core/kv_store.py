@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    tag TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entries_accessed ON entries (accessed_at);
+"""
+
+# Eviction trims this share of ``max_entries`` below the cap, so a full store
+# evicts once per that many puts instead of on every put.
+EVICTION_HEADROOM = 0.1
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+
+class SQLiteKVStore:
+    """String values by key in a local SQLite file, shared by the on-disk caches.
+
+    Entries older than ``ttl_seconds`` (if set) are treated as misses and deleted.
+    Each entry carries a ``tag`` so a cache can drop everything written under an
+    older version. The row count is tracked in memory rather than counted on every
+    put; once it passes ``max_entries`` it is resynced, since other processes may
+    share the file, and the least recently read entries are evicted.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int,
+        ttl_seconds: float | None = None,
+        retired_tables: tuple[str, ...] = (),
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        for table in retired_tables:
+            self._conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        self._rows = self._count()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            value, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._rows -= self._conn.execute(
+                    "DELETE FROM entries WHERE key = ?", (key,)
+                ).rowcount
+                self.stats.expired += 1
+                self.stats.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.stats.hits += 1
+            return value
+
+    def put(self, key: str, value: str, tag: str = "") -> None:
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, tag, value, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, tag, value, now, now),
+            )
+            if exists is None:
+                self._rows += 1
+            if self._rows > self.max_entries:
+                self._evict()
+
+    def delete_other_tags(self, tag: str) -> int:
+        """Delete every entry not written under ``tag`` and return how many were deleted."""
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM entries WHERE tag != ?", (tag,)).rowcount
+            self._rows = max(0, self._rows - deleted)
+        return deleted
+
+    def entries(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._rows = 0
+
+    def _evict(self) -> None:
+        self._rows = self._count()
+        excess = self._rows - self.max_entries
+        if excess <= 0:
+            return
+        excess += int(self.max_entries * EVICTION_HEADROOM)
+        evicted = self._conn.execute(
+            "DELETE FROM entries WHERE key IN"
+            " (SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?)",
+            (excess,),
+        ).rowcount
+        self._rows -= evicted
+        self.stats.evictions += evicted
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
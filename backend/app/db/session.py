@@ -1,11 +1,54 @@
 from collections.abc import Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker
 
-from app.core.config import settings
+from app.core.config import Settings, settings
 
-engine = create_engine(settings.db_url, connect_args={"check_same_thread": False})
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+
+def create_db_engine(url: str, config: Settings = settings) -> Engine:
+    """Create an engine tuned for the database behind ``url``.
+
+    SQLite gets WAL journaling so status reads never wait for a scan's writes,
+    ``synchronous=NORMAL`` (durable in WAL mode except on power loss) and a busy
+    timeout so concurrent writers queue instead of failing. Other databases, such
+    as Postgres, get a pre-pinged, recycled connection pool sized for the API
+    plus the job workers.
+    """
+    pool_options = {
+        "pool_size": config.db_pool_size,
+        "max_overflow": config.db_max_overflow,
+        "pool_timeout": config.db_pool_timeout,
+    }
+    if not url.startswith("sqlite"):
+        return create_engine(url, pool_pre_ping=True, pool_recycle=1800, **pool_options)
+
+    connect_args = {"check_same_thread": False, "timeout": config.db_busy_timeout_ms / 1000}
+    if _is_memory_sqlite(url):
+        engine = create_engine(url, connect_args=connect_args)
+    else:
+        engine = create_engine(url, connect_args=connect_args, **pool_options)
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, _record) -> None:
+        cursor = dbapi_connection.cursor()
+        if config.db_sqlite_wal and not _is_memory_sqlite(url):
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={config.db_sqlite_synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(config.db_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(config.db_sqlite_cache_kb)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    return engine
+
+
+engine = create_db_engine(settings.db_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import Column, DateTime, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine, Inspector
+
+from app import models  # noqa: F401
+from app.db.base import Base
+from app.models.scan_log import ScanLogEntry
+
+logger = logging.getLogger(__name__)
+
+# Indexes no longer declared by the models; ix_candidates_scan_file_line covers scan_id.
+RETIRED_INDEXES = ("ix_candidates_scan_id",)
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """Bring tables created by an earlier release up to the current models.
+
+    ``Base.metadata.create_all`` only creates missing tables, so columns added to
+    existing tables since are added here, along with missing indexes, and retired
+    columns and indexes are migrated and dropped. Every step is idempotent; it runs
+    at startup right after ``create_all``.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        _retire_scan_logs(conn, inspector)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    _add_column(conn, table.name, column)
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        for name in RETIRED_INDEXES:
+            conn.execute(
+                text(f"DROP INDEX IF EXISTS {conn.dialect.identifier_preparer.quote(name)}")
+            )
+
+
+def _retire_scan_logs(conn: Connection, inspector: Inspector) -> None:
+    """Move the old ``scans.logs`` text into scan_log_entries and drop the column.
+
+    The column was ``NOT NULL`` without a server default, so inserts of the
+    current ``Scan`` model fail while it exists.
+    """
+    if not inspector.has_table("scans"):
+        return
+    if "logs" not in {column["name"] for column in inspector.get_columns("scans")}:
+        return
+    migrated = set(conn.scalars(select(ScanLogEntry.scan_id).distinct()))
+    now = datetime.utcnow()
+    entries: list[dict] = []
+    for scan_id, logs in conn.execute(text("SELECT id, logs FROM scans WHERE logs IS NOT NULL")):
+        if scan_id in migrated:
+            continue
+        lines = [line for line in logs.splitlines() if line.strip()]
+        entries.extend(
+            {"scan_id": scan_id, "seq": seq, "level": "info", "message": line, "created_at": now}
+            for seq, line in enumerate(lines, start=1)
+        )
+    if entries:
+        conn.execute(insert(ScanLogEntry), entries)
+    conn.execute(text("ALTER TABLE scans DROP COLUMN logs"))
+    logger.info("db.upgrade.scan_logs_migrated", extra={"entries": len(entries)})
+
+
+def _add_column(conn: Connection, table: str, column: Column) -> None:
+    quote = conn.dialect.identifier_preparer.quote
+    column_type = column.type.compile(dialect=conn.dialect)
+    # Added as nullable: SQLite cannot add a NOT NULL column without a constant
+    # default. Existing rows are backfilled and the ORM sets it on every insert.
+    conn.execute(text(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(column.name)} {column_type}"))
+    value = _backfill_value(column)
+    if value is not None:
+        conn.execute(
+            text(f"UPDATE {quote(table)} SET {quote(column.name)} = :value"), {"value": value}
+        )
+    logger.info("db.upgrade.column_added", extra={"table": table, "column": column.name})
+
+
+def _backfill_value(column: Column) -> Any:
+    default = column.default
+    if default is None:
+        return None
+    if default.is_scalar:
+        return default.arg  # type: ignore[attr-defined]
+    if isinstance(column.type, DateTime):
+        return datetime.utcnow()
+    return None
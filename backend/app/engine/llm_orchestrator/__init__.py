@@ -1,3 +1,12 @@
+from .executor import ProviderExecutor, RetryableProviderError, TokenBucket, get_provider_executor
 from .orchestrator import LLMOrchestrator, NormalizationResult, SynthesisResult
 
-__all__ = ["LLMOrchestrator", "NormalizationResult", "SynthesisResult"]
+__all__ = [
+    "LLMOrchestrator",
+    "NormalizationResult",
+    "ProviderExecutor",
+    "RetryableProviderError",
+    "SynthesisResult",
+    "TokenBucket",
+    "get_provider_executor",
+]
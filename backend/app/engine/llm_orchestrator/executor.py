@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+class RetryableProviderError(Exception):
+    """A provider failure worth retrying: rate limiting, timeouts or a 5xx."""
+
+    def __init__(
+        self, message: str, status_code: int | None = None, retry_after: float | None = None
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def is_retryable_status(status_code: int | None) -> bool:
+    return status_code is not None and (status_code in RETRYABLE_STATUS or status_code >= 500)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, holding at most ``burst``."""
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ProviderExecutor:
+    """Runs provider requests concurrently under a per-process cap, rate limit and retry policy.
+
+    ``map`` fans work (for example one planning chain per candidate) out over
+    ``concurrency`` threads. Every provider request inside that work goes through
+    ``call``, which waits for a token from the provider's bucket, holds one of the
+    ``concurrency`` in-flight slots, and retries ``RetryableProviderError`` with
+    full-jitter exponential backoff (or the server's ``Retry-After``, capped and jittered).
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        rate_per_second: float = 5.0,
+        burst: int = 10,
+        rate_limits: dict[str, float] | None = None,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.rate_limits = rate_limits or {}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._pool: ThreadPoolExecutor | None = None
+
+    def bucket(self, provider: str) -> TokenBucket:
+        with self._lock:
+            if provider not in self._buckets:
+                rate = self.rate_limits.get(provider, self.rate_per_second)
+                self._buckets[provider] = TokenBucket(rate, self.burst)
+            return self._buckets[provider]
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def retry_delay(self, exc: RetryableProviderError, attempt: int) -> float:
+        """Seconds to wait before retrying ``exc``.
+
+        A ``Retry-After`` is capped at ``backoff_max`` so one throttled request cannot park
+        a worker thread for an hour, and jittered so throttled callers do not all retry
+        on the same tick.
+        """
+        if exc.retry_after is None:
+            return self.backoff(attempt)
+        return min(exc.retry_after, self.backoff_max) + random.uniform(0, self.backoff_base)
+
+    def call(self, provider: str, fn: Callable[..., R], *args, **kwargs) -> R:
+        attempt = 0
+        while True:
+            self.bucket(provider).acquire()
+            with self._slots:
+                try:
+                    return fn(*args, **kwargs)
+                except RetryableProviderError as exc:
+                    if attempt >= self.max_retries:
+                        logger.error(
+                            "llm.provider.retries_exhausted",
+                            extra={
+                                "provider": provider,
+                                "status": exc.status_code,
+                                "attempts": attempt + 1,
+                            },
+                        )
+                        raise
+                    status = exc.status_code
+                    delay = self.retry_delay(exc, attempt)
+            logger.warning(
+                "llm.provider.retry",
+                extra={
+                    "provider": provider,
+                    "status": status,
+                    "attempt": attempt + 1,
+                    "delay": delay,
+                },
+            )
+            self._sleep(delay)
+            attempt += 1
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> list[R]:
+        """Apply ``fn`` to every item concurrently and return the results in order."""
+        items = list(items)
+        if len(items) <= 1 or self.concurrency == 1:
+            return [fn(item) for item in items]
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix="llm"
+                )
+            pool = self._pool
+        return list(pool.map(fn, items))
+
+
+_executor: ProviderExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_provider_executor() -> ProviderExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProviderExecutor(
+                concurrency=settings.llm_concurrency,
+                rate_per_second=settings.llm_rate_per_second,
+                burst=settings.llm_rate_burst,
+                rate_limits=settings.llm_rate_limits,
+                max_retries=settings.llm_max_retries,
+                backoff_base=settings.llm_backoff_base,
+                backoff_max=settings.llm_backoff_max,
+            )
+        return _executor
@@ -74,7 +74,9 @@ Code snippet:
             return None
         return NormalizationResult(normalized_snippet=normalized, notes=notes)
 
-    def synthesize_refactor(self, snippet: str, context: str, intent: str) -> SynthesisResult | None:
+    def synthesize_refactor(
+        self, snippet: str, context: str, intent: str
+    ) -> SynthesisResult | None:
         if not self.available:
             return None
 
@@ -114,14 +116,7 @@ Return JSON with keys: replacement_code, tests, guardrails, fallback, confidence
         if not self.available:
             return None
 
-        content = None
-        if self.agent.provider == "openai":
-            content = self.agent._call_openai(prompt)
-        elif self.agent.provider == "anthropic":
-            content = self.agent._call_anthropic(prompt)
-        elif self.agent.provider == "gemini":
-            content = self.agent._call_gemini(prompt)
-
+        content = self.agent.complete(prompt)
         if not content:
             return None
 
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 from dataclasses import asdict
@@ -8,9 +9,25 @@ from typing import Iterable
 
 from app.engine.pattern_registry.ast_utils import compute_signatures, detect_language
 from app.engine.pattern_registry.models import PatternDefinition
+from app.engine.pattern_registry.snapshot import (
+    SNAPSHOT_NAME,
+    read_snapshot,
+    source_manifest,
+    write_snapshot,
+)
 
 logger = logging.getLogger(__name__)
 
+WILDCARD_LANGUAGES = ("any", "unknown")
+
+
+def signature_digest(ast_signature: str) -> str:
+    return hashlib.blake2b(ast_signature.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _language_keys(language: str) -> list[str]:
+    return list(dict.fromkeys((language, *WILDCARD_LANGUAGES)))
+
 
 class PatternRegistry:
     def __init__(self, base_dir: Path | None = None):
@@ -19,17 +36,68 @@ class PatternRegistry:
         base_dir = base_dir.resolve()
         self.public_dir = base_dir / "public"
         self.private_dir = base_dir / "private"
+        self.snapshot_path = base_dir / SNAPSHOT_NAME
         self.patterns: dict[str, PatternDefinition] = {}
+        # Digest of the pattern sources; changes whenever a pattern file is added or edited.
+        self.version = ""
+        # Fitted similarity index for the current patterns, persisted with the snapshot.
+        self.similarity_state: dict | None = None
+        # Hash indexes so exact-match and intent lookups don't scan every pattern.
+        # Lookups return the earliest-loaded pattern among the hits, as the scans did.
+        self._by_signature: dict[tuple[str, str], set[str]] = {}
+        self._by_intent: dict[tuple[str, str], set[str]] = {}
+        self._order: dict[str, int] = {}
 
         self.public_dir.mkdir(parents=True, exist_ok=True)
         self.private_dir.mkdir(parents=True, exist_ok=True)
         self.refresh()
 
     def refresh(self) -> None:
-        self.patterns.clear()
+        """Load patterns from the compiled snapshot, re-parsing the JSON sources only if they changed."""
+        manifest = source_manifest([self.public_dir, self.private_dir])
+        snapshot = read_snapshot(self.snapshot_path, manifest)
+        if snapshot is not None:
+            self.patterns = snapshot["patterns"]
+            self._by_signature = snapshot["by_signature"]
+            self._by_intent = snapshot["by_intent"]
+            self._order = snapshot["order"]
+            self.similarity_state = snapshot["similarity"]
+            self.version = manifest
+            logger.info(
+                "pattern_registry.refresh", extra={"patterns": len(self.patterns), "snapshot": True}
+            )
+            return
+
+        self.patterns = {}
+        self._by_signature = {}
+        self._by_intent = {}
+        self._order = {}
+        self.similarity_state = None
         self._load_from_dir(self.public_dir)
         self._load_from_dir(self.private_dir)
-        logger.info("pattern_registry.refresh", extra={"patterns": len(self.patterns)})
+        self.version = manifest
+        self._write_snapshot()
+        logger.info(
+            "pattern_registry.refresh", extra={"patterns": len(self.patterns), "snapshot": False}
+        )
+
+    def store_similarity_state(self, state: dict) -> None:
+        """Persist a similarity index fitted on ``all_patterns()`` so later starts skip fitting."""
+        self.similarity_state = state
+        self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        write_snapshot(
+            self.snapshot_path,
+            self.version,
+            {
+                "patterns": self.patterns,
+                "by_signature": self._by_signature,
+                "by_intent": self._by_intent,
+                "order": self._order,
+                "similarity": self.similarity_state,
+            },
+        )
 
     def _load_from_dir(self, directory: Path) -> None:
         if not directory.exists():
@@ -43,7 +111,9 @@ class PatternRegistry:
                 elif isinstance(data, dict):
                     self._add_pattern(data)
             except Exception as exc:
-                logger.error("pattern_registry.load_failed", extra={"file": str(file), "error": str(exc)})
+                logger.error(
+                    "pattern_registry.load_failed", extra={"file": str(file), "error": str(exc)}
+                )
 
     def _add_pattern(self, item: dict) -> None:
         try:
@@ -58,29 +128,51 @@ class PatternRegistry:
             pattern.source_ast_signature = signatures.ast_signature
             pattern.control_flow_signature = signatures.control_flow_signature
 
+        self._store(pattern)
+
+    def _store(self, pattern: PatternDefinition) -> None:
+        previous = self.patterns.get(pattern.pattern_id)
+        if previous is not None:
+            self._unindex(previous)
         self.patterns[pattern.pattern_id] = pattern
+        self._order.setdefault(pattern.pattern_id, len(self._order))
+        if pattern.source_ast_signature:
+            key = (pattern.language, signature_digest(pattern.source_ast_signature))
+            self._by_signature.setdefault(key, set()).add(pattern.pattern_id)
+        self._by_intent.setdefault((pattern.intent, pattern.language), set()).add(
+            pattern.pattern_id
+        )
+
+    def _unindex(self, pattern: PatternDefinition) -> None:
+        if pattern.source_ast_signature:
+            key = (pattern.language, signature_digest(pattern.source_ast_signature))
+            self._by_signature.get(key, set()).discard(pattern.pattern_id)
+        self._by_intent.get((pattern.intent, pattern.language), set()).discard(pattern.pattern_id)
+
+    def _first(self, pattern_ids: Iterable[str]) -> PatternDefinition | None:
+        pattern_id = min(pattern_ids, key=self._order.__getitem__, default=None)
+        return self.patterns[pattern_id] if pattern_id is not None else None
 
     def all_patterns(self) -> list[PatternDefinition]:
         return list(self.patterns.values())
 
     def find_exact_match(self, ast_signature: str, language: str) -> PatternDefinition | None:
-        for pattern in self.patterns.values():
-            if not pattern.source_ast_signature:
-                continue
-            if pattern.language not in {language, "any", "unknown"}:
-                continue
-            if pattern.source_ast_signature == ast_signature:
-                return pattern
-        return None
+        if not ast_signature:
+            return None
+        digest = signature_digest(ast_signature)
+        return self._first(
+            pattern_id
+            for lang in _language_keys(language)
+            for pattern_id in self._by_signature.get((lang, digest), ())
+            if self.patterns[pattern_id].source_ast_signature == ast_signature
+        )
 
     def get_by_intent(self, intent: str, language: str) -> PatternDefinition | None:
-        for pattern in self.patterns.values():
-            if pattern.intent != intent:
-                continue
-            if pattern.language not in {language, "any", "unknown"}:
-                continue
-            return pattern
-        return None
+        return self._first(
+            pattern_id
+            for lang in _language_keys(language)
+            for pattern_id in self._by_intent.get((intent, lang), ())
+        )
 
     def save_pattern(self, pattern: PatternDefinition, tenant_id: str = "default") -> None:
         tenant_dir = self.private_dir / tenant_id
@@ -89,7 +181,10 @@ class PatternRegistry:
         payload = asdict(pattern)
         with file_path.open("w", encoding="utf-8") as handle:
             json.dump(payload, handle, indent=2)
-        self.patterns[pattern.pattern_id] = pattern
+        self._store(pattern)
+        self.version = source_manifest([self.public_dir, self.private_dir])
+        self.similarity_state = None
+        self._write_snapshot()
         logger.info("pattern_registry.saved", extra={"pattern_id": pattern.pattern_id})
 
 
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the pickled payload changes shape; older snapshots are then rebuilt.
+SNAPSHOT_FORMAT = 2
+SNAPSHOT_NAME = "registry.snapshot"
+
+
+def source_manifest(directories: list[Path]) -> str:
+    """Digest of every pattern file's path, size and mtime; changes whenever a source changes."""
+    entries: list[str] = []
+    for directory in directories:
+        if not directory.exists():
+            continue
+        for file in directory.rglob("*.json"):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            entries.append(f"{file}\0{stat.st_size}\0{stat.st_mtime_ns}")
+    digest = hashlib.blake2b(digest_size=16)
+    for entry in sorted(entries):
+        digest.update(entry.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def read_snapshot(path: Path, manifest: str) -> dict[str, Any] | None:
+    """Load a snapshot written for ``manifest``; any mismatch or decode error means a rebuild."""
+    if not path.exists():
+        return None
+    try:
+        with path.open("rb") as handle:
+            payload = pickle.load(handle)
+    except Exception as exc:
+        logger.warning(
+            "pattern_registry.snapshot.unreadable", extra={"path": str(path), "error": str(exc)}
+        )
+        return None
+    if not isinstance(payload, dict):
+        return None
+    if payload.get("format") != SNAPSHOT_FORMAT or payload.get("manifest") != manifest:
+        return None
+    return payload
+
+
+def write_snapshot(path: Path, manifest: str, state: dict[str, Any]) -> None:
+    """Atomically replace the snapshot at ``path``.
+
+    Each call writes its own temporary file, so concurrent writers in one process
+    never interleave; the last ``os.replace`` wins with a complete file.
+    """
+    payload = {"format": SNAPSHOT_FORMAT, "manifest": manifest, **state}
+    tmp_path: Path | None = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False
+        ) as handle:
+            tmp_path = Path(handle.name)
+            pickle.dump(payload, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as exc:
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
+        logger.warning(
+            "pattern_registry.snapshot.write_failed", extra={"path": str(path), "error": str(exc)}
+        )
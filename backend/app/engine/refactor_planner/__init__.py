@@ -1,4 +1,12 @@
+from .plan_cache import PlanCache, get_plan_cache
 from .planner import ProgressiveCertaintyPlanner
 from .types import CandidateContext, DecisionTrace, RefactorPlan
 
-__all__ = ["ProgressiveCertaintyPlanner", "CandidateContext", "DecisionTrace", "RefactorPlan"]
+__all__ = [
+    "PlanCache",
+    "get_plan_cache",
+    "ProgressiveCertaintyPlanner",
+    "CandidateContext",
+    "DecisionTrace",
+    "RefactorPlan",
+]
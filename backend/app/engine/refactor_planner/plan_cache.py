@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.kv_store import SQLiteKVStore
+from app.engine.refactor_planner.types import RefactorPlan
+
+logger = logging.getLogger(__name__)
+
+# Plans that only depend on what the key captures: both stages replay a pattern's
+# replacement template. LLM-synthesized code is written for one concrete snippet and
+# its context, which the abstracted AST signature does not identify (identical
+# synthesis prompts are served by the LLM response cache instead). A no-match plan
+# is cheap to rebuild and may only reflect a provider that was unavailable.
+CACHEABLE_STAGES = frozenset({"exact-match", "similarity-normalized"})
+
+
+def plan_cache_key(
+    signature_digest: str, language: str, intent: str, output_contract: str, registry_version: str
+) -> str:
+    payload = json.dumps([signature_digest, language, intent, output_contract, registry_version])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    """Refactor plans from earlier scans in a local SQLite file.
+
+    Keys include the pattern registry version, so editing a pattern makes every
+    older plan a miss; ``use_version`` then deletes them the first time the new
+    version is seen. Past ``max_entries`` the least recently read plans are evicted.
+    """
+
+    def __init__(self, path: Path, max_entries: int):
+        self.path = path
+        self._version: str | None = None
+        self._lock = threading.Lock()
+        # The table of the first release, before the caches shared one store.
+        self._store = SQLiteKVStore(path, max_entries, retired_tables=("plans",))
+        self.stats = self._store.stats
+
+    def use_version(self, registry_version: str) -> None:
+        with self._lock:
+            if registry_version == self._version:
+                return
+            deleted = self._store.delete_other_tags(registry_version)
+            self._version = registry_version
+        if deleted:
+            logger.info("plan_cache.invalidated", extra={"plans": deleted})
+
+    def get(self, key: str) -> RefactorPlan | None:
+        payload = self._store.get(key)
+        if payload is None:
+            return None
+        return RefactorPlan.from_dict(json.loads(payload))
+
+    def put(self, key: str, registry_version: str, plan: RefactorPlan) -> None:
+        if plan.stage not in CACHEABLE_STAGES:
+            return
+        self._store.put(key, json.dumps(plan.to_dict()), tag=registry_version)
+
+    def entries(self) -> int:
+        return self._store.entries()
+
+    def clear(self) -> None:
+        self._store.clear()
+
+
+_cache: PlanCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_plan_cache() -> PlanCache | None:
+    if not settings.plan_cache_enabled:
+        return None
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PlanCache(
+                Path(settings.plan_cache_path), max_entries=settings.plan_cache_max_entries
+            )
+        return _cache
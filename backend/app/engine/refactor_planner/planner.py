@@ -5,12 +5,17 @@ import logging
 
 from app.core.config import settings
 from app.engine.intent_inference import summarize_prompt_intent
-from app.engine.llm_orchestrator import LLMOrchestrator
+from app.engine.llm_orchestrator import LLMOrchestrator, get_provider_executor
 from app.engine.pattern_registry.ast_utils import compute_signatures, detect_language
-from app.engine.pattern_registry.models import PatternDefinition
-from app.engine.pattern_registry.registry import PatternRegistry, get_registry
+from app.engine.pattern_registry.models import PatternDefinition, PatternMatch
+from app.engine.pattern_registry.registry import PatternRegistry, get_registry, signature_digest
+from app.engine.refactor_planner.plan_cache import PlanCache, plan_cache_key
 from app.engine.refactor_planner.types import CandidateContext, DecisionTrace, RefactorPlan
-from app.engine.similarity_engine import SimilarityConfig, SimilarityEngine
+from app.engine.similarity_engine import (
+    SimilarityConfig,
+    SimilarityEngine,
+    create_similarity_engine,
+)
 from app.engine.validator import NormalizationValidator, RefactorValidator
 
 logger = logging.getLogger(__name__)
@@ -22,22 +27,109 @@ class ProgressiveCertaintyPlanner:
         registry: PatternRegistry | None = None,
         similarity_engine: SimilarityEngine | None = None,
         llm_orchestrator: LLMOrchestrator | None = None,
+        plan_cache: PlanCache | None = None,
     ):
         self.registry = registry or get_registry()
-        self.similarity_engine = similarity_engine or SimilarityEngine(
-            SimilarityConfig(threshold=settings.similarity_threshold, top_k=settings.similarity_top_k)
+        self.similarity_engine = similarity_engine or create_similarity_engine(
+            SimilarityConfig(
+                threshold=settings.similarity_threshold, top_k=settings.similarity_top_k
+            )
         )
-        self.similarity_engine.build_index(self.registry.all_patterns())
+        state = self.registry.similarity_state
+        self.similarity_engine.build_index(self.registry.all_patterns(), state)
+        if not self.similarity_engine.accepts_state(state) and self.registry.all_patterns():
+            self.registry.store_similarity_state(self.similarity_engine.export_state())
         self.llm_orchestrator = llm_orchestrator or LLMOrchestrator()
         self.normalizer_validator = NormalizationValidator()
         self.refactor_validator = RefactorValidator()
+        self.plan_cache = plan_cache
+
+    def plan_many(self, candidates: list[CandidateContext]) -> list[RefactorPlan]:
+        """Plan several candidates, scoring every similarity-stage query in one batch.
+
+        Plans cached by an earlier scan for the same signature, intent, output
+        contract and registry version are reused without running any stage.
+        """
+        plans: list[RefactorPlan | None] = [None] * len(candidates)
+        pending: list[tuple[int, str, str, DecisionTrace]] = []
+        cache = self.plan_cache
+        version = self.registry.version
+        if cache is not None:
+            cache.use_version(version)
+        cache_keys: dict[int, str] = {}
+        for idx, candidate in enumerate(candidates):
+            trace = DecisionTrace()
+            language = detect_language(file_path=candidate.file_path, language=candidate.language)
+            signatures = compute_signatures(candidate.snippet, language)
+            if cache is not None:
+                key = plan_cache_key(
+                    signature_digest(signatures.ast_signature),
+                    language,
+                    candidate.intent,
+                    candidate.output_contract,
+                    version,
+                )
+                plans[idx] = cache.get(key)
+                if plans[idx] is not None:
+                    continue
+                cache_keys[idx] = key
+            plans[idx] = self._exact_match_stage(
+                candidate, signatures.ast_signature, language, trace
+            )
+            if plans[idx] is None:
+                pending.append((idx, language, signatures.ast_signature, trace))
+
+        queries = [
+            (
+                summarize_prompt_intent(candidates[idx].prompt, candidates[idx].intent),
+                ast_signature,
+                candidates[idx].output_contract,
+            )
+            for idx, _, ast_signature, _ in pending
+        ]
+        all_matches = self.similarity_engine.score_batch(queries)
+
+        def finish(
+            item: tuple[tuple[int, str, str, DecisionTrace], list[PatternMatch]],
+        ) -> RefactorPlan:
+            (idx, language, _, trace), matches = item
+            candidate = candidates[idx]
+            return (
+                self._similarity_stage(candidate, language, matches, trace)
+                or self._synthesis_stage(candidate, trace)
+                or self._no_match_plan(trace)
+            )
+
+        items = list(zip(pending, all_matches))
+        # The remaining stages may call the provider; run candidates concurrently when they can.
+        if self.llm_orchestrator.available:
+            finished = get_provider_executor().map(finish, items)
+        else:
+            finished = [finish(item) for item in items]
+        for ((idx, _, _, _), _), plan in zip(items, finished):
+            plans[idx] = plan
+        if cache is not None:
+            for idx, key in cache_keys.items():
+                fresh = plans[idx]
+                if fresh is not None:
+                    cache.put(key, version, fresh)
+            if len(cache_keys) < len(candidates):
+                logger.info(
+                    "planner.plan_cache.hits",
+                    extra={
+                        "hits": len(candidates) - len(cache_keys),
+                        "candidates": len(candidates),
+                    },
+                )
+        return [plan for plan in plans if plan is not None]
 
     def plan(self, candidate: CandidateContext) -> RefactorPlan:
-        trace = DecisionTrace()
-        language = detect_language(file_path=candidate.file_path, language=candidate.language)
+        return self.plan_many([candidate])[0]
 
-        signatures = compute_signatures(candidate.snippet, language)
-        exact_pattern = self.registry.find_exact_match(signatures.ast_signature, language)
+    def _exact_match_stage(
+        self, candidate: CandidateContext, ast_signature: str, language: str, trace: DecisionTrace
+    ) -> RefactorPlan | None:
+        exact_pattern = self.registry.find_exact_match(ast_signature, language)
         if exact_pattern and exact_pattern.replacement_template:
             trace.exact_match = True
             trace.stage = "exact-match"
@@ -47,84 +139,101 @@ class ProgressiveCertaintyPlanner:
                 extra={"pattern_id": exact_pattern.pattern_id, "intent": candidate.intent},
             )
             return self._deterministic_plan(candidate, exact_pattern, trace)
+        return None
 
-        prompt_summary = summarize_prompt_intent(candidate.prompt, candidate.intent)
-        matches = self.similarity_engine.score(
-            prompt_summary,
-            signatures.ast_signature,
-            candidate.output_contract,
+    def _similarity_stage(
+        self,
+        candidate: CandidateContext,
+        language: str,
+        matches: list[PatternMatch],
+        trace: DecisionTrace,
+    ) -> RefactorPlan | None:
+        if not matches:
+            return None
+        top = matches[0]
+        trace.similarity_match = True
+        trace.similarity_score = top.score
+        trace.similarity_breakdown = top.breakdown
+        logger.info(
+            "planner.stage.similarity_match",
+            extra={"pattern_id": top.pattern.pattern_id, "score": top.score},
         )
-        if matches:
-            top = matches[0]
-            trace.similarity_match = True
-            trace.similarity_score = top.score
-            trace.similarity_breakdown = top.breakdown
-            logger.info(
-                "planner.stage.similarity_match",
-                extra={"pattern_id": top.pattern.pattern_id, "score": top.score},
-            )
 
-            if top.score >= settings.similarity_threshold:
-                trace.normalization_attempted = True
-                normalized = self.llm_orchestrator.normalize_to_pattern(
-                    candidate.snippet,
-                    top.pattern.pattern_id,
-                    top.pattern.prompt_contract,
-                    top.pattern.constraints,
-                )
-                if normalized:
-                    validation = self.normalizer_validator.validate(
-                        candidate.snippet, normalized.normalized_snippet, language
-                    )
-                    if validation.passed:
-                        trace.normalization_success = True
-                        trace.normalization_notes = normalized.notes or validation.reason
-                        normalized_sig = compute_signatures(normalized.normalized_snippet, language)
-                        pattern_after_norm = self.registry.find_exact_match(
-                            normalized_sig.ast_signature, language
-                        )
-                        if pattern_after_norm and pattern_after_norm.replacement_template:
-                            trace.stage = "similarity-normalized"
-                            trace.reason = "Normalized to deterministic pattern."
-                            logger.info(
-                                "planner.stage.similarity_normalized",
-                                extra={"pattern_id": pattern_after_norm.pattern_id},
-                            )
-                            return self._deterministic_plan(candidate, pattern_after_norm, trace, llm_used=True)
-                    else:
-                        trace.normalization_notes = validation.reason
-                trace.stage = "similarity-normalized"
-                trace.reason = "Normalization failed or could not match pattern."
-
-        if settings.llm_enabled and self.llm_orchestrator.available and candidate.intent in settings.deterministic_capable_intents:
-            trace.llm_synthesis_attempted = True
-            synthesis = self.llm_orchestrator.synthesize_refactor(
+        if top.score >= settings.similarity_threshold:
+            trace.normalization_attempted = True
+            normalized = self.llm_orchestrator.normalize_to_pattern(
                 candidate.snippet,
-                candidate.context,
-                candidate.intent,
+                top.pattern.pattern_id,
+                top.pattern.prompt_contract,
+                top.pattern.constraints,
             )
-            if synthesis:
-                validation = self.refactor_validator.validate_synthesis(synthesis.replacement_code)
+            if normalized:
+                validation = self.normalizer_validator.validate(
+                    candidate.snippet, normalized.normalized_snippet, language
+                )
                 if validation.passed:
-                    trace.llm_synthesis_success = True
-                    trace.stage = "llm-synthesis"
-                    trace.reason = "LLM provided deterministic replacement."
-                    logger.info(
-                        "planner.stage.llm_synthesis",
-                        extra={"intent": candidate.intent, "confidence": synthesis.confidence},
-                    )
-                    explanation = "LLM synthesized replacement; suggestion-only by default."
-                    return RefactorPlan(
-                        can_apply=False,
-                        stage="llm-synthesis",
-                        replacement_code=synthesis.replacement_code,
-                        tests_to_add=synthesis.tests,
-                        explanation=explanation,
-                        decision_trace=trace,
-                        llm_used=True,
-                        suggestion_only=True,
+                    trace.normalization_success = True
+                    trace.normalization_notes = normalized.notes or validation.reason
+                    normalized_sig = compute_signatures(normalized.normalized_snippet, language)
+                    pattern_after_norm = self.registry.find_exact_match(
+                        normalized_sig.ast_signature, language
                     )
+                    if pattern_after_norm and pattern_after_norm.replacement_template:
+                        trace.stage = "similarity-normalized"
+                        trace.reason = "Normalized to deterministic pattern."
+                        logger.info(
+                            "planner.stage.similarity_normalized",
+                            extra={"pattern_id": pattern_after_norm.pattern_id},
+                        )
+                        return self._deterministic_plan(
+                            candidate, pattern_after_norm, trace, llm_used=True
+                        )
+                else:
+                    trace.normalization_notes = validation.reason
+            trace.stage = "similarity-normalized"
+            trace.reason = "Normalization failed or could not match pattern."
+        return None
+
+    def _synthesis_stage(
+        self, candidate: CandidateContext, trace: DecisionTrace
+    ) -> RefactorPlan | None:
+        if not (
+            settings.llm_enabled
+            and self.llm_orchestrator.available
+            and candidate.intent in settings.deterministic_capable_intents
+        ):
+            return None
+        trace.llm_synthesis_attempted = True
+        synthesis = self.llm_orchestrator.synthesize_refactor(
+            candidate.snippet,
+            candidate.context,
+            candidate.intent,
+        )
+        if not synthesis:
+            return None
+        validation = self.refactor_validator.validate_synthesis(synthesis.replacement_code)
+        if not validation.passed:
+            return None
+        trace.llm_synthesis_success = True
+        trace.stage = "llm-synthesis"
+        trace.reason = "LLM provided deterministic replacement."
+        logger.info(
+            "planner.stage.llm_synthesis",
+            extra={"intent": candidate.intent, "confidence": synthesis.confidence},
+        )
+        explanation = "LLM synthesized replacement; suggestion-only by default."
+        return RefactorPlan(
+            can_apply=False,
+            stage="llm-synthesis",
+            replacement_code=synthesis.replacement_code,
+            tests_to_add=synthesis.tests,
+            explanation=explanation,
+            decision_trace=trace,
+            llm_used=True,
+            suggestion_only=True,
+        )
 
+    def _no_match_plan(self, trace: DecisionTrace) -> RefactorPlan:
         trace.stage = "no-match"
         trace.reason = "No safe deterministic refactor path found."
         return RefactorPlan(
@@ -44,6 +44,10 @@ class DecisionTrace:
             "reason": self.reason,
         }
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> DecisionTrace:
+        return cls(**data)
+
 
 @dataclass(slots=True)
 class RefactorPlan:
@@ -57,3 +61,14 @@ class RefactorPlan:
     similarity_score: float | None = None
     llm_used: bool = False
     suggestion_only: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["decision_trace"] = self.decision_trace.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> RefactorPlan:
+        data = dict(data)
+        data["decision_trace"] = DecisionTrace.from_dict(data["decision_trace"])
+        return cls(**data)
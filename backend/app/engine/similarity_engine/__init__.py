@@ -1,3 +1,9 @@
-from .engine import SimilarityConfig, SimilarityEngine
+from .ann import LSHSimilarityEngine
+from .engine import SimilarityConfig, SimilarityEngine, create_similarity_engine
 
-__all__ = ["SimilarityConfig", "SimilarityEngine"]
+__all__ = [
+    "LSHSimilarityEngine",
+    "SimilarityConfig",
+    "SimilarityEngine",
+    "create_similarity_engine",
+]
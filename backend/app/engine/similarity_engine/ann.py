@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+from scipy import sparse
+
+from app.engine.pattern_registry.models import PatternDefinition, PatternMatch
+from app.engine.similarity_engine.engine import (
+    CHANNELS,
+    SimilarityConfig,
+    SimilarityEngine,
+    top_k_indices,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LSHSimilarityEngine(SimilarityEngine):
+    """Approximate similarity search with random-hyperplane LSH.
+
+    Patterns are hashed on the concatenation of their channel vectors, each scaled by
+    the square root of its weight, so the angle between two concatenated vectors
+    tracks the weighted cosine that ``SimilarityEngine`` ranks by. A query only
+    rescores patterns sharing a bucket with it in at least one table; the ``probes``
+    least certain bits of each table are also flipped to widen the candidate set, and
+    at most ``max_candidates`` patterns, those colliding in the most tables, are
+    rescored exactly. Registries smaller than ``exact_below`` are scored exactly.
+
+    The planes and tables travel in ``export_state``, which the registry snapshot
+    persists, so planners built for later scans reuse them instead of rehashing.
+    """
+
+    def __init__(
+        self,
+        config: SimilarityConfig | None = None,
+        tables: int = 32,
+        bits: int = 12,
+        probes: int = 2,
+        max_candidates: int = 128,
+        exact_below: int = 2000,
+        seed: int = 0,
+    ):
+        super().__init__(config)
+        self.tables = tables
+        self.bits = bits
+        self.probes = probes
+        self.max_candidates = max_candidates
+        self.exact_below = exact_below
+        self.seed = seed
+        self._planes: dict[str, np.ndarray] = {}
+        self._buckets: list[dict[int, np.ndarray]] = []
+        self._center: np.ndarray | None = None
+        self._bit_values = 1 << np.arange(bits, dtype=np.int64)
+
+    def build_index(self, patterns: list[PatternDefinition], state: dict | None = None) -> None:
+        """Build the LSH tables, or reuse those ``export_state`` saved with the same settings."""
+        super().build_index(patterns, state)
+        self._planes = {}
+        self._buckets = []
+        self._center = None
+        if len(self._patterns) < self.exact_below:
+            return
+        if state is not None and self.accepts_state(state) and state.get("lsh"):
+            self._planes = state["lsh"]["planes"]
+            self._center = state["lsh"]["center"]
+            self._buckets = state["lsh"]["buckets"]
+            logger.info("similarity.lsh.loaded", extra={"patterns": len(patterns)})
+            return
+
+        rng = np.random.default_rng(self.seed)
+        for key in CHANNELS:
+            # float64 to match the TF-IDF data; a float32 matrix is upcast on every product.
+            self._planes[key] = rng.standard_normal(
+                (self._matrices[key].shape[1], self.tables * self.bits)
+            )
+
+        projections = self._project(self._matrices)
+        # Centering removes what every pattern shares (common intents and output
+        # schemas), so the hyperplanes split on what distinguishes patterns.
+        self._center = projections.mean(axis=0)
+        codes = self._codes(projections - self._center)
+        for table in range(self.tables):
+            order = np.argsort(codes[:, table], kind="stable")
+            keys, starts = np.unique(codes[order, table], return_index=True)
+            self._buckets.append(dict(zip(keys.tolist(), np.split(order, starts[1:]))))
+        logger.info(
+            "similarity.lsh.built",
+            extra={"patterns": len(patterns), "tables": self.tables, "bits": self.bits},
+        )
+
+    def export_state(self) -> dict:
+        state = super().export_state()
+        if self._buckets:
+            state["lsh"] = {
+                "planes": self._planes,
+                "center": self._center,
+                "buckets": self._buckets,
+            }
+        return state
+
+    def _state_format(self) -> tuple:
+        # Saved tables are only valid for the hashing settings they were built with.
+        weights = tuple(sorted(self.config.weights.items()))
+        return super()._state_format() + (
+            self.tables,
+            self.bits,
+            self.exact_below,
+            self.seed,
+            weights,
+        )
+
+    def score_batch(self, queries: list[tuple[str, str, str]]) -> list[list[PatternMatch]]:
+        if not self._buckets or not queries:
+            return super().score_batch(queries)
+
+        vectors = {
+            key: self._vectorizers[key].transform([query[pos] for query in queries])
+            for pos, key in enumerate(CHANNELS)
+        }
+        projections = self._project(vectors) - self._center
+        codes = self._codes(projections)
+        results: list[list[PatternMatch]] = []
+        for row in range(len(queries)):
+            candidates = self._candidates(codes[row], projections[row])
+            results.append(self._rescore(candidates, vectors, row))
+        return results
+
+    def _project(self, vectors: dict[str, sparse.csr_matrix]) -> np.ndarray:
+        projection: np.ndarray | None = None
+        for key, weight in self.config.weights.items():
+            if weight <= 0:
+                continue
+            part = np.asarray(vectors[key] @ self._planes[key]) * np.sqrt(weight)
+            projection = part if projection is None else projection + part
+        if projection is None:
+            raise ValueError("LSH projection needs at least one channel with a positive weight")
+        return projection
+
+    def _codes(self, projections: np.ndarray) -> np.ndarray:
+        signs = (projections > 0).reshape(len(projections), self.tables, self.bits)
+        return signs.astype(np.int64) @ self._bit_values
+
+    def _candidates(self, codes: np.ndarray, projection: np.ndarray) -> np.ndarray:
+        margins = np.abs(projection.reshape(self.tables, self.bits))
+        flips = self._bit_values[np.argsort(margins, axis=1)[:, : self.probes]]
+        probe_codes = np.concatenate([codes[:, None], codes[:, None] ^ flips], axis=1).tolist()
+        found: list[np.ndarray] = []
+        for buckets, probes in zip(self._buckets, probe_codes):
+            for probe in probes:
+                members = buckets.get(probe)
+                if members is not None:
+                    found.append(members)
+        if not found:
+            return np.empty(0, dtype=np.intp)
+        ids, counts = np.unique(np.concatenate(found), return_counts=True)
+        if ids.size <= self.max_candidates:
+            return ids
+        # Patterns colliding with the query in more tables are likelier neighbours.
+        keep = np.argpartition(-counts, self.max_candidates - 1)[: self.max_candidates]
+        return np.sort(ids[keep])
+
+    def _rescore(
+        self, candidates: np.ndarray, vectors: dict[str, sparse.csr_matrix], row: int
+    ) -> list[PatternMatch]:
+        if candidates.size == 0:
+            return []
+        total_scores = np.zeros(candidates.size)
+        channel_scores: dict[str, np.ndarray] = {}
+        for key, weight in self.config.weights.items():
+            if weight <= 0:
+                continue
+            scores = _rows_dot(self._matrices[key], candidates, _dense_row(vectors[key], row))
+            channel_scores[key] = scores
+            total_scores += scores * weight
+
+        matches = []
+        for local in top_k_indices(total_scores, self.config.top_k):
+            breakdown = {key: 0.0 for key in CHANNELS}
+            for key, scores in channel_scores.items():
+                breakdown[key] = float(scores[local])
+            matches.append(
+                PatternMatch(
+                    pattern=self._patterns[int(candidates[local])],
+                    score=float(total_scores[local]),
+                    breakdown=breakdown,
+                )
+            )
+        return matches
+
+
+def _dense_row(matrix: sparse.csr_matrix, row: int) -> np.ndarray:
+    dense = np.zeros(matrix.shape[1])
+    start, end = matrix.indptr[row], matrix.indptr[row + 1]
+    dense[matrix.indices[start:end]] = matrix.data[start:end]
+    return dense
+
+
+def _rows_dot(matrix: sparse.csr_matrix, rows: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    """Dot products of selected CSR rows with a dense vector, without building a submatrix."""
+    starts = matrix.indptr[rows]
+    lengths = matrix.indptr[rows + 1] - starts
+    offsets = np.cumsum(lengths) - lengths
+    positions = np.arange(lengths.sum()) - np.repeat(offsets - starts, lengths)
+    products = matrix.data[positions] * vector[matrix.indices[positions]]
+    return np.bincount(
+        np.repeat(np.arange(rows.size), lengths), weights=products, minlength=rows.size
+    )
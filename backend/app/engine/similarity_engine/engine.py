@@ -4,9 +4,11 @@ import logging
 from dataclasses import dataclass
 
 import numpy as np
+import sklearn
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 
+from app.core.config import settings
 from app.engine.pattern_registry.models import PatternDefinition, PatternMatch
 
 logger = logging.getLogger(__name__)
@@ -17,78 +19,128 @@ class SimilarityConfig:
     threshold: float = 0.78
     top_k: int = 3
     weights: dict[str, float] = None
+    batch_cells: int = 4_000_000
 
     def __post_init__(self) -> None:
         if self.weights is None:
             self.weights = {"prompt": 0.34, "ast": 0.38, "output": 0.28}
 
 
+CHANNELS = ("prompt", "ast", "output")
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores, best first, ties broken by index."""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < scores.size:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.size)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
 class SimilarityEngine:
+    # Bump whenever ``export_state`` changes shape, so pickled states from older code are refitted.
+    STATE_FORMAT = 1
+
     def __init__(self, config: SimilarityConfig | None = None):
         self.config = config or SimilarityConfig()
         self._patterns: list[PatternDefinition] = []
         self._vectorizers: dict[str, TfidfVectorizer] = {}
-        self._matrices: dict[str, np.ndarray] = {}
+        # Rows are L2-normalized by TfidfVectorizer, so a sparse dot product is the cosine.
+        self._matrices: dict[str, sparse.csr_matrix] = {}
 
-    def build_index(self, patterns: list[PatternDefinition]) -> None:
+    def build_index(self, patterns: list[PatternDefinition], state: dict | None = None) -> None:
+        """Fit the channel vectorizers, or reuse ``state`` from ``export_state`` for the same patterns."""
         self._patterns = patterns
         if not patterns:
             self._vectorizers = {}
             self._matrices = {}
             logger.info("similarity.index.empty")
             return
-        prompt_texts = [self._prompt_text(p) for p in patterns]
-        ast_texts = [p.source_ast_signature or "" for p in patterns]
-        output_texts = [self._output_text(p) for p in patterns]
-
-        self._vectorizers = {
-            "prompt": TfidfVectorizer(min_df=1),
-            "ast": TfidfVectorizer(min_df=1),
-            "output": TfidfVectorizer(min_df=1),
+        if state is not None and self.accepts_state(state):
+            self._vectorizers = state["vectorizers"]
+            self._matrices = state["matrices"]
+            logger.info("similarity.index.loaded", extra={"patterns": len(patterns)})
+            return
+        texts = {
+            "prompt": [self._prompt_text(p) for p in patterns],
+            "ast": [p.source_ast_signature or "" for p in patterns],
+            "output": [self._output_text(p) for p in patterns],
         }
 
+        self._vectorizers = {key: TfidfVectorizer(min_df=1, norm="l2") for key in CHANNELS}
         self._matrices = {
-            "prompt": self._vectorizers["prompt"].fit_transform(prompt_texts).toarray(),
-            "ast": self._vectorizers["ast"].fit_transform(ast_texts).toarray(),
-            "output": self._vectorizers["output"].fit_transform(output_texts).toarray(),
+            key: sparse.csr_matrix(self._vectorizers[key].fit_transform(texts[key]))
+            for key in CHANNELS
         }
         logger.info("similarity.index.built", extra={"patterns": len(patterns)})
 
+    def accepts_state(self, state: dict | None) -> bool:
+        """Whether ``state`` was exported by this engine's code for the indexed patterns."""
+        if not state or state.get("format") != self._state_format():
+            return False
+        return state.get("patterns") == [p.pattern_id for p in self._patterns]
+
+    def _state_format(self) -> tuple:
+        # Fitted vectorizers are only guaranteed to unpickle under the same sklearn.
+        return (type(self).__name__, self.STATE_FORMAT, sklearn.__version__)
+
+    def export_state(self) -> dict:
+        return {
+            "format": self._state_format(),
+            "patterns": [p.pattern_id for p in self._patterns],
+            "vectorizers": self._vectorizers,
+            "matrices": self._matrices,
+        }
+
     def score(self, prompt_text: str, ast_signature: str, output_text: str) -> list[PatternMatch]:
-        if not self._patterns:
-            return []
+        return self.score_batch([(prompt_text, ast_signature, output_text)])[0]
 
-        candidate_vectors = {
-            "prompt": self._vectorizers["prompt"].transform([prompt_text]).toarray(),
-            "ast": self._vectorizers["ast"].transform([ast_signature]).toarray(),
-            "output": self._vectorizers["output"].transform([output_text]).toarray(),
-        }
+    def score_batch(self, queries: list[tuple[str, str, str]]) -> list[list[PatternMatch]]:
+        """Score many (prompt, ast signature, output) triples with one transform per channel.
 
-        total_scores = np.zeros(len(self._patterns))
-        breakdowns: list[dict[str, float]] = [
-            {"prompt": 0.0, "ast": 0.0, "output": 0.0} for _ in self._patterns
-        ]
-
-        for key, weight in self.config.weights.items():
-            if weight <= 0:
-                continue
-            matrix = self._matrices[key]
-            scores = cosine_similarity(candidate_vectors[key], matrix)[0]
-            total_scores += scores * weight
-            for idx, score in enumerate(scores):
-                breakdowns[idx][key] = float(score)
-
-        top_indices = np.argsort(total_scores)[::-1][: self.config.top_k]
-        matches: list[PatternMatch] = []
-        for idx in top_indices:
-            matches.append(
-                PatternMatch(
-                    pattern=self._patterns[idx],
-                    score=float(total_scores[idx]),
-                    breakdown=breakdowns[idx],
+        The candidates x patterns score matrix is computed with one sparse product per
+        channel, in row blocks bounded by ``batch_cells`` so large registries stay in memory.
+        """
+        if not self._patterns or not queries:
+            return [[] for _ in queries]
+
+        vectors = {
+            key: self._vectorizers[key].transform([query[pos] for query in queries])
+            for pos, key in enumerate(CHANNELS)
+        }
+        rows_per_block = max(1, self.config.batch_cells // len(self._patterns))
+        results: list[list[PatternMatch]] = []
+        for block_start in range(0, len(queries), rows_per_block):
+            block = slice(block_start, block_start + rows_per_block)
+            total_scores = np.zeros((len(queries[block]), len(self._patterns)))
+            channel_scores: dict[str, np.ndarray] = {}
+            for key, weight in self.config.weights.items():
+                if weight <= 0:
+                    continue
+                scores = (vectors[key][block] @ self._matrices[key].T).toarray()
+                channel_scores[key] = scores
+                total_scores += scores * weight
+
+            for row, row_scores in enumerate(total_scores):
+                results.append(
+                    [
+                        self._match(int(idx), float(row_scores[idx]), channel_scores, row)
+                        for idx in top_k_indices(row_scores, self.config.top_k)
+                    ]
                 )
-            )
-        return matches
+        return results
+
+    def _match(
+        self, idx: int, score: float, channel_scores: dict[str, np.ndarray], row: int
+    ) -> PatternMatch:
+        breakdown = {key: 0.0 for key in CHANNELS}
+        for key, scores in channel_scores.items():
+            breakdown[key] = float(scores[row, idx])
+        return PatternMatch(pattern=self._patterns[idx], score=score, breakdown=breakdown)
 
     def _prompt_text(self, pattern: PatternDefinition) -> str:
         contract = pattern.prompt_contract or ""
@@ -98,3 +150,19 @@ class SimilarityEngine:
         output_schema = pattern.output_schema or ""
         replacement = pattern.replacement_template or ""
         return f"{output_schema} {replacement[:200]}"
+
+
+def create_similarity_engine(config: SimilarityConfig | None = None) -> SimilarityEngine:
+    """Engine for the configured ``similarity_backend`` ("exact" or "lsh")."""
+    if settings.similarity_backend == "lsh":
+        from app.engine.similarity_engine.ann import LSHSimilarityEngine
+
+        return LSHSimilarityEngine(
+            config,
+            tables=settings.lsh_tables,
+            bits=settings.lsh_bits,
+            probes=settings.lsh_probes,
+            max_candidates=settings.lsh_max_candidates,
+            exact_below=settings.lsh_exact_below,
+        )
+    return SimilarityEngine(config)
@@ -1,10 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app import models  # noqa: F401
 from app.api.routes import router
 from app.db.base import Base
-from app.db.session import engine
-from app import models  # noqa: F401
+from app.db.session import SessionLocal, engine
+from app.db.upgrade import upgrade_schema
+from app.services.metrics import ensure_rollups
 from app.workers.queue import start_worker, stop_worker
 
 app = FastAPI(title="LLMinate", version="1.0.0")
@@ -22,6 +24,9 @@ app.include_router(router)
 @app.on_event("startup")
 def on_startup() -> None:
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    with SessionLocal() as db:
+        ensure_rollups(db)
     start_worker()
 
 
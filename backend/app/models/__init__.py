@@ -1,5 +1,8 @@
 from app.models.candidate import Candidate
+from app.models.fingerprint import FileFingerprint
 from app.models.job import Job
+from app.models.metrics import MetricsRollup
 from app.models.scan import Scan
+from app.models.scan_log import ScanLogEntry
 
-__all__ = ["Scan", "Candidate", "Job"]
+__all__ = ["Scan", "Candidate", "Job", "FileFingerprint", "ScanLogEntry", "MetricsRollup"]
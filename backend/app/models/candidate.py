@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -6,9 +6,11 @@ from app.db.base import Base
 
 class Candidate(Base):
     __tablename__ = "candidates"
+    # Serves scan lookups and the (file, line_start, id) keyset order of the results API.
+    __table_args__ = (Index("ix_candidates_scan_file_line", "scan_id", "file", "line_start", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    scan_id: Mapped[int] = mapped_column(ForeignKey("scans.id"), index=True)
+    scan_id: Mapped[int] = mapped_column(ForeignKey("scans.id"))
     file: Mapped[str] = mapped_column(String(1000), nullable=False)
     line_start: Mapped[int] = mapped_column(Integer)
     line_end: Mapped[int] = mapped_column(Integer)
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Integer, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class FileFingerprint(Base):
+    __tablename__ = "file_fingerprints"
+    __table_args__ = (UniqueConstraint("target_path", "file", name="uq_fingerprint_target_file"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    target_path: Mapped[str] = mapped_column(String(1000), index=True, nullable=False)
+    file: Mapped[str] = mapped_column(String(1000), nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, default=0)
+    mtime_ns: Mapped[int] = mapped_column(BigInteger, default=0)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    candidates: Mapped[str] = mapped_column(Text, default="[]")
+    # PlanningContext.config_digest() of the scan that planned ``candidates``.
+    plan_config: Mapped[str] = mapped_column(String(64), default="")
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Float, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class MetricsRollup(Base):
+    """Running totals for one bucket: everything, one UTC day, or one scan."""
+
+    __tablename__ = "metrics_rollups"
+    __table_args__ = (UniqueConstraint("bucket", "bucket_key", name="uq_metrics_bucket"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    bucket: Mapped[str] = mapped_column(String(20), nullable=False)  # "total", "day" or "scan"
+    bucket_key: Mapped[str] = mapped_column(String(40), nullable=False)
+    scans: Mapped[int] = mapped_column(BigInteger, default=0)
+    candidates: Mapped[int] = mapped_column(BigInteger, default=0)
+    calls_saved: Mapped[int] = mapped_column(BigInteger, default=0)
+    score_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    latency_sum: Mapped[float] = mapped_column(Float, default=0.0)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy import DateTime, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -13,7 +13,7 @@ class Scan(Base):
     target_path: Mapped[str] = mapped_column(String(1000), nullable=False)
     status: Mapped[str] = mapped_column(String(50), default="queued")
     progress: Mapped[int] = mapped_column(Integer, default=0)
-    logs: Mapped[str] = mapped_column(Text, default="")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     candidates = relationship("Candidate", back_populates="scan", cascade="all, delete-orphan")
+    log_entries = relationship("ScanLogEntry", back_populates="scan", cascade="all, delete-orphan")
@@ -1,15 +1,29 @@
 from __future__ import annotations
 
+import hashlib
 import json
+from collections import OrderedDict
+from dataclasses import dataclass
 from difflib import unified_diff
 from pathlib import Path
 
+from app.analysis.source_unit import SourceUnit
+from app.core.config import settings
 from app.engine.intent_inference import infer_output_contract
 from app.engine.llm_orchestrator import LLMOrchestrator
 from app.engine.pattern_registry.ast_utils import detect_language
-from app.engine.refactor_planner import CandidateContext, ProgressiveCertaintyPlanner
+from app.engine.pattern_registry.registry import get_registry
+from app.engine.refactor_planner import (
+    CandidateContext,
+    ProgressiveCertaintyPlanner,
+    RefactorPlan,
+    get_plan_cache,
+)
 from app.rules.store import get_store
 
+# Files whose lines stay cached; hits arrive sorted by file, so a few dozen covers a batch.
+LINE_CACHE_FILES = 64
+
 
 def get_rule_code(intent: str) -> str:
     store = get_store()
@@ -17,47 +31,146 @@ def get_rule_code(intent: str) -> str:
     return rule.replacement_code if rule else ""
 
 
-
-def build_patch(
-    file_path: str, 
-    line_start: int, 
-    line_end: int, 
-    intent: str, 
-    snippet: str = "",
-    api_key: str | None = None,
-    api_provider: str | None = None
-) -> tuple[str, str, str]:
-    p = Path(file_path)
-    if not p.exists():
-        return "", "File not found; patch unavailable.", "Add path validation test."
-
-    original = p.read_text(encoding="utf-8", errors="ignore").splitlines(keepends=True)
-    
+@dataclass(slots=True)
+class PatchRequest:
+    file_path: str
+    line_start: int
+    line_end: int
+    intent: str
+    snippet: str = ""
+    group: str | None = None  # requests sharing a group are planned once
+
+
+class PlanningContext:
+    """Planner, provider clients and file contents shared by every hit of one scan.
+
+    Building a ProgressiveCertaintyPlanner fits the similarity index over the whole
+    pattern registry, so it is built on first use and once per scan instead of once
+    per hit. Scans share the persistent plan cache. Files come from ``units``, the
+    detector's loaded sources, when present, and only the most recently used ones
+    are kept.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        api_provider: str | None = None,
+        planner: ProgressiveCertaintyPlanner | None = None,
+        units: dict[str, SourceUnit | None] | None = None,
+    ):
+        self.orchestrator = (
+            planner.llm_orchestrator
+            if planner is not None
+            else LLMOrchestrator(api_key=api_key, provider=api_provider)
+        )
+        self._planner = planner
+        self.units = units if units is not None else {}
+        self._lines: OrderedDict[str, list[str]] = OrderedDict()
+
+    @property
+    def planner(self) -> ProgressiveCertaintyPlanner:
+        if self._planner is None:
+            self._planner = ProgressiveCertaintyPlanner(
+                llm_orchestrator=self.orchestrator, plan_cache=get_plan_cache()
+            )
+        return self._planner
+
+    @planner.setter
+    def planner(self, planner: ProgressiveCertaintyPlanner) -> None:
+        self._planner = planner
+
+    def config_digest(self) -> str:
+        """Digest of everything besides file contents that decides a scan's plans.
+
+        Results stored for a file are only reused while this is unchanged, so a
+        promoted pattern or rule, or a newly usable provider, re-plans every file.
+        """
+        payload = [
+            get_registry().version,
+            get_store().version,
+            settings.llm_enabled,
+            self.orchestrator.agent.provider,
+            self.orchestrator.available,
+            settings.similarity_backend,
+            settings.similarity_threshold,
+            settings.similarity_top_k,
+            settings.normalization_similarity_threshold,
+            list(settings.deterministic_capable_intents),
+        ]
+        return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+    def read_lines(self, path: Path) -> list[str]:
+        key = str(path)
+        lines = self._lines.get(key)
+        if lines is not None:
+            self._lines.move_to_end(key)
+            return lines
+        unit = self.units.pop(key, None)
+        text = unit.text if unit is not None else path.read_text(encoding="utf-8", errors="ignore")
+        lines = text.splitlines(keepends=True)
+        self._lines[key] = lines
+        if len(self._lines) > LINE_CACHE_FILES:
+            self._lines.popitem(last=False)
+        return lines
+
+    def build_patches(self, requests: list[PatchRequest]) -> list[tuple[str, str, str]]:
+        results: list[tuple[str, str, str]] = [
+            ("", "File not found; patch unavailable.", "Add path validation test.")
+        ] * len(requests)
+        prepared: list[tuple[int, list[str], CandidateContext, int]] = []
+        to_plan: list[CandidateContext] = []
+        slots: dict[str, int] = {}
+        for idx, request in enumerate(requests):
+            p = Path(request.file_path)
+            if not p.exists():
+                continue
+            original = self.read_lines(p)
+            candidate = _candidate_context(p, original, request)
+            slot = slots.get(request.group) if request.group is not None else None
+            if slot is None:
+                slot = len(to_plan)
+                to_plan.append(candidate)
+                if request.group is not None:
+                    slots[request.group] = slot
+            prepared.append((idx, original, candidate, slot))
+
+        # Every member of a group gets the first member's plan, rendered against its own file.
+        plans = self.planner.plan_many(to_plan)
+        for idx, original, candidate, slot in prepared:
+            results[idx] = _render_patch(requests[idx], original, candidate, plans[slot])
+        return results
+
+
+def _candidate_context(p: Path, original: list[str], request: PatchRequest) -> CandidateContext:
     # Context for AI agent if needed
-    start_ctx = max(0, line_start - 5)
-    end_ctx = min(len(original), line_end + 5)
+    start_ctx = max(0, request.line_start - 5)
+    end_ctx = min(len(original), request.line_end + 5)
     context = "".join(original[start_ctx:end_ctx])
 
-    language = detect_language(file_path=str(p))
-    output_contract = infer_output_contract(context, snippet)
-    candidate = CandidateContext(
+    snippet = request.snippet or ""
+    return CandidateContext(
         file_path=str(p),
-        snippet=snippet or "",
+        snippet=snippet,
         prompt=context,
-        intent=intent,
-        language=language,
-        output_contract=output_contract,
+        intent=request.intent,
+        language=detect_language(file_path=str(p)),
+        output_contract=infer_output_contract(context, snippet),
         context=context,
     )
 
-    orchestrator = LLMOrchestrator(api_key=api_key, provider=api_provider)
-    planner = ProgressiveCertaintyPlanner(llm_orchestrator=orchestrator)
-    plan = planner.plan(candidate)
 
+def _render_patch(
+    request: PatchRequest,
+    original: list[str],
+    candidate: CandidateContext,
+    plan: RefactorPlan,
+) -> tuple[str, str, str]:
     if not plan.can_apply:
         # Legacy deterministic fallback for python intent-based rules
         store = get_store()
-        legacy_rule = store.get_rule_by_intent(intent) if language == "python" else None
+        legacy_rule = (
+            store.get_rule_by_intent(request.intent) if candidate.language == "python" else None
+        )
         if legacy_rule:
             replacement = legacy_rule.replacement_code
             tests = legacy_rule.test_case or "Add parity tests."
@@ -74,16 +187,16 @@ def build_patch(
     if not replacement.endswith("\n"):
         replacement += "\n"
 
-    start_idx = max(0, line_start - 1)
-    end_idx = min(len(updated), line_end)
+    start_idx = max(0, request.line_start - 1)
+    end_idx = min(len(updated), request.line_end)
     updated[start_idx:end_idx] = [replacement]
 
     diff = "".join(
         unified_diff(
             original,
             updated,
-            fromfile=str(p),
-            tofile=f"{p}.optimized",
+            fromfile=candidate.file_path,
+            tofile=f"{candidate.file_path}.optimized",
         )
     )
     if plan.can_apply:
@@ -91,3 +204,18 @@ def build_patch(
         explanation = f"{explanation} Decision trace: {json.dumps(decision_trace)}"
     return diff, explanation, tests
 
+
+def build_patch(
+    file_path: str,
+    line_start: int,
+    line_end: int,
+    intent: str,
+    snippet: str = "",
+    api_key: str | None = None,
+    api_provider: str | None = None,
+    context: PlanningContext | None = None,
+) -> tuple[str, str, str]:
+    context = context or PlanningContext(api_key=api_key, api_provider=api_provider)
+    return context.build_patches([PatchRequest(file_path, line_start, line_end, intent, snippet)])[
+        0
+    ]
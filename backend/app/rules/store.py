@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
-from dataclasses import dataclass, asdict
+from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+
 @dataclass
 class Rule:
     id: str
@@ -17,6 +19,7 @@ class Rule:
     replacement_code: str
     test_case: str
 
+
 class RuleStore:
     def __init__(self, base_dir: Path | None = None):
         if base_dir is None:
@@ -25,16 +28,21 @@ class RuleStore:
         self.public_dir = base_dir / "public"
         self.private_dir = base_dir / "private"
         self.rules: dict[str, Rule] = {}
-        
+        # intent -> rule ids, with load order so lookups keep first-loaded-wins
+        self._by_intent: dict[str, set[str]] = {}
+        self._order: dict[str, int] = {}
+
         # Ensure directories exist
         self.public_dir.mkdir(parents=True, exist_ok=True)
         self.private_dir.mkdir(parents=True, exist_ok=True)
-        
+
         self.refresh()
 
     def refresh(self):
         """Reloads all rules from disk."""
         self.rules.clear()
+        self._by_intent.clear()
+        self._order.clear()
         self._load_from_dir(self.public_dir)
         # Private rules override public ones if IDs collide (though they should ideally be distinct)
         # For multi-tenancy, we might want to load private rules on demand or namespaced.
@@ -44,7 +52,7 @@ class RuleStore:
     def _load_from_dir(self, directory: Path):
         if not directory.exists():
             return
-            
+
         for file in directory.rglob("*.json"):
             try:
                 data = json.loads(file.read_text(encoding="utf-8"))
@@ -59,44 +67,63 @@ class RuleStore:
     def _add_rule(self, item: dict):
         try:
             rule = Rule(**item)
-            self.rules[rule.id] = rule
         except TypeError as e:
             logger.error(f"Invalid rule format: {e}")
+            return
+        self._store(rule)
+
+    def _store(self, rule: Rule):
+        previous = self.rules.get(rule.id)
+        if previous is not None:
+            self._by_intent.get(previous.intent, set()).discard(rule.id)
+        self.rules[rule.id] = rule
+        self._order.setdefault(rule.id, len(self._order))
+        self._by_intent.setdefault(rule.intent, set()).add(rule.id)
+
+    @property
+    def version(self) -> str:
+        """Digest of the loaded rules; changes whenever a rule is added or edited."""
+        payload = json.dumps(
+            [asdict(self.rules[rule_id]) for rule_id in sorted(self.rules)], sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
     def get_rule_by_intent(self, intent: str, tenant_id: str = "default") -> Optional[Rule]:
         """
         Finds a rule matching the intent.
-        Priority: 
+        Priority:
         1. Tenant-specific private rule (not fully implemented in this simple version, but structure allows it)
         2. Generic private rule
         3. Public rule
         """
         # Simple lookup for now. In a real multi-tenant system, we'd filter by tenant_id prefix or directory.
         # Here we just look for any rule matching the intent.
-        
+
         # First check for a tenant specific override if we implemented namespacing:
         # (Scanning logic would go here)
 
-        for rule in self.rules.values():
-            if rule.intent == intent:
-                return rule
-        return None
+        rule_ids = self._by_intent.get(intent)
+        if not rule_ids:
+            return None
+        return self.rules[min(rule_ids, key=self._order.__getitem__)]
 
     def save_rule(self, rule: Rule, tenant_id: str = "default"):
         """Saves a new rule to the tenant's private store."""
         tenant_dir = self.private_dir / tenant_id
         tenant_dir.mkdir(parents=True, exist_ok=True)
-        
+
         file_path = tenant_dir / f"{rule.id}.json"
         with open(file_path, "w", encoding="utf-8") as f:
             json.dump(asdict(rule), f, indent=2)
-        
-        self.rules[rule.id] = rule
+
+        self._store(rule)
         logger.info(f"Saved rule {rule.id} for tenant {tenant_id}")
 
+
 # Singleton instance
 _store = None
 
+
 def get_store() -> RuleStore:
     global _store
     if _store is None:
@@ -20,6 +20,28 @@ class CandidateOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class CandidateSummary(BaseModel):
+    id: int
+    file: str
+    line_start: int
+    line_end: int
+    provider: str
+    inferred_intent: str
+    rule_solvability_score: float
+    confidence: float
+    risk_level: str
+    estimated_api_calls_saved: int
+    latency_improvement_ms: int
+    auto_refactor_safe: bool
+
+    model_config = {"from_attributes": True}
+
+
+class CandidatePage(BaseModel):
+    items: list[CandidateSummary | CandidateOut]
+    next_cursor: str | None
+
+
 class PatchResponse(BaseModel):
     candidate_id: int
     diff: str
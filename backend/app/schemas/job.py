@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    status: str
+    priority: int
+    attempts: int
+    scan_id: int | None
+    candidate_id: int | None
+    error: str
+    result: str
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
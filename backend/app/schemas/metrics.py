@@ -1,5 +1,48 @@
+from __future__ import annotations
+
 from pydantic import BaseModel
 
+from app.models.metrics import MetricsRollup
+
+
+class MetricsBucket(BaseModel):
+    key: str
+    scans: int
+    candidates: int
+    estimated_api_calls_saved: int
+    avg_rule_solvability_score: float
+    avg_latency_improvement_ms: float
+
+    @classmethod
+    def from_rollup(cls, rollup: MetricsRollup | None, key: str = "all") -> MetricsBucket:
+        if rollup is None:
+            return cls(
+                key=key,
+                scans=0,
+                candidates=0,
+                estimated_api_calls_saved=0,
+                avg_rule_solvability_score=0.0,
+                avg_latency_improvement_ms=0.0,
+            )
+        count = rollup.candidates or 0
+        return cls(
+            key=rollup.bucket_key,
+            scans=rollup.scans or 0,
+            candidates=count,
+            estimated_api_calls_saved=rollup.calls_saved or 0,
+            avg_rule_solvability_score=(rollup.score_sum or 0.0) / count if count else 0.0,
+            avg_latency_improvement_ms=(rollup.latency_sum or 0.0) / count if count else 0.0,
+        )
+
+
+class LLMCacheStats(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
+    expired: int
+    evictions: int
+    entries: int
+
 
 class MetricsResponse(BaseModel):
     total_scans: int
@@ -7,3 +50,5 @@ class MetricsResponse(BaseModel):
     estimated_api_calls_saved: int
     avg_rule_solvability_score: float
     avg_latency_improvement_ms: float
+    daily: list[MetricsBucket] = []
+    llm_cache: LLMCacheStats | None = None  # counts since the API process started
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
 
@@ -5,12 +7,14 @@ class ScanRequest(BaseModel):
     path: str
     api_key: str | None = None
     api_provider: str | None = None
+    priority: int | None = None  # lower than the default 0 for bulk or nightly scans
 
 
 class GitScanRequest(BaseModel):
     url: str
     api_key: str | None = None
     api_provider: str | None = None
+    priority: int | None = None  # lower than the default 0 for bulk or nightly scans
 
 
 class ScanResponse(BaseModel):
@@ -18,8 +22,19 @@ class ScanResponse(BaseModel):
     status: str
 
 
+class ScanLogEntryOut(BaseModel):
+    seq: int
+    level: str
+    message: str
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
 class StatusResponse(BaseModel):
     scan_id: int
     status: str
     progress: int
-    logs: str
+    logs: str  # the messages of ``entries``, newline separated
+    entries: list[ScanLogEntryOut]
+    next_before: int | None  # pass as ``before`` to page further back; None at the first entry
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.fingerprint import FileFingerprint
+
+CARRIED_FIELDS = (
+    "file",
+    "line_start",
+    "line_end",
+    "call_snippet",
+    "provider",
+    "inferred_intent",
+    "rule_solvability_score",
+    "confidence",
+    "explanation",
+    "risk_level",
+    "estimated_api_calls_saved",
+    "latency_improvement_ms",
+    "fallback_behavior",
+    "patch_diff",
+    "patch_explanation",
+    "tests_to_add",
+    "auto_refactor_safe",
+)
+
+
+@dataclass(slots=True)
+class FileState:
+    file: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+
+
+@dataclass(slots=True)
+class FingerprintDiff:
+    changed: list[FileState] = field(default_factory=list)
+    unchanged: list[FileFingerprint] = field(default_factory=list)
+    removed: list[FileFingerprint] = field(default_factory=list)
+    stale: int = 0  # changed only because they were planned under another configuration
+
+
+def content_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def diff_fingerprints(
+    db: Session, target_path: str, files: list[str], plan_config: str = ""
+) -> FingerprintDiff:
+    """Split ``files`` into changed and unchanged against the last scan of ``target_path``.
+
+    Size and mtime are checked first; the content hash is only computed when
+    they differ, so untouched files are never read. Files planned under another
+    ``plan_config`` count as changed whatever their contents.
+    """
+    known = {
+        fp.file: fp
+        for fp in db.query(FileFingerprint).filter(FileFingerprint.target_path == target_path)
+    }
+    diff = FingerprintDiff()
+    for file in files:
+        try:
+            stat = Path(file).stat()
+        except OSError:
+            continue
+        previous = known.pop(file, None)
+        if previous and previous.plan_config != plan_config:
+            diff.stale += 1
+            previous = None
+        if previous and previous.size == stat.st_size and previous.mtime_ns == stat.st_mtime_ns:
+            diff.unchanged.append(previous)
+            continue
+        try:
+            digest = content_hash(Path(file))
+        except OSError:
+            continue
+        if previous and previous.content_hash == digest:
+            previous.size = stat.st_size
+            previous.mtime_ns = stat.st_mtime_ns
+            diff.unchanged.append(previous)
+            continue
+        diff.changed.append(FileState(file, stat.st_size, stat.st_mtime_ns, digest))
+    diff.removed = list(known.values())
+    return diff
+
+
+def candidate_payload(row: dict) -> dict:
+    """The fields of a planned candidate row that are carried forward to later scans."""
+    return {name: row[name] for name in CARRIED_FIELDS}
+
+
+def carry_forward(fingerprint: FileFingerprint) -> list[dict]:
+    """Candidate rows stored for an unchanged file, ready to insert under a new scan."""
+    return json.loads(fingerprint.candidates or "[]")
+
+
+def record_fingerprints(
+    db: Session,
+    target_path: str,
+    diff: FingerprintDiff,
+    candidates: list[dict],
+    plan_config: str = "",
+) -> None:
+    """Store fingerprints and planned candidates for every re-analyzed file.
+
+    Two scans of one target may finish at the same time, so each fingerprint is
+    written with an atomic ``INSERT ... ON CONFLICT DO UPDATE`` on SQLite and
+    Postgres; other databases fall back to update-then-insert.
+    """
+    by_file: dict[str, list[dict]] = {state.file: [] for state in diff.changed}
+    for candidate in candidates:
+        payload = candidate_payload(candidate)
+        if payload["file"] in by_file:
+            by_file[payload["file"]].append(payload)
+
+    dialect = db.get_bind().dialect.name
+    now = datetime.utcnow()
+    for state in diff.changed:
+        values = {
+            "size": state.size,
+            "mtime_ns": state.mtime_ns,
+            "content_hash": state.content_hash,
+            "candidates": json.dumps(by_file[state.file]),
+            "plan_config": plan_config,
+            "updated_at": now,
+        }
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite_insert if dialect == "sqlite" else pg_insert
+            statement = insert(FileFingerprint).values(
+                target_path=target_path, file=state.file, **values
+            )
+            db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["target_path", "file"],
+                    set_={name: statement.excluded[name] for name in values},
+                )
+            )
+            continue
+        updated = db.execute(
+            update(FileFingerprint)
+            .where(FileFingerprint.target_path == target_path, FileFingerprint.file == state.file)
+            .values(**values)
+        ).rowcount
+        if not updated:
+            db.add(FileFingerprint(target_path=target_path, file=state.file, **values))
+            db.flush()
+    if diff.removed:
+        db.execute(
+            delete(FileFingerprint).where(FileFingerprint.id.in_([fp.id for fp in diff.removed]))
+        )
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.kv_store import SQLiteKVStore
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Drop whitespace differences that cannot change a completion."""
+    return "\n".join(line.rstrip() for line in prompt.strip().splitlines())
+
+
+def cache_key(
+    provider: str, model: str, temperature: float | None, system: str, prompt: str
+) -> str:
+    payload = json.dumps([provider, model, temperature, system, normalize_prompt(prompt)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Persistent LLM response cache in a local SQLite file.
+
+    Entries older than ``ttl_seconds`` are treated as misses and deleted; once the
+    cache holds more than ``max_entries`` the least recently read ones are evicted.
+    """
+
+    def __init__(self, path: Path, ttl_seconds: float, max_entries: int):
+        self.path = path
+        # The table of the first release, before the caches shared one store.
+        self._store = SQLiteKVStore(
+            path, max_entries, ttl_seconds=ttl_seconds, retired_tables=("responses",)
+        )
+        self.stats = self._store.stats
+
+    @property
+    def ttl_seconds(self) -> float | None:
+        return self._store.ttl_seconds
+
+    @ttl_seconds.setter
+    def ttl_seconds(self, value: float) -> None:
+        self._store.ttl_seconds = value
+
+    def get(self, key: str) -> str | None:
+        return self._store.get(key)
+
+    def put(self, key: str, response: str, provider: str, model: str) -> None:
+        self._store.put(key, response, tag=f"{provider}/{model}")
+
+    def entries(self) -> int:
+        return self._store.entries()
+
+    def clear(self) -> None:
+        self._store.clear()
+
+
+_cache: ResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache | None:
+    if not settings.llm_cache_enabled:
+        return None
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(
+                Path(settings.llm_cache_path),
+                ttl_seconds=settings.llm_cache_ttl_seconds,
+                max_entries=settings.llm_cache_max_entries,
+            )
+        return _cache
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.candidate import Candidate
+from app.models.metrics import MetricsRollup
+from app.models.scan import Scan
+
+TOTAL_KEY = "all"
+COUNTERS = ("scans", "candidates", "calls_saved", "score_sum", "latency_sum")
+
+
+@dataclass(slots=True)
+class MetricsDelta:
+    scans: int = 0
+    candidates: int = 0
+    calls_saved: int = 0
+    score_sum: float = 0.0
+    latency_sum: float = 0.0
+
+    def negated(self) -> MetricsDelta:
+        return MetricsDelta(*(-getattr(self, name) for name in COUNTERS))
+
+
+def candidate_delta(rows: list[dict]) -> MetricsDelta:
+    return MetricsDelta(
+        candidates=len(rows),
+        calls_saved=sum(int(row["estimated_api_calls_saved"] or 0) for row in rows),
+        score_sum=sum(float(row["rule_solvability_score"] or 0.0) for row in rows),
+        latency_sum=sum(float(row["latency_improvement_ms"] or 0) for row in rows),
+    )
+
+
+def _buckets(scan_id: int | None, day: date | None) -> list[tuple[str, str]]:
+    buckets = [("total", TOTAL_KEY), ("day", (day or datetime.utcnow().date()).isoformat())]
+    if scan_id is not None:
+        buckets.append(("scan", str(scan_id)))
+    return buckets
+
+
+def apply_delta(
+    db: Session, delta: MetricsDelta, scan_id: int | None = None, day: date | None = None
+) -> None:
+    """Add ``delta`` to the total, day and scan buckets inside the caller's transaction.
+
+    SQLite and Postgres use an atomic ``INSERT ... ON CONFLICT DO UPDATE``; other
+    databases fall back to update-then-insert.
+    """
+    values = {name: getattr(delta, name) for name in COUNTERS}
+    if not any(values.values()):
+        return
+    dialect = db.get_bind().dialect.name
+    for bucket, key in _buckets(scan_id, day):
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite_insert if dialect == "sqlite" else pg_insert
+            statement = insert(MetricsRollup).values(bucket=bucket, bucket_key=key, **values)
+            statement = statement.on_conflict_do_update(
+                index_elements=["bucket", "bucket_key"],
+                set_={
+                    name: getattr(MetricsRollup, name) + statement.excluded[name]
+                    for name in COUNTERS
+                },
+            )
+            db.execute(statement)
+            continue
+        updated = db.execute(
+            update(MetricsRollup)
+            .where(MetricsRollup.bucket == bucket, MetricsRollup.bucket_key == key)
+            .values({name: getattr(MetricsRollup, name) + value for name, value in values.items()})
+        ).rowcount
+        if not updated:
+            db.add(MetricsRollup(bucket=bucket, bucket_key=key, **values))
+            db.flush()
+
+
+def record_scan(db: Session) -> None:
+    apply_delta(db, MetricsDelta(scans=1))
+
+
+def record_candidates(db: Session, scan_id: int, rows: list[dict]) -> None:
+    apply_delta(db, candidate_delta(rows), scan_id=scan_id)
+
+
+def forget_candidates(db: Session, scan_id: int) -> None:
+    """Subtract a scan's current candidates, before they are deleted, from every bucket."""
+    row = db.execute(
+        select(
+            func.count(Candidate.id),
+            func.coalesce(func.sum(Candidate.estimated_api_calls_saved), 0),
+            func.coalesce(func.sum(Candidate.rule_solvability_score), 0.0),
+            func.coalesce(func.sum(Candidate.latency_improvement_ms), 0.0),
+        ).where(Candidate.scan_id == scan_id)
+    ).one()
+    # Day buckets are keyed by insertion day, which is not stored per candidate;
+    # today's bucket absorbs the correction.
+    apply_delta(
+        db,
+        MetricsDelta(0, int(row[0]), int(row[1]), float(row[2]), float(row[3])).negated(),
+        scan_id,
+    )
+
+
+def rebuild_rollups(db: Session) -> None:
+    """Recompute every bucket from the scans and candidates tables.
+
+    Used to backfill databases that predate the rollups; day buckets are keyed by
+    each scan's creation day.
+    """
+    db.execute(delete(MetricsRollup))
+    scans = db.execute(select(Scan.id, Scan.created_at)).all()
+    created = {scan_id: (created_at or datetime.utcnow()).date() for scan_id, created_at in scans}
+    for day in created.values():
+        apply_delta(db, MetricsDelta(scans=1), day=day)
+    per_scan = db.execute(
+        select(
+            Candidate.scan_id,
+            func.count(Candidate.id),
+            func.coalesce(func.sum(Candidate.estimated_api_calls_saved), 0),
+            func.coalesce(func.sum(Candidate.rule_solvability_score), 0.0),
+            func.coalesce(func.sum(Candidate.latency_improvement_ms), 0.0),
+        ).group_by(Candidate.scan_id)
+    ).all()
+    for scan_id, count, saved, score, latency in per_scan:
+        apply_delta(
+            db,
+            MetricsDelta(0, int(count), int(saved), float(score), float(latency)),
+            scan_id,
+            created.get(scan_id),
+        )
+    db.commit()
+
+
+def ensure_rollups(db: Session) -> None:
+    if db.scalar(select(func.count(MetricsRollup.id))) == 0 and db.scalar(
+        select(func.count(Scan.id))
+    ):
+        rebuild_rollups(db)
+
+
+def get_rollup(db: Session, bucket: str, key: str) -> MetricsRollup | None:
+    return db.scalar(
+        select(MetricsRollup).where(MetricsRollup.bucket == bucket, MetricsRollup.bucket_key == key)
+    )
+
+
+def daily_rollups(db: Session, days: int) -> list[MetricsRollup]:
+    since = (datetime.utcnow().date() - timedelta(days=days - 1)).isoformat()
+    return list(
+        db.scalars(
+            select(MetricsRollup)
+            .where(MetricsRollup.bucket == "day", MetricsRollup.bucket_key >= since)
+            .order_by(MetricsRollup.bucket_key.asc())
+        )
+    )
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass, field
+
+from pydantic import BaseModel
+from sqlalchemy import Select, literal, select, tuple_
+from sqlalchemy.orm import Session, load_only
+
+from app.models.candidate import Candidate
+from app.schemas.candidate import CandidateOut, CandidateSummary
+
+
+@dataclass(slots=True)
+class CandidateFilters:
+    risk_levels: list[str] = field(default_factory=list)
+    intents: list[str] = field(default_factory=list)
+    min_score: float | None = None
+    max_score: float | None = None
+
+
+def _columns(schema: type[BaseModel]) -> list:
+    return [getattr(Candidate, name) for name in schema.model_fields]
+
+
+# Heavy text columns (patch diff, explanation, tests) stay unloaded until /api/patch.
+SUMMARY_COLUMNS = _columns(CandidateSummary)
+FULL_COLUMNS = _columns(CandidateOut)
+
+
+def encode_cursor(candidate: Candidate) -> str:
+    raw = json.dumps([candidate.file, candidate.line_start, candidate.id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[str, int, int]:
+    """Raises ``ValueError`` for a cursor this module did not produce."""
+    try:
+        file, line_start, candidate_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii"))
+        )
+        return str(file), int(line_start), int(candidate_id)
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def candidate_query(
+    scan_id: int, filters: CandidateFilters | None = None, full: bool = True
+) -> Select:
+    """Candidates of a scan in (file, line_start, id) order, loading only the listed columns."""
+    query = (
+        select(Candidate)
+        .options(load_only(*(FULL_COLUMNS if full else SUMMARY_COLUMNS)))
+        .where(Candidate.scan_id == scan_id)
+    )
+    if filters:
+        if filters.risk_levels:
+            query = query.where(Candidate.risk_level.in_(filters.risk_levels))
+        if filters.intents:
+            query = query.where(Candidate.inferred_intent.in_(filters.intents))
+        if filters.min_score is not None:
+            query = query.where(Candidate.rule_solvability_score >= filters.min_score)
+        if filters.max_score is not None:
+            query = query.where(Candidate.rule_solvability_score <= filters.max_score)
+    return query.order_by(Candidate.file.asc(), Candidate.line_start.asc(), Candidate.id.asc())
+
+
+def candidate_page(
+    db: Session,
+    scan_id: int,
+    filters: CandidateFilters,
+    limit: int,
+    cursor: str | None = None,
+    full: bool = False,
+) -> tuple[list[Candidate], str | None]:
+    """One keyset page of candidates and the cursor for the next page, if any."""
+    query = candidate_query(scan_id, filters, full)
+    if cursor:
+        after = tuple_(*(literal(value) for value in decode_cursor(cursor)))
+        query = query.where(tuple_(Candidate.file, Candidate.line_start, Candidate.id) > after)
+    rows = list(db.scalars(query.limit(limit + 1)))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1])
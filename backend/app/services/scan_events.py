@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from collections.abc import AsyncIterator, Callable
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.scan import Scan
+from app.services.scan_log import entries_after
+
+FINAL_STATUSES = ("completed", "failed")
+# Re-read interval for scans advanced by a worker in another process, which cannot notify us.
+POLL_INTERVAL = 1.0
+
+
+class ScanEvents:
+    """Wakes progress streams when a scan commits new progress or log lines."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._waiters: dict[int, list[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+
+    def subscribe(self, scan_id: int) -> asyncio.Event:
+        event = asyncio.Event()
+        with self._lock:
+            self._waiters.setdefault(scan_id, []).append((asyncio.get_running_loop(), event))
+        return event
+
+    def unsubscribe(self, scan_id: int, event: asyncio.Event) -> None:
+        with self._lock:
+            waiters = [entry for entry in self._waiters.get(scan_id, []) if entry[1] is not event]
+            if waiters:
+                self._waiters[scan_id] = waiters
+            else:
+                self._waiters.pop(scan_id, None)
+
+    def publish(self, scan_id: int) -> None:
+        with self._lock:
+            waiters = list(self._waiters.get(scan_id, []))
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The streaming loop has already shut down.
+                pass
+
+
+scan_events = ScanEvents()
+
+
+def _read_scan(
+    session_factory: Callable[[], Session], scan_id: int, offset: int
+) -> tuple[str, int, list[tuple[int, str]]] | None:
+    with session_factory() as db:
+        scan = db.get(Scan, scan_id)
+        if not scan:
+            return None
+        return (
+            scan.status,
+            scan.progress,
+            [(entry.seq, entry.message) for entry in entries_after(db, scan_id, offset)],
+        )
+
+
+def format_event(event: str, data: dict, event_id: int | None = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_scan(
+    scan_id: int,
+    offset: int = 0,
+    session_factory: Callable[[], Session] = SessionLocal,
+    poll_interval: float = POLL_INTERVAL,
+) -> AsyncIterator[str]:
+    """Yield server-sent events carrying progress and the log lines after ``offset``.
+
+    Each event id is the ``seq`` of the last log line delivered, so a client that
+    reconnects with it as ``Last-Event-ID`` or ``offset`` resumes without repeats.
+    The stream ends once the scan completes or fails.
+    """
+    wakeup = scan_events.subscribe(scan_id)
+    try:
+        last: tuple[str, int] | None = None
+        while True:
+            wakeup.clear()
+            snapshot = await asyncio.to_thread(_read_scan, session_factory, scan_id, offset)
+            if snapshot is None:
+                yield format_event("error", {"detail": "Scan not found"})
+                return
+            status, progress, fresh = snapshot
+            if fresh or (status, progress) != last:
+                if fresh:
+                    offset = fresh[-1][0]
+                last = (status, progress)
+                yield format_event(
+                    "progress",
+                    {
+                        "status": status,
+                        "progress": progress,
+                        "offset": offset,
+                        "lines": [line for _, line in fresh],
+                    },
+                    event_id=offset,
+                )
+            if status in FINAL_STATUSES:
+                return
+            try:
+                await asyncio.wait_for(wakeup.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        scan_events.unsubscribe(scan_id, wakeup)
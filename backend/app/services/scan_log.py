@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.scan_log import ScanLogEntry
+
+
+class ScanLog:
+    """Buffers log lines for one scan and inserts them as one batch per flush.
+
+    Lines are numbered with a per-scan ``seq`` starting at 1, which clients use as
+    a resume offset. A scan has a single writer at a time, so the next number is
+    read once up front.
+    """
+
+    def __init__(self, db: Session, scan_id: int):
+        self.db = db
+        self.scan_id = scan_id
+        last = db.scalar(select(func.max(ScanLogEntry.seq)).where(ScanLogEntry.scan_id == scan_id))
+        self._next_seq = (last or 0) + 1
+        self._pending: list[dict] = []
+
+    def append(self, message: str, level: str = "info") -> None:
+        self._pending.append(
+            {
+                "scan_id": self.scan_id,
+                "seq": self._next_seq,
+                "level": level,
+                "message": message,
+                "created_at": datetime.utcnow(),
+            }
+        )
+        self._next_seq += 1
+
+    def flush(self) -> None:
+        if self._pending:
+            self.db.execute(insert(ScanLogEntry), self._pending)
+            self._pending = []
+
+
+def entries_after(db: Session, scan_id: int, after: int = 0) -> list[ScanLogEntry]:
+    return list(
+        db.scalars(
+            select(ScanLogEntry)
+            .where(ScanLogEntry.scan_id == scan_id, ScanLogEntry.seq > after)
+            .order_by(ScanLogEntry.seq.asc())
+        )
+    )
+
+
+def tail_entries(
+    db: Session, scan_id: int, limit: int, before: int | None = None
+) -> list[ScanLogEntry]:
+    """The last ``limit`` entries (before ``before`` when paging back), oldest first."""
+    query = select(ScanLogEntry).where(ScanLogEntry.scan_id == scan_id)
+    if before is not None:
+        query = query.where(ScanLogEntry.seq < before)
+    rows = list(db.scalars(query.order_by(ScanLogEntry.seq.desc()).limit(limit)))
+    rows.reverse()
+    return rows
+
+
+def log_text(db: Session, scan_id: int) -> str:
+    return "\n".join(entry.message for entry in entries_after(db, scan_id))
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.candidate import Candidate
+from app.models.scan import Scan
+from app.services.metrics import record_candidates
+from app.services.scan_events import scan_events
+from app.services.scan_log import ScanLog
+
+logger = logging.getLogger(__name__)
+
+
+class ScanWriter:
+    """Write-behind buffer for a running scan's candidates, progress and log lines.
+
+    Everything accumulates in memory and is written in one transaction once
+    ``flush_every`` candidates are pending or ``flush_interval_ms`` has passed since
+    the last flush, so a scan commits O(hits / batch) times rather than several
+    times per hit. Leaving the ``with`` block always flushes, including on errors.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        scan: Scan,
+        flush_every: int | None = None,
+        flush_interval_ms: int | None = None,
+    ):
+        self.db = db
+        self.scan = scan
+        self.log = ScanLog(db, scan.id)
+        self.flush_every = max(1, flush_every or settings.scan_flush_every)
+        self.flush_interval_ms = (
+            settings.scan_flush_interval_ms if flush_interval_ms is None else flush_interval_ms
+        )
+        self.commits = 0
+        self._candidates: list[dict] = []
+        self._last_flush = time.monotonic()
+
+    def __enter__(self) -> ScanWriter:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
+            return
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("scan.writer.flush_failed", extra={"scan_id": self.scan.id})
+            self.db.rollback()
+
+    def add_candidate(self, row: dict) -> None:
+        self._candidates.append({"scan_id": self.scan.id, **row})
+        self.maybe_flush()
+
+    def maybe_flush(self) -> None:
+        elapsed_ms = (time.monotonic() - self._last_flush) * 1000
+        if len(self._candidates) >= self.flush_every or elapsed_ms >= self.flush_interval_ms:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write pending log lines, candidates and their metrics, commit and wake streaming clients."""
+        self.log.flush()
+        if self._candidates:
+            self.db.execute(insert(Candidate), self._candidates)
+            record_candidates(self.db, self.scan.id, self._candidates)
+            self._candidates = []
+        self.db.commit()
+        self.commits += 1
+        self._last_flush = time.monotonic()
+        scan_events.publish(self.scan.id)
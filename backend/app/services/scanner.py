@@ -1,89 +1,174 @@
 from __future__ import annotations
 
 from pathlib import Path
+
 from sqlalchemy.orm import Session
 
-from app.analysis.detector import scan_for_ai_calls
+from app.analysis.clustering import HitCluster, cluster_hits
+from app.analysis.detector import list_source_files, scan_for_ai_calls
+from app.analysis.file_walker import WalkStats
 from app.analysis.intent import infer_intent
 from app.analysis.scoring import score_solvability
-from app.models.candidate import Candidate
+from app.analysis.source_unit import SourceUnit
+from app.core.config import settings
 from app.models.scan import Scan
-from app.refactor.planner import build_patch
-
+from app.refactor.planner import PatchRequest, PlanningContext
+from app.services.fingerprints import carry_forward, diff_fingerprints, record_fingerprints
+from app.services.scan_writer import ScanWriter
 
-def append_log(scan: Scan, message: str) -> None:
-    scan.logs = (scan.logs or "") + f"\n{message}"
+# Skipped files and pruned directories listed individually in the scan log.
+SKIPPED_PATHS_LOGGED = 200
 
 
-def run_scan(db: Session, scan_id: int, target_path: str, api_key: str | None = None, api_provider: str | None = None) -> None:
+def run_scan(
+    db: Session,
+    scan_id: int,
+    target_path: str,
+    api_key: str | None = None,
+    api_provider: str | None = None,
+) -> None:
     scan = db.get(Scan, scan_id)
     if not scan:
         return
 
+    with ScanWriter(db, scan) as writer:
+        _run_scan(db, scan, writer, target_path, api_key, api_provider)
+
+
+def _run_scan(
+    db: Session,
+    scan: Scan,
+    writer: ScanWriter,
+    target_path: str,
+    api_key: str | None,
+    api_provider: str | None,
+) -> None:
+    log = writer.log
     scan.status = "running"
     scan.progress = 5
-    append_log(scan, f"Initiating deep scan on: {target_path}")
-    db.commit()
+    log.append(f"Initiating deep scan on: {target_path}")
+    writer.flush()
 
     rules_path = str(Path(__file__).resolve().parents[2] / "semgrep_rules" / "ai_calls.yml")
-    append_log(scan, "Running static analysis (Semgrep)...")
-    db.commit()
-    
-    hits = scan_for_ai_calls(target_path, rules_path)
-    
-    scan.progress = 30
-    append_log(scan, f"Found {len(hits)} potential AI calls to optimize.")
-    db.commit()
-
-    for i, hit in enumerate(hits):
-        file_name = Path(hit.file).name
-        
-        # Incremental progress
-        step_progress = 30 + int((i / len(hits)) * 60) if hits else 90
-        scan.progress = step_progress
-        
-        append_log(scan, f"Analyzing {file_name}:{hit.line_start}...")
-        db.commit()
-
-        intent, confidence = infer_intent(hit.prompt, hit.snippet)
-        score = score_solvability(intent, hit.prompt)
-        
-        append_log(scan, f"Planning refactor for intent: '{intent}' using progressive certainty pipeline...")
-        db.commit()
-
-        patch_diff, patch_exp, tests_to_add = build_patch(
-            hit.file, hit.line_start, hit.line_end, intent, snippet=hit.snippet,
-            api_key=api_key, api_provider=api_provider
+    root = str(Path(target_path).resolve())
+    changed_files: list[str] | None = None
+    diff = None
+    walk = WalkStats()
+    # Sources the detector loaded for files with hits, handed on to planning.
+    units: dict[str, SourceUnit | None] = {}
+    context = PlanningContext(api_key=api_key, api_provider=api_provider, units=units)
+    plan_config = context.config_digest()
+    if settings.incremental_scan:
+        diff = diff_fingerprints(db, root, list_source_files(Path(root), walk), plan_config)
+        changed_files = [state.file for state in diff.changed]
+        carried = 0
+        for fingerprint in diff.unchanged:
+            for row in carry_forward(fingerprint):
+                writer.add_candidate(row)
+                carried += 1
+        log.append(
+            f"Incremental scan: {len(diff.unchanged)} unchanged files ({carried} candidates reused), "
+            f"{len(changed_files)} changed files to analyze.",
         )
+        if diff.stale:
+            log.append(
+                f"Planner configuration changed since the last scan; re-planning {diff.stale} files."
+            )
+
+    log.append("Running static analysis (Semgrep)...")
+    writer.flush()
+
+    hits = scan_for_ai_calls(target_path, rules_path, files=changed_files, stats=walk, units=units)
+
+    scan.progress = 30
+    log.append(f"Walked {walk.files} source files; {walk.summary()}")
+    for skipped, reason in walk.skipped_paths[:SKIPPED_PATHS_LOGGED]:
+        log.append(f"Skipped {Path(skipped).relative_to(root)} ({reason}).")
+    if len(walk.skipped_paths) > SKIPPED_PATHS_LOGGED:
+        log.append(f"... and {len(walk.skipped_paths) - SKIPPED_PATHS_LOGGED} more skipped paths.")
+    log.append(f"Found {len(hits)} potential AI calls to optimize.")
+    writer.flush()
+
+    if settings.dedupe_call_sites:
+        clusters = cluster_hits(hits)
+        if len(clusters) < len(hits):
+            log.append(
+                f"Grouped {len(hits)} call sites into {len(clusters)} distinct clusters for planning."
+            )
+    else:
+        clusters = [HitCluster(str(i), [hit]) for i, hit in enumerate(hits)]
+
+    batch_size = max(1, settings.plan_batch_size)
+    planned: list[dict] = []
+    for batch_start in range(0, len(clusters), batch_size):
+        batch = clusters[batch_start : batch_start + batch_size]
+        analyses = []
+        for i, cluster in enumerate(batch, start=batch_start):
+            hit = cluster.representative
+            file_name = Path(hit.file).name
+
+            # Incremental progress
+            scan.progress = 30 + int((i / len(clusters)) * 60)
 
-        candidate = Candidate(
-            scan_id=scan.id,
-            file=hit.file,
-            line_start=hit.line_start,
-            line_end=hit.line_end,
-            call_snippet=hit.snippet,
-            provider=hit.provider,
-            inferred_intent=intent,
-            rule_solvability_score=score.score,
-            confidence=confidence,
-            explanation=score.explanation,
-            risk_level=score.risk_level,
-            estimated_api_calls_saved=score.estimated_api_calls_saved,
-            latency_improvement_ms=score.latency_improvement_ms,
-            fallback_behavior=score.fallback_behavior,
-            patch_diff=patch_diff,
-            patch_explanation=patch_exp,
-            tests_to_add=tests_to_add,
-            auto_refactor_safe=score.score >= 0.8,
+            duplicates = len(cluster.hits) - 1
+            suffix = f" (+{duplicates} identical call sites)" if duplicates else ""
+            log.append(f"Analyzing {file_name}:{hit.line_start}{suffix}...")
+            intent, confidence = infer_intent(hit.prompt, hit.snippet)
+            score = score_solvability(intent, hit.prompt)
+            analyses.append((intent, confidence, score))
+
+            log.append(
+                f"Planning refactor for intent: '{intent}' using progressive certainty pipeline..."
+            )
+            writer.maybe_flush()
+
+        # Every member of a cluster shares its representative's analysis and plan.
+        members = [
+            (cluster, hit, analysis)
+            for cluster, analysis in zip(batch, analyses)
+            for hit in cluster.hits
+        ]
+        patches = context.build_patches(
+            [
+                PatchRequest(
+                    hit.file, hit.line_start, hit.line_end, intent, hit.snippet, group=cluster.key
+                )
+                for cluster, hit, (intent, _, _) in members
+            ]
         )
-        db.add(candidate)
-        if patch_diff:
-            append_log(scan, f"Rule generated for {file_name}.")
-        else:
-            append_log(scan, f"No rule available for {file_name} yet.")
-        db.commit()
+
+        for (_, hit, (intent, confidence, score)), patch in zip(members, patches):
+            file_name = Path(hit.file).name
+            patch_diff, patch_exp, tests_to_add = patch
+            row = dict(
+                file=hit.file,
+                line_start=hit.line_start,
+                line_end=hit.line_end,
+                call_snippet=hit.snippet,
+                provider=hit.provider,
+                inferred_intent=intent,
+                rule_solvability_score=score.score,
+                confidence=confidence,
+                explanation=score.explanation,
+                risk_level=score.risk_level,
+                estimated_api_calls_saved=score.estimated_api_calls_saved,
+                latency_improvement_ms=score.latency_improvement_ms,
+                fallback_behavior=score.fallback_behavior,
+                patch_diff=patch_diff,
+                patch_explanation=patch_exp,
+                tests_to_add=tests_to_add,
+                auto_refactor_safe=score.score >= 0.8,
+            )
+            planned.append(row)
+            if patch_diff:
+                log.append(f"Rule generated for {file_name}.")
+            else:
+                log.append(f"No rule available for {file_name} yet.")
+            writer.add_candidate(row)
+
+    if diff is not None:
+        record_fingerprints(db, root, diff, planned, plan_config)
 
     scan.progress = 100
     scan.status = "completed"
-    append_log(scan, "Scan and Synthesis complete. Results ready.")
-    db.commit()
+    log.append("Scan and Synthesis complete. Results ready.")
@@ -1,22 +1,131 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import threading
-import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.db.session import SessionLocal
 from app.models.candidate import Candidate
 from app.models.job import Job
+from app.models.scan import Scan
+from app.services.metrics import forget_candidates
+from app.services.scan_events import scan_events
+from app.services.scan_log import ScanLog
 from app.services.scanner import run_scan
 from app.services.shadow import run_shadow, serialize_shadow_payload
 
-_running = False
+logger = logging.getLogger(__name__)
+
+# Queued jobs a worker tries to claim per poll before giving up to a faster peer.
+CLAIM_ATTEMPTS = 8
+# Backoff between claims while the database is failing.
+CLAIM_BACKOFF_BASE = 0.5
+CLAIM_BACKOFF_MAX = 30.0
+# Interactive shadow runs are claimed ahead of bulk scans.
+JOB_PRIORITIES = {"shadow": 10, "scan": 0}
+
+
+@dataclass(slots=True, frozen=True)
+class RetryPolicy:
+    max_attempts: int = 1
+    backoff_seconds: float = 0.0
+
+    def delay(self, attempts: int) -> float:
+        return self.backoff_seconds * 2 ** max(0, attempts - 1)
+
+
+RETRY_POLICIES = {
+    "scan": RetryPolicy(max_attempts=2, backoff_seconds=30.0),
+    "shadow": RetryPolicy(max_attempts=3, backoff_seconds=2.0),
+}
+DEFAULT_RETRY_POLICY = RetryPolicy()
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class JobSignal:
+    """Wakes idle workers when a job is enqueued in this process.
+
+    Waiters remember the generation they last saw, so a notification sent between
+    a worker's empty claim and its call to ``wait`` is never lost.
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self.generation = 0
+
+    def notify(self) -> None:
+        with self._condition:
+            self.generation += 1
+            self._condition.notify_all()
+
+    def wait(self, seen: int, timeout: float) -> None:
+        with self._condition:
+            self._condition.wait_for(lambda: self.generation != seen, timeout)
+
+
+class JobCompletions:
+    """Futures that request handlers await until a job reaches a terminal status.
+
+    Workers resolve them from their own threads; each future is completed on the
+    event loop that created it.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._waiters: dict[int, list[tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+
+    def register(self, job_id: int) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            self._waiters.setdefault(job_id, []).append((loop, future))
+        return future
+
+    def discard(self, job_id: int, future: asyncio.Future) -> None:
+        with self._lock:
+            waiters = [entry for entry in self._waiters.get(job_id, []) if entry[1] is not future]
+            if waiters:
+                self._waiters[job_id] = waiters
+            else:
+                self._waiters.pop(job_id, None)
+
+    def resolve(self, job_id: int, status: str) -> None:
+        with self._lock:
+            waiters = self._waiters.pop(job_id, [])
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_set_status, future, status)
+            except RuntimeError:
+                # The waiting loop has already shut down.
+                pass
+
+
+def _set_status(future: asyncio.Future, status: str) -> None:
+    if not future.done():
+        future.set_result(status)
+
+
+_signal = JobSignal()
+_completions = JobCompletions()
+_pools: list[WorkerPool] = []
 _lock = threading.Lock()
 
 
-def enqueue_job(kind: str, payload: dict, scan_id: int | None = None, candidate_id: int | None = None) -> int:
+def enqueue_job(
+    kind: str,
+    payload: dict,
+    scan_id: int | None = None,
+    candidate_id: int | None = None,
+    priority: int | None = None,
+) -> int:
     with SessionLocal() as db:
         job = Job(
             kind=kind,
@@ -24,58 +133,320 @@ def enqueue_job(kind: str, payload: dict, scan_id: int | None = None, candidate_
             scan_id=scan_id,
             candidate_id=candidate_id,
             status="queued",
+            priority=JOB_PRIORITIES.get(kind, 0) if priority is None else priority,
         )
         db.add(job)
         db.commit()
-        db.refresh(job)
-        return int(job.id)
+        job_id = int(job.id)
+    _signal.notify()
+    return job_id
+
+
+def _job_status(session_factory: Callable[[], Session], job_id: int) -> str | None:
+    with session_factory() as db:
+        return db.scalar(select(Job.status).where(Job.id == job_id))
+
+
+async def wait_for_job(
+    job_id: int, timeout: float, session_factory: Callable[[], Session] = SessionLocal
+) -> str | None:
+    """Wait for a job to complete or fail without holding a thread, and return its status.
+
+    The status is read once after registering, for jobs that finished first, and once
+    more on timeout, for jobs finished by a worker in another process.
+    """
+    future = _completions.register(job_id)
+    try:
+        status = await asyncio.to_thread(_job_status, session_factory, job_id)
+        if status in TERMINAL_STATUSES:
+            return status
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return await asyncio.to_thread(_job_status, session_factory, job_id)
+    finally:
+        _completions.discard(job_id, future)
+
+
+def claim_job(
+    db: Session, kinds: Iterable[str] | None = None, exclude: Iterable[str] = ()
+) -> Job | None:
+    """Atomically move the most urgent matching queued job to running and return it.
+
+    The status transition is a conditional ``UPDATE ... WHERE status = 'queued'``, so
+    when several workers race for the same row exactly one update matches and the
+    others move on to the next job. The claim takes a lease that the worker renews
+    while the job runs; ``reap_expired_leases`` requeues jobs whose worker died.
+    """
+    now = datetime.utcnow()
+    query = select(Job.id).where(Job.status == "queued", Job.available_at <= now)
+    if kinds is not None:
+        query = query.where(Job.kind.in_(list(kinds)))
+    exclude = list(exclude)
+    if exclude:
+        query = query.where(Job.kind.not_in(exclude))
+    job_ids = db.scalars(
+        query.order_by(Job.priority.desc(), Job.id.asc()).limit(CLAIM_ATTEMPTS)
+    ).all()
+    lease = now + timedelta(seconds=settings.job_lease_seconds)
+    for job_id in job_ids:
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == "queued")
+            .values(status="running", attempts=Job.attempts + 1, lease_expires_at=lease)
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.get(Job, job_id)
+    return None
+
+
+def complete_job(db: Session, job: Job, attempts: int, result: str) -> bool:
+    """Mark ``job`` completed with ``result`` if the claim made at ``attempts`` still owns it.
+
+    A job whose lease expired was requeued and possibly claimed again, which bumps
+    ``attempts``; the late result of the earlier claim is then dropped so it cannot
+    overwrite the current claim's outcome. Returns whether the job was updated.
+    """
+    completed = db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.status == "running", Job.attempts == attempts)
+        .values(status="completed", lease_expires_at=None, result=result)
+    ).rowcount
+    db.commit()
+    if not completed:
+        logger.warning("worker.job.lease_lost", extra={"job_id": job.id, "attempts": attempts})
+        return False
+    _completions.resolve(job.id, "completed")
+    return True
+
+
+def fail_job(
+    db: Session,
+    job: Job,
+    error: str,
+    expired_before: datetime | None = None,
+    attempts: int | None = None,
+) -> bool:
+    """Requeue ``job`` with backoff if its kind's retry policy allows, otherwise mark it failed.
+
+    Only a running job still held by the claim made at ``attempts`` (default: the
+    job's current attempts) is touched, and with ``expired_before`` only one whose
+    lease ran out before then, so a job renewed, reclaimed or finished meanwhile is
+    left alone. Returns whether the job was updated.
+    """
+    attempts = job.attempts if attempts is None else attempts
+    policy = RETRY_POLICIES.get(job.kind, DEFAULT_RETRY_POLICY)
+    retry = attempts < policy.max_attempts
+    values: dict = {"lease_expires_at": None, "error": error[-4000:]}
+    if retry:
+        values["status"] = "queued"
+        values["available_at"] = datetime.utcnow() + timedelta(seconds=policy.delay(attempts))
+    else:
+        values["status"] = "failed"
+
+    statement = update(Job).where(
+        Job.id == job.id, Job.status == "running", Job.attempts == attempts
+    )
+    if expired_before is not None:
+        statement = statement.where(Job.lease_expires_at < expired_before)
+    if not db.execute(statement.values(**values)).rowcount:
+        db.commit()
+        return False
+
+    if not retry and job.kind == "scan" and job.scan_id:
+        scan = db.get(Scan, job.scan_id)
+        if scan:
+            scan.status = "failed"
+            log = ScanLog(db, scan.id)
+            log.append(f"Scan failed: {error}", level="error")
+            log.flush()
+    db.commit()
+    if not retry and job.kind == "scan" and job.scan_id:
+        scan_events.publish(job.scan_id)
+    if not retry:
+        _completions.resolve(job.id, "failed")
+    logger.warning(
+        "worker.job.failed",
+        extra={
+            "job_id": job.id,
+            "kind": job.kind,
+            "attempts": attempts,
+            "retry": retry,
+            "error": error,
+        },
+    )
+    return True
+
+
+def reap_expired_leases(db: Session) -> int:
+    """Requeue or fail running jobs whose worker stopped renewing the lease."""
+    now = datetime.utcnow()
+    expired = db.scalars(
+        select(Job).where(Job.status == "running", Job.lease_expires_at < now)
+    ).all()
+    return sum(fail_job(db, job, "lease expired", expired_before=now) for job in expired)
 
 
 def _process_job(db: Session, job: Job) -> None:
+    # Read before run_scan commits and expires the job, so a reclaim is detected.
+    attempts = job.attempts
     payload = json.loads(job.payload or "{}")
-    job.status = "running"
-    db.commit()
+    result = ""
 
     if job.kind == "scan":
+        if job.attempts > 1:
+            # A retried scan starts over; drop what the failed attempt committed.
+            forget_candidates(db, int(payload["scan_id"]))
+            db.query(Candidate).filter(Candidate.scan_id == int(payload["scan_id"])).delete()
         run_scan(
-            db, 
-            int(payload["scan_id"]), 
+            db,
+            int(payload["scan_id"]),
             payload["target_path"],
             api_key=payload.get("api_key"),
-            api_provider=payload.get("api_provider")
+            api_provider=payload.get("api_provider"),
         )
-        job.result = "scan_complete"
+        result = "scan_complete"
     elif job.kind == "shadow":
         candidate = db.get(Candidate, int(payload["candidate_id"]))
         if candidate:
             shadow_payload = run_shadow(candidate)
-            job.result = serialize_shadow_payload(shadow_payload)
+            result = serialize_shadow_payload(shadow_payload)
 
-    job.status = "completed"
-    db.commit()
+    complete_job(db, job, attempts, result)
+
+
+class WorkerPool:
+    """A set of threads draining the jobs table, optionally limited to some job kinds."""
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        kinds: Iterable[str] | None = None,
+        exclude: Iterable[str] = (),
+        session_factory: Callable[[], Session] = SessionLocal,
+        process: Callable[[Session, Job], None] = _process_job,
+        signal: JobSignal | None = None,
+        poll_interval: float | None = None,
+    ):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.kinds = list(kinds) if kinds is not None else None
+        self.exclude = list(exclude)
+        self.session_factory = session_factory
+        self.process = process
+        self.signal = signal or _signal
+        # Fallback poll for jobs inserted by other processes, which cannot signal us.
+        self.poll_interval = settings.job_poll_interval if poll_interval is None else poll_interval
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._held: set[int] = set()
+        self._held_lock = threading.Lock()
+
+    def start(self) -> None:
+        self._stop.clear()
+        targets = [(f"{self.name}-{index}", self._run) for index in range(self.concurrency)]
+        targets.append((f"{self.name}-leases", self._maintain_leases))
+        for name, target in targets:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(
+            "worker.pool.started", extra={"pool": self.name, "concurrency": self.concurrency}
+        )
+
+    def stop(self, wait: bool = False) -> None:
+        self._stop.set()
+        self.signal.notify()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            seen = self.signal.generation
+            try:
+                with self.session_factory() as db:
+                    job = claim_job(db, self.kinds, self.exclude)
+                    if job:
+                        self._execute(db, job)
+                        failures = 0
+                        continue
+                failures = 0
+            except Exception:
+                # A locked or unreachable database must not kill the worker thread.
+                failures += 1
+                logger.exception(
+                    "worker.claim.error", extra={"pool": self.name, "failures": failures}
+                )
+                self._stop.wait(min(CLAIM_BACKOFF_MAX, CLAIM_BACKOFF_BASE * 2 ** (failures - 1)))
+                continue
+            self.signal.wait(seen, self.poll_interval)
+
+    def _execute(self, db: Session, job: Job) -> None:
+        job_id = job.id
+        attempts = job.attempts
+        with self._held_lock:
+            self._held.add(job_id)
+        try:
+            self.process(db, job)
+        except Exception as exc:
+            logger.exception("worker.job.error", extra={"job_id": job_id, "kind": job.kind})
+            try:
+                db.rollback()
+                failed = db.get(Job, job_id)
+                if failed:
+                    fail_job(db, failed, f"{type(exc).__name__}: {exc}", attempts=attempts)
+            except Exception:
+                # The lease is no longer renewed, so reap_expired_leases retries the job.
+                logger.exception("worker.job.fail_error", extra={"job_id": job_id})
+        finally:
+            with self._held_lock:
+                self._held.discard(job_id)
+
+    def _maintain_leases(self) -> None:
+        """Renew the leases of running jobs and reap those abandoned by dead workers."""
+        interval = max(1.0, settings.job_lease_seconds / 3)
+        while not self._stop.wait(interval):
+            try:
+                with self.session_factory() as db:
+                    with self._held_lock:
+                        held = list(self._held)
+                    if held:
+                        lease = datetime.utcnow() + timedelta(seconds=settings.job_lease_seconds)
+                        db.execute(
+                            update(Job)
+                            .where(Job.id.in_(held), Job.status == "running")
+                            .values(lease_expires_at=lease)
+                        )
+                        db.commit()
+                    reap_expired_leases(db)
+            except Exception:
+                logger.exception("worker.lease.error", extra={"pool": self.name})
 
 
-def _loop() -> None:
-    global _running
-    while _running:
-        with SessionLocal() as db:
-            job = db.query(Job).filter(Job.status == "queued").order_by(Job.id.asc()).first()
-            if job:
-                _process_job(db, job)
-        time.sleep(0.2)
+def _build_pools() -> list[WorkerPool]:
+    dedicated = {kind: count for kind, count in settings.job_worker_pools.items() if count > 0}
+    pools = [WorkerPool(f"jobs-{kind}", count, kinds=[kind]) for kind, count in dedicated.items()]
+    if settings.job_workers > 0:
+        pools.append(WorkerPool("jobs", settings.job_workers, exclude=dedicated))
+    return pools
 
 
 def start_worker() -> None:
-    global _running
     with _lock:
-        if _running:
+        if _pools:
             return
-        _running = True
-        thread = threading.Thread(target=_loop, daemon=True)
-        thread.start()
+        _pools.extend(_build_pools())
+        for pool in _pools:
+            pool.start()
 
 
 def stop_worker() -> None:
-    global _running
     with _lock:
-        _running = False
+        for pool in _pools:
+            pool.stop()
+        _pools.clear()
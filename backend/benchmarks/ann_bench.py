@@ -0,0 +1,154 @@
+"""Recall@k and latency of the LSH backend against the exact similarity engine.
+
+Run from ``backend/``::
+
+    python -m benchmarks.ann_bench --sizes 10000 100000
+
+Patterns are generated as mutated variants of shared families, the way learned
+patterns cluster around a few call shapes, so every query has real near neighbours.
+Queries are registry patterns with a fraction of their tokens dropped. "lookup"
+excludes the TF-IDF transform of the query, which is the same for both engines.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from app.engine.pattern_registry.models import PatternDefinition
+from app.engine.similarity_engine import LSHSimilarityEngine, SimilarityConfig, SimilarityEngine
+from benchmarks.similarity_bench import synthetic_patterns
+
+
+def clustered_patterns(
+    count: int, family_size: int = 20, mutate: float = 0.15
+) -> list[PatternDefinition]:
+    rng = random.Random(5)
+    families = synthetic_patterns(max(1, count // family_size), seed=3)
+    patterns = []
+    for i in range(count):
+        base = families[i % len(families)]
+        patterns.append(
+            PatternDefinition(
+                pattern_id=f"bench_{i}",
+                intent=base.intent,
+                language=base.language,
+                source_ast_signature=_mutate(base.source_ast_signature or "", rng, mutate),
+                prompt_contract=_mutate(base.prompt_contract or "", rng, mutate),
+                output_schema=base.output_schema,
+                replacement_template=_mutate(base.replacement_template or "", rng, mutate),
+            )
+        )
+    return patterns
+
+
+def _mutate(text: str, rng: random.Random, rate: float) -> str:
+    return " ".join(
+        t if rng.random() >= rate else f"{t}_v{rng.randrange(50)}" for t in text.split()
+    )
+
+
+def _perturb(text: str, rng: random.Random, drop: float) -> str:
+    tokens = text.split()
+    kept = [t for t in tokens if rng.random() >= drop]
+    return " ".join(kept or tokens[:1])
+
+
+def _queries(engine: SimilarityEngine, count: int, drop: float) -> list[tuple[str, str, str]]:
+    rng = random.Random(11)
+    picks = rng.sample(engine._patterns, min(count, len(engine._patterns)))
+    return [
+        (
+            _perturb(engine._prompt_text(p), rng, drop),
+            _perturb(p.source_ast_signature or "", rng, drop),
+            engine._output_text(p),
+        )
+        for p in picks
+    ]
+
+
+def _timed_lookup(
+    engine: SimilarityEngine, queries: list[tuple[str, str, str]]
+) -> tuple[list, float, float]:
+    start = time.perf_counter()
+    results = [engine.score(*q) for q in queries]
+    total_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    start = time.perf_counter()
+    for q in queries:
+        for pos, key in enumerate(("prompt", "ast", "output")):
+            engine._vectorizers[key].transform([q[pos]])
+    transform_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return results, total_ms, max(0.0, total_ms - transform_ms)
+
+
+def run(
+    size: int,
+    queries: int,
+    k: int,
+    drop: float,
+    tables: int,
+    bits: int,
+    probes: int,
+    max_candidates: int,
+) -> None:
+    patterns = clustered_patterns(size)
+    config = SimilarityConfig(top_k=k)
+    exact = SimilarityEngine(config)
+    exact.build_index(patterns)
+    ann = LSHSimilarityEngine(
+        config,
+        tables=tables,
+        bits=bits,
+        probes=probes,
+        max_candidates=max_candidates,
+        exact_below=0,
+    )
+    start = time.perf_counter()
+    ann.build_index(patterns)
+    build_s = time.perf_counter() - start
+
+    probe_queries = _queries(exact, queries, drop)
+    exact_results, exact_ms, exact_lookup = _timed_lookup(exact, probe_queries)
+    ann_results, ann_ms, ann_lookup = _timed_lookup(ann, probe_queries)
+
+    hits = top_hits = 0
+    for truth, approx in zip(exact_results, ann_results):
+        hits += len({m.pattern.pattern_id for m in truth} & {m.pattern.pattern_id for m in approx})
+        top_hits += bool(approx) and truth[0].pattern.pattern_id == approx[0].pattern.pattern_id
+    recall = hits / (k * len(probe_queries))
+    top_recall = top_hits / len(probe_queries)
+    print(
+        f"{size:>8} patterns | recall@1 {top_recall:.3f} recall@{k} {recall:.3f} | lsh build {build_s:6.2f}s"
+        f" | lookup exact {exact_lookup:7.3f} ms lsh {ann_lookup:7.3f} ms"
+        f" | end-to-end exact {exact_ms:7.3f} ms lsh {ann_ms:7.3f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--drop", type=float, default=0.2)
+    parser.add_argument("--tables", type=int, default=32)
+    parser.add_argument("--bits", type=int, default=12)
+    parser.add_argument("--probes", type=int, default=2)
+    parser.add_argument("--max-candidates", type=int, default=128)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(
+            size,
+            args.queries,
+            args.k,
+            args.drop,
+            args.tables,
+            args.bits,
+            args.probes,
+            args.max_candidates,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Status-poll latency while a scan is writing, for each SQLite database profile.
+
+Run from ``backend/``::
+
+    python -m benchmarks.db_concurrency_bench --seconds 5 --readers 4
+
+``rollback`` is SQLite's default rollback journal with ``synchronous=FULL`` (the
+previous engine setup); ``wal`` is the default profile from ``create_db_engine``.
+Readers repeat what ``GET /api/status`` does while one writer commits batches of
+candidates and log lines the way ``ScanWriter`` does during a scan.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+from app import models  # noqa: F401
+from app.core.config import Settings
+from app.db.base import Base
+from app.db.session import create_db_engine
+from app.models.scan import Scan
+from app.services.fingerprints import CARRIED_FIELDS
+from app.services.scan_log import tail_entries
+from app.services.scan_writer import ScanWriter
+
+PROFILES = {
+    "rollback": {"db_sqlite_wal": False, "db_sqlite_synchronous": "FULL"},
+    "wal": {"db_sqlite_wal": True, "db_sqlite_synchronous": "NORMAL"},
+}
+
+
+def _candidate(line: int) -> dict:
+    row = {name: "" for name in CARRIED_FIELDS}
+    row.update(
+        file="bench.py",
+        line_start=line,
+        line_end=line,
+        call_snippet="client.chat.completions.create(model=MODEL, messages=messages)" * 4,
+        rule_solvability_score=0.5,
+        confidence=0.5,
+        estimated_api_calls_saved=1,
+        latency_improvement_ms=1,
+        auto_refactor_safe=False,
+    )
+    return row
+
+
+def run(profile: str, seconds: float, readers: int, batch: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Settings(db_url=f"sqlite:///{Path(tmp) / 'bench.db'}", **PROFILES[profile])
+        engine = create_db_engine(config.db_url, config)
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine, autoflush=False)
+        with factory() as db:
+            scan = Scan(target_path=tmp, status="running")
+            db.add(scan)
+            db.commit()
+            scan_id = scan.id
+
+        stop = threading.Event()
+        latencies: list[float] = []
+        commits = [0]
+        guard = threading.Lock()
+
+        def write() -> None:
+            with factory() as db:
+                scan = db.get(Scan, scan_id)
+                writer = ScanWriter(db, scan, flush_every=batch, flush_interval_ms=10**9)
+                line = 0
+                while not stop.is_set():
+                    line += 1
+                    scan.progress = line % 100
+                    writer.log.append(f"Analyzing bench.py:{line}...")
+                    writer.add_candidate(_candidate(line))
+                commits[0] = writer.commits
+
+        def read() -> None:
+            local: list[float] = []
+            while not stop.is_set():
+                start = time.perf_counter()
+                with factory() as db:
+                    db.get(Scan, scan_id)
+                    tail_entries(db, scan_id, 200)
+                local.append((time.perf_counter() - start) * 1000)
+            with guard:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=write)] + [
+            threading.Thread(target=read) for _ in range(readers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{profile:>8} | polls {len(latencies):6d} | p50 {quantiles[49]:7.2f} ms | p95 {quantiles[94]:7.2f} ms"
+        f" | p99 {quantiles[98]:7.2f} ms | max {latencies[-1]:8.2f} ms | writer commits {commits[0] / seconds:7.1f}/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--profiles", nargs="+", choices=sorted(PROFILES), default=["rollback", "wal"]
+    )
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=64)
+    args = parser.parse_args()
+    for profile in args.profiles:
+        run(profile, args.seconds, args.readers, args.batch)
+
+
+if __name__ == "__main__":
+    main()
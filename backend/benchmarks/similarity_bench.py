@@ -0,0 +1,143 @@
+"""Memory and latency of the similarity index at growing registry sizes.
+
+Run from ``backend/``::
+
+    python -m benchmarks.similarity_bench --sizes 1000 10000 100000
+
+The dense baseline reproduces the previous ``toarray()`` + ``cosine_similarity``
+implementation and is skipped when its matrices would not fit in ``--dense-limit-mb``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.engine.pattern_registry.models import PatternDefinition
+from app.engine.similarity_engine import SimilarityConfig, SimilarityEngine
+
+INTENTS = [
+    "yes_no_classification",
+    "structured_extraction",
+    "small_domain_label_matching",
+    "long_form_summarization",
+    "generic_generation",
+]
+NODE_TYPES = [
+    "module",
+    "expression_statement",
+    "assignment",
+    "call",
+    "attribute",
+    "argument_list",
+    "keyword_argument",
+    "list",
+    "dictionary",
+    "pair",
+    "IDENT",
+    "LIT",
+    "return_statement",
+    "if_statement",
+    "comparison_operator",
+    "binary_operator",
+    "subscript",
+    "block",
+]
+
+
+def synthetic_patterns(count: int, seed: int = 7) -> list[PatternDefinition]:
+    rng = random.Random(seed)
+    vocab = [f"tok{i}" for i in range(5000)]
+    patterns = []
+    for i in range(count):
+        patterns.append(
+            PatternDefinition(
+                pattern_id=f"bench_{i}",
+                intent=rng.choice(INTENTS),
+                language="python",
+                source_ast_signature=" ".join(
+                    rng.choice(NODE_TYPES)
+                    + (f"_{rng.randrange(200)}" if rng.random() < 0.3 else "")
+                    for _ in range(rng.randrange(20, 120))
+                ),
+                prompt_contract=" ".join(rng.choices(vocab, k=12)),
+                output_schema=rng.choice(
+                    ["ENUM: YES|NO", "JSON_OBJECT", "ENUM_OR_LABEL", "FREEFORM_TEXT"]
+                ),
+                replacement_template=" ".join(rng.choices(vocab, k=20)),
+            )
+        )
+    return patterns
+
+
+def _sparse_bytes(matrix) -> int:
+    return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+
+def _dense_score(
+    engine: SimilarityEngine, dense: dict[str, np.ndarray], texts: dict[str, str]
+) -> None:
+    total = np.zeros(dense["prompt"].shape[0])
+    breakdowns = [{"prompt": 0.0, "ast": 0.0, "output": 0.0} for _ in range(total.size)]
+    for key, weight in engine.config.weights.items():
+        vector = engine._vectorizers[key].transform([texts[key]]).toarray()
+        scores = cosine_similarity(vector, dense[key])[0]
+        total += scores * weight
+        for idx, score in enumerate(scores):
+            breakdowns[idx][key] = float(score)
+    np.argsort(total)[::-1][: engine.config.top_k]
+
+
+def run(size: int, queries: int, dense_limit_mb: float) -> None:
+    patterns = synthetic_patterns(size)
+    engine = SimilarityEngine(SimilarityConfig(top_k=3))
+    start = time.perf_counter()
+    engine.build_index(patterns)
+    build_s = time.perf_counter() - start
+
+    probes = patterns[:queries]
+    start = time.perf_counter()
+    for p in probes:
+        engine.score(engine._prompt_text(p), p.source_ast_signature or "", engine._output_text(p))
+    sparse_ms = (time.perf_counter() - start) * 1000 / len(probes)
+    sparse_mb = sum(_sparse_bytes(m) for m in engine._matrices.values()) / 2**20
+    dense_mb = sum(m.shape[0] * m.shape[1] * 8 for m in engine._matrices.values()) / 2**20
+
+    dense_ms = "skipped"
+    if dense_mb <= dense_limit_mb:
+        dense = {key: m.toarray() for key, m in engine._matrices.items()}
+        start = time.perf_counter()
+        for p in probes:
+            _dense_score(
+                engine,
+                dense,
+                {
+                    "prompt": engine._prompt_text(p),
+                    "ast": p.source_ast_signature or "",
+                    "output": engine._output_text(p),
+                },
+            )
+        dense_ms = f"{(time.perf_counter() - start) * 1000 / len(probes):.2f} ms/query"
+
+    print(
+        f"{size:>8} patterns | build {build_s:7.2f}s | sparse {sparse_mb:9.1f} MB {sparse_ms:8.2f} ms/query"
+        f" | dense {dense_mb:9.1f} MB {dense_ms:>17}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--dense-limit-mb", type=float, default=2048)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.queries, args.dense_limit_mb)
+
+
+if __name__ == "__main__":
+    main()
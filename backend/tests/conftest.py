@@ -6,6 +6,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.db.base import Base
+from app.engine.refactor_planner import plan_cache as plan_cache_module
 
 
 @pytest.fixture()
@@ -21,3 +22,11 @@ def db_session(tmp_path) -> Generator[Session, None, None]:
         session.close()
         if db_path.exists():
             os.unlink(db_path)
+
+
+@pytest.fixture(autouse=True)
+def plan_cache(tmp_path, monkeypatch) -> plan_cache_module.PlanCache:
+    """Keep plans cached by one test out of the others and out of the working tree."""
+    cache = plan_cache_module.PlanCache(tmp_path / "plan_cache.db", max_entries=1000)
+    monkeypatch.setattr(plan_cache_module, "_cache", cache)
+    return cache
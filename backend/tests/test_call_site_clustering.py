@@ -0,0 +1,114 @@
+from pathlib import Path
+
+from app.analysis.clustering import cluster_hits
+from app.analysis.source_unit import load_source_unit
+from app.analysis.types import DetectionHit
+from app.models.candidate import Candidate
+from app.models.scan import Scan
+from app.refactor import planner as planner_module
+from app.refactor.planner import PatchRequest, PlanningContext
+from app.services.scan_log import log_text
+from app.services.scanner import run_scan
+
+SOURCE = """from openai import OpenAI
+
+client = OpenAI()
+
+
+def {name}(text: str) -> str:
+    prompt = f"Is this spam? {{text}}. Respond with ONLY YES or NO"
+    {var} = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{{"role": "user", "content": prompt}}],
+    )
+    return {var}.choices[0].message.content.strip()
+"""
+
+
+def _hit(file: str, snippet: str, prompt: str) -> DetectionHit:
+    return DetectionHit(
+        file=file, line_start=1, line_end=1, snippet=snippet, provider="openai", prompt=prompt
+    )
+
+
+def test_cluster_hits_groups_renamed_copies() -> None:
+    hits = [
+        _hit("a.py", "resp = client.create(prompt)", "Is this spam?"),
+        _hit("b.py", "out  =  client.create(text)", "Is   this spam?"),
+        _hit("c.py", "resp = client.create(prompt)", "Summarize this."),
+    ]
+    clusters = cluster_hits(hits)
+    assert [[hit.file for hit in cluster.hits] for cluster in clusters] == [
+        ["a.py", "b.py"],
+        ["c.py"],
+    ]
+
+
+class CountingPlanner:
+    def __init__(self, planner):
+        self.planner = planner
+        self.planned = 0
+
+    def plan_many(self, candidates):
+        self.planned += len(candidates)
+        return self.planner.plan_many(candidates)
+
+
+def test_build_patches_plans_each_group_once(tmp_path: Path) -> None:
+    context = PlanningContext()
+    counting = CountingPlanner(context.planner)
+    context.planner = counting
+    files = []
+    for idx in range(3):
+        path = tmp_path / f"copy_{idx}.py"
+        path.write_text(SOURCE.format(name=f"check_{idx}", var=f"resp_{idx}"), encoding="utf-8")
+        files.append(path)
+
+    patches = context.build_patches(
+        [PatchRequest(str(path), 8, 11, "yes_no_classification", group="spam") for path in files]
+    )
+    assert counting.planned == 1
+    assert len(patches) == 3
+    for idx, (path, (diff, _, _)) in enumerate(zip(files, patches)):
+        # Each member's patch is rendered against its own file, not the representative's.
+        assert diff.startswith(f"--- {path}\n+++ {path}.optimized\n")
+        assert f"-    resp_{idx} = client.chat.completions.create(" in diff
+        assert f"     return resp_{idx}.choices[0]" in diff
+        assert not any(f"resp_{other}" in diff for other in range(3) if other != idx)
+
+
+def test_context_reads_detector_units_and_bounds_its_line_cache(
+    tmp_path: Path, monkeypatch
+) -> None:
+    monkeypatch.setattr(planner_module, "LINE_CACHE_FILES", 2)
+    paths = []
+    for idx in range(3):
+        path = tmp_path / f"f{idx}.py"
+        path.write_text(f"x = {idx}\n", encoding="utf-8")
+        paths.append(path)
+    unit = load_source_unit(paths[0])
+    paths[0].unlink()
+    context = PlanningContext(units={str(paths[0]): unit})
+
+    assert context.read_lines(paths[0]) == ["x = 0\n"]
+    assert context.units == {}
+    context.read_lines(paths[1])
+    context.read_lines(paths[2])
+    assert list(context._lines) == [str(paths[1]), str(paths[2])]
+
+
+def test_scan_dedupes_copied_call_sites(db_session, tmp_path: Path) -> None:
+    for idx in range(4):
+        (tmp_path / f"copy_{idx}.py").write_text(
+            SOURCE.format(name=f"check_{idx}", var="resp"), encoding="utf-8"
+        )
+    scan = Scan(target_path=str(tmp_path), status="queued", progress=0)
+    db_session.add(scan)
+    db_session.commit()
+
+    run_scan(db_session, scan.id, str(tmp_path))
+
+    candidates = db_session.query(Candidate).filter(Candidate.scan_id == scan.id).all()
+    assert sorted(Path(c.file).name for c in candidates) == [f"copy_{idx}.py" for idx in range(4)]
+    assert {c.inferred_intent for c in candidates} == {"yes_no_classification"}
+    assert "Grouped 4 call sites into 1 distinct clusters" in log_text(db_session, scan.id)
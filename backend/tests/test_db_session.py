@@ -0,0 +1,14 @@
+from sqlalchemy import text
+
+from app.core.config import Settings
+from app.db.session import create_db_engine
+
+
+def test_sqlite_profile_applies_pragmas(tmp_path) -> None:
+    config = Settings(db_busy_timeout_ms=2500)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'app.db'}", config)
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 2500
+    engine.dispose()
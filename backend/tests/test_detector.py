@@ -1,11 +1,56 @@
+import subprocess
 from pathlib import Path
 
-from app.analysis.detector import scan_for_ai_calls
+from app.analysis import detector
+from app.analysis.detector import _fallback_scan, _semgrep_findings, scan_for_ai_calls
 
 
 def test_detector_finds_sample_calls() -> None:
     root = Path(__file__).resolve().parents[2]
-    hits = scan_for_ai_calls(str(root / "samples"), str(root / "backend" / "semgrep_rules" / "ai_calls.yml"))
+    hits = scan_for_ai_calls(
+        str(root / "samples"), str(root / "backend" / "semgrep_rules" / "ai_calls.yml")
+    )
     files = {Path(h.file).name for h in hits}
     assert "main.py" in files or "main.ts" in files
     assert len(hits) >= 4
+
+
+def test_detector_hands_loaded_sources_of_hit_files_to_the_caller(monkeypatch) -> None:
+    monkeypatch.setattr(detector.settings, "scan_workers", 1)
+    root = Path(__file__).resolve().parents[2]
+    units: dict = {}
+    hits = scan_for_ai_calls(
+        str(root / "samples"),
+        str(root / "backend" / "semgrep_rules" / "ai_calls.yml"),
+        units=units,
+    )
+    assert set(units) == {hit.file for hit in hits}
+    for file, unit in units.items():
+        assert unit.text == Path(file).read_text(encoding="utf-8", errors="ignore")
+
+
+def test_parallel_fallback_scan_matches_sequential() -> None:
+    root = Path(__file__).resolve().parents[2]
+    sequential = _fallback_scan(root / "samples", workers=1)
+    parallel = _fallback_scan(root / "samples", workers=2, batch_size=1)
+    assert [(h.file, h.line_start, h.snippet) for h in parallel] == [
+        (h.file, h.line_start, h.snippet) for h in sequential
+    ]
+
+
+def test_semgrep_shards_survive_timeouts(monkeypatch) -> None:
+    calls: list[list[str]] = []
+
+    def fake_batch(command, batch, timeout):
+        calls.append(batch)
+        if "slow.py" in batch:
+            raise subprocess.TimeoutExpired(command, timeout)
+        return [{"path": file} for file in batch]
+
+    monkeypatch.setattr(detector, "_semgrep_batch", fake_batch)
+    files = ["a.py", "b.py", "c.py", "slow.py", "d.py", "e.py"]
+    findings = _semgrep_findings(Path("rules.yml"), files, jobs=3, batch_size=4, timeout=1.0)
+
+    # The shard holding slow.py is halved once; only the half containing it is lost.
+    assert [f["path"] for f in findings] == ["a.py", "b.py", "d.py", "e.py"]
+    assert sorted(len(batch) for batch in calls) == [2, 2, 2, 4]
@@ -0,0 +1,75 @@
+from pathlib import Path
+
+from app.analysis.file_walker import WalkStats, is_ignored, iter_source_files, parse_gitignore
+
+
+def _write(path: Path, content: str | bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(content, bytes):
+        path.write_bytes(content)
+    else:
+        path.write_text(content, encoding="utf-8")
+
+
+def test_walker_prunes_ignored_and_filters_files(tmp_path: Path) -> None:
+    _write(tmp_path / ".gitignore", "generated/\n*.gen.py\n/build_output.py\n!keep.gen.py\n")
+    _write(tmp_path / "app" / "main.py", "print('hi')\n")
+    _write(tmp_path / "app" / "keep.gen.py", "x = 1\n")
+    _write(tmp_path / "app" / "skip.gen.py", "x = 1\n")
+    _write(tmp_path / "app" / "build_output.py", "x = 1\n")
+    _write(tmp_path / "app" / ".gitignore", "local_*.py\n")
+    _write(tmp_path / "app" / "local_settings.py", "x = 1\n")
+    _write(tmp_path / "build_output.py", "x = 1\n")
+    _write(tmp_path / "generated" / "client.py", "x = 1\n")
+    _write(tmp_path / "node_modules" / "openai" / "index.js", "module.exports = {}\n")
+    _write(tmp_path / "web" / "app.ts", "export const a = 1;\n")
+    _write(
+        tmp_path / "web" / "bundle.js", "function(e){return e&&e.__esModule?e:{default:e}};" * 30
+    )
+    _write(tmp_path / "web" / "vendor.min.js", "var a=1;\n")
+    _write(tmp_path / "web" / "huge.py", "x = 1\n" * 500)
+    _write(tmp_path / "web" / "blob.py", b"\x00\x01binary")
+    long_prompt = "Classify the ticket. " * 80
+    _write(tmp_path / "web" / "prompts.py", f'PROMPT = "{long_prompt}"\n')
+    _write(
+        tmp_path / "web" / "dense.js", f'const prompt = "{long_prompt}";\nexport default prompt;\n'
+    )
+
+    stats = WalkStats()
+    files = list(
+        iter_source_files(tmp_path, stats, exclude_dirs=["node_modules"], max_file_bytes=2000)
+    )
+    names = [str(Path(f).relative_to(tmp_path)) for f in files]
+
+    assert names == [
+        "app/build_output.py",
+        "app/keep.gen.py",
+        "app/main.py",
+        "web/app.ts",
+        "web/dense.js",
+        "web/prompts.py",
+    ]
+    assert stats.files == 6
+    assert stats.pruned_dirs == 2
+    assert stats.ignored == 3
+    assert stats.too_large == 1
+    assert stats.binary == 1
+    assert stats.minified == 2
+    skipped = {
+        str(Path(path).relative_to(tmp_path)): reason for path, reason in stats.skipped_paths
+    }
+    assert skipped["node_modules"] == "excluded"
+    assert skipped["generated"] == "ignored directory"
+    assert skipped["web/bundle.js"] == "minified"
+    assert skipped["web/huge.py"] == "too large"
+
+
+def test_gitignore_patterns() -> None:
+    rules = parse_gitignore("**/fixtures/*.py\ndocs/**\n*.log\n!important.log\n", base="pkg")
+    assert is_ignored(rules, "pkg/a/fixtures/x.py", False)
+    assert is_ignored(rules, "pkg/fixtures/x.py", False)
+    assert not is_ignored(rules, "pkg/a/fixtures/deep/x.py", False)
+    assert is_ignored(rules, "pkg/docs/a/b.md", False)
+    assert is_ignored(rules, "pkg/x/debug.log", False)
+    assert not is_ignored(rules, "pkg/important.log", False)
+    assert not is_ignored(rules, "other/debug.log", False)
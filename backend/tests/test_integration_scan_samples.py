@@ -1,13 +1,20 @@
+import shutil
 from pathlib import Path
 
+from sqlalchemy.orm import sessionmaker
+
+from app.engine.pattern_registry.registry import get_registry
 from app.models.candidate import Candidate
+from app.models.fingerprint import FileFingerprint
 from app.models.scan import Scan
+from app.services.fingerprints import diff_fingerprints, record_fingerprints
+from app.services.scan_log import log_text
 from app.services.scanner import run_scan
 
 
 def test_scan_samples_generates_expected_candidates(db_session) -> None:
     root = Path(__file__).resolve().parents[2]
-    scan = Scan(target_path=str(root / "samples"), status="queued", progress=0, logs="")
+    scan = Scan(target_path=str(root / "samples"), status="queued", progress=0)
     db_session.add(scan)
     db_session.commit()
     db_session.refresh(scan)
@@ -27,3 +34,71 @@ def test_scan_samples_generates_expected_candidates(db_session) -> None:
 
     assert yes_no.rule_solvability_score >= 0.8
     assert non_replaceable.rule_solvability_score < 0.4
+    assert "Walked 4 source files; 0 files skipped" in log_text(db_session, scan.id)
+
+
+def test_rescan_reuses_unchanged_files(db_session, tmp_path) -> None:
+    root = Path(__file__).resolve().parents[2]
+    target = tmp_path / "samples"
+    shutil.copytree(root / "samples", target)
+
+    def scan_once() -> Scan:
+        scan = Scan(target_path=str(target), status="queued", progress=0)
+        db_session.add(scan)
+        db_session.commit()
+        run_scan(db_session, scan.id, str(target))
+        return scan
+
+    first = scan_once()
+    second = scan_once()
+    first_rows = db_session.query(Candidate).filter(Candidate.scan_id == first.id).all()
+    second_rows = db_session.query(Candidate).filter(Candidate.scan_id == second.id).all()
+
+    second_logs = log_text(db_session, second.id)
+    assert "4 unchanged files" in second_logs
+    assert "Found 0 potential AI calls" in second_logs
+    assert sorted((c.file, c.line_start, c.inferred_intent) for c in second_rows) == sorted(
+        (c.file, c.line_start, c.inferred_intent) for c in first_rows
+    )
+
+    (target / "python_yes_no" / "main.py").write_text("print('no llm here')\n", encoding="utf-8")
+    third = scan_once()
+    third_rows = db_session.query(Candidate).filter(Candidate.scan_id == third.id).all()
+    assert "1 changed files to analyze" in log_text(db_session, third.id)
+    assert all(not c.file.endswith("python_yes_no/main.py") for c in third_rows)
+
+
+def test_rescan_replans_when_planner_config_changes(db_session, tmp_path, monkeypatch) -> None:
+    root = Path(__file__).resolve().parents[2]
+    target = tmp_path / "samples"
+    shutil.copytree(root / "samples", target)
+
+    def scan_once() -> Scan:
+        scan = Scan(target_path=str(target), status="queued", progress=0)
+        db_session.add(scan)
+        db_session.commit()
+        run_scan(db_session, scan.id, str(target))
+        return scan
+
+    scan_once()
+    monkeypatch.setattr(get_registry(), "version", get_registry().version + "-promoted")
+    second = scan_once()
+
+    logs = log_text(db_session, second.id)
+    assert "0 unchanged files" in logs
+    assert "re-planning 4 files" in logs
+
+
+def test_concurrent_scans_of_one_target_both_record_fingerprints(db_session, tmp_path) -> None:
+    source = tmp_path / "app.py"
+    source.write_text("x = 1\n", encoding="utf-8")
+    factory = sessionmaker(bind=db_session.get_bind())
+    with factory() as first, factory() as second:
+        # Both scans diff before either records, so both see the file as new.
+        diffs = [diff_fingerprints(db, str(tmp_path), [str(source)]) for db in (first, second)]
+        for db, diff, config in zip((first, second), diffs, ("a", "b")):
+            record_fingerprints(db, str(tmp_path), diff, [], config)
+            db.commit()
+
+    fingerprints = db_session.query(FileFingerprint).all()
+    assert [(fp.file, fp.plan_config) for fp in fingerprints] == [(str(source), "b")]
@@ -0,0 +1,231 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.models.job import Job
+from app.models.scan import Scan
+from app.workers.queue import (
+    JobSignal,
+    WorkerPool,
+    _completions,
+    claim_job,
+    complete_job,
+    fail_job,
+    reap_expired_leases,
+    wait_for_job,
+)
+
+
+def test_claim_job_never_hands_out_a_job_twice(db_session) -> None:
+    db_session.add_all([Job(kind="scan", payload="{}", status="queued") for _ in range(40)])
+    db_session.commit()
+    factory = sessionmaker(bind=db_session.get_bind())
+
+    claimed: list[int] = []
+    guard = threading.Lock()
+
+    def drain() -> None:
+        with factory() as db:
+            while job := claim_job(db):
+                with guard:
+                    claimed.append(job.id)
+
+    threads = [threading.Thread(target=drain) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == list(range(1, 41))
+    assert db_session.query(Job).filter(Job.status == "queued").count() == 0
+
+
+def test_worker_pool_respects_job_kinds(db_session) -> None:
+    db_session.add_all([Job(kind="scan", payload="{}"), Job(kind="shadow", payload="{}")])
+    db_session.commit()
+    factory = sessionmaker(bind=db_session.get_bind())
+    done = threading.Event()
+
+    def process(db, job) -> None:
+        job.status = "completed"
+        db.commit()
+        done.set()
+
+    pool = WorkerPool("test", 2, kinds=["shadow"], session_factory=factory, process=process)
+    pool.start()
+    assert done.wait(5)
+    pool.stop(wait=True)
+
+    db_session.expire_all()
+    statuses = {job.kind: job.status for job in db_session.query(Job)}
+    assert statuses == {"scan": "queued", "shadow": "completed"}
+
+
+def test_idle_workers_wake_on_signal_instead_of_polling(db_session) -> None:
+    factory = sessionmaker(bind=db_session.get_bind())
+    signal = JobSignal()
+    done = threading.Event()
+
+    def process(db, job) -> None:
+        job.status = "completed"
+        db.commit()
+        done.set()
+
+    pool = WorkerPool(
+        "test", 1, session_factory=factory, process=process, signal=signal, poll_interval=60
+    )
+    pool.start()
+    db_session.add(Job(kind="shadow", payload="{}"))
+    db_session.commit()
+    signal.notify()
+    assert done.wait(5)
+    pool.stop(wait=True)
+
+
+def test_claim_prefers_priority_and_takes_a_lease(db_session) -> None:
+    db_session.add_all(
+        [Job(kind="scan", payload="{}", priority=0), Job(kind="shadow", payload="{}", priority=10)]
+    )
+    db_session.commit()
+
+    job = claim_job(db_session)
+    assert job.kind == "shadow"
+    assert job.attempts == 1
+    assert job.lease_expires_at > datetime.utcnow()
+
+
+def test_failed_jobs_retry_per_kind_then_fail(db_session) -> None:
+    scan = Scan(target_path="/tmp/x", status="running")
+    db_session.add(scan)
+    db_session.commit()
+    db_session.add(Job(kind="scan", payload="{}", scan_id=scan.id))
+    db_session.commit()
+
+    job = claim_job(db_session)
+    assert fail_job(db_session, job, "boom")
+    assert job.status == "queued"
+    assert job.available_at > datetime.utcnow()
+
+    job.available_at = datetime.utcnow()
+    db_session.commit()
+    job = claim_job(db_session)
+    assert job.attempts == 2
+    assert fail_job(db_session, job, "boom again")
+    assert job.status == "failed"
+    assert job.error == "boom again"
+    assert db_session.get(Scan, scan.id).status == "failed"
+
+
+def test_reaper_requeues_expired_leases(db_session) -> None:
+    db_session.add(Job(kind="shadow", payload="{}"))
+    db_session.commit()
+    job = claim_job(db_session)
+    job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db_session.commit()
+
+    assert reap_expired_leases(db_session) == 1
+    assert job.status == "queued"
+    assert job.error == "lease expired"
+
+
+def test_reclaimed_job_ignores_the_stale_claim(db_session) -> None:
+    db_session.add(Job(kind="shadow", payload="{}"))
+    db_session.commit()
+    stale = claim_job(db_session)
+    stale_attempts = stale.attempts
+    stale.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    assert reap_expired_leases(db_session) == 1
+    stale.available_at = datetime.utcnow()
+    db_session.commit()
+    current = claim_job(db_session)
+    assert current.attempts == stale_attempts + 1
+
+    assert not complete_job(db_session, current, stale_attempts, "stale result")
+    assert not fail_job(db_session, current, "stale error", attempts=stale_attempts)
+    db_session.refresh(current)
+    assert current.status == "running"
+    assert current.result == ""
+
+    assert complete_job(db_session, current, current.attempts, "fresh result")
+    db_session.refresh(current)
+    assert (current.status, current.result) == ("completed", "fresh result")
+
+
+def test_worker_survives_a_failing_job(db_session) -> None:
+    db_session.add_all([Job(kind="scan", payload="{}"), Job(kind="scan", payload="{}")])
+    db_session.commit()
+    factory = sessionmaker(bind=db_session.get_bind())
+    done = threading.Event()
+
+    def process(db, job) -> None:
+        if job.id == 1:
+            raise RuntimeError("bad payload")
+        job.status = "completed"
+        db.commit()
+        done.set()
+
+    pool = WorkerPool("test", 1, session_factory=factory, process=process, poll_interval=60)
+    pool.start()
+    assert done.wait(5)
+    pool.stop(wait=True)
+
+    db_session.expire_all()
+    failed = db_session.get(Job, 1)
+    assert failed.status == "queued"
+    assert failed.error == "RuntimeError: bad payload"
+
+
+def test_worker_survives_database_errors_while_claiming(db_session, monkeypatch) -> None:
+    monkeypatch.setattr("app.workers.queue.CLAIM_BACKOFF_BASE", 0.01)
+    db_session.add(Job(kind="scan", payload="{}"))
+    db_session.commit()
+    factory = sessionmaker(bind=db_session.get_bind())
+    attempts = []
+    done = threading.Event()
+
+    def flaky_factory():
+        attempts.append(1)
+        if len(attempts) <= 2:
+            raise OperationalError("SELECT", {}, Exception("database is locked"))
+        return factory()
+
+    def process(db, job) -> None:
+        job.status = "completed"
+        db.commit()
+        done.set()
+
+    pool = WorkerPool("test", 1, session_factory=flaky_factory, process=process, poll_interval=60)
+    pool.start()
+    assert done.wait(5)
+    pool.stop(wait=True)
+    assert len(attempts) >= 3
+
+
+def test_wait_for_job_resolves_when_the_worker_finishes(db_session) -> None:
+    db_session.add(Job(kind="shadow", payload="{}"))
+    db_session.commit()
+    factory = sessionmaker(bind=db_session.get_bind())
+
+    def finish() -> None:
+        with factory() as db:
+            job = claim_job(db)
+            job.status = "completed"
+            db.commit()
+            _completions.resolve(job.id, "completed")
+
+    async def wait() -> tuple[str | None, float]:
+        waiting = asyncio.create_task(wait_for_job(1, timeout=30, session_factory=factory))
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        threading.Thread(target=finish).start()
+        return await waiting, time.perf_counter() - started
+
+    status, elapsed = asyncio.run(wait())
+    assert status == "completed"
+    assert elapsed < 5
+    assert asyncio.run(wait_for_job(1, timeout=5, session_factory=factory)) == "completed"
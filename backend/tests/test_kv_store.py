@@ -0,0 +1,22 @@
+from app.core.kv_store import SQLiteKVStore
+
+
+def test_store_evicts_below_the_cap_and_drops_old_tags(tmp_path) -> None:
+    store = SQLiteKVStore(tmp_path / "store.db", max_entries=20)
+    for idx in range(20):
+        store.put(f"k{idx}", str(idx), tag="v1")
+    store.put("k0", "again", tag="v1")
+    assert store.entries() == 20
+    assert store.stats.evictions == 0
+
+    store.put("k20", "20", tag="v2")
+    # One over the cap, plus 10% headroom, least recently read first.
+    assert store.stats.evictions == 3
+    assert store.entries() == 18
+    assert store.get("k1") is None
+    assert store.get("k0") == "again"
+
+    assert store.delete_other_tags("v2") == 17
+    assert store.entries() == 1
+    reopened = SQLiteKVStore(tmp_path / "store.db", max_entries=20)
+    assert reopened.get("k20") == "20"
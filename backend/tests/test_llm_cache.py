@@ -0,0 +1,36 @@
+from app.analysis.agent import RefactorAgent
+from app.services import llm_cache
+from app.services.llm_cache import ResponseCache, cache_key
+
+
+def test_cache_expires_and_evicts_least_recently_read(tmp_path) -> None:
+    cache = ResponseCache(tmp_path / "cache.db", ttl_seconds=3600, max_entries=2)
+    cache.put("a", "A", "openai", "m")
+    cache.put("b", "B", "openai", "m")
+    assert cache.get("a") == "A"
+    cache.put("c", "C", "openai", "m")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (3, 1, 1)
+
+    cache.ttl_seconds = -1
+    assert cache.get("a") is None
+    assert cache.stats.expired == 1
+
+
+def test_agent_answers_repeated_prompts_from_cache(tmp_path, monkeypatch) -> None:
+    cache = ResponseCache(tmp_path / "cache.db", ttl_seconds=3600, max_entries=10)
+    monkeypatch.setattr(llm_cache, "_cache", cache)
+    agent = RefactorAgent()
+    agent.provider = "openai"
+    calls = []
+    monkeypatch.setattr(
+        agent, "_call_openai", lambda prompt: calls.append(prompt) or '{"ok": true}'
+    )
+
+    assert agent.complete("same prompt\n") == '{"ok": true}'
+    assert agent.complete("  same prompt   ") == '{"ok": true}'
+    assert len(calls) == 1
+    assert cache_key("openai", "gpt-4o", 0.0, "s", "p") != cache_key(
+        "anthropic", "gpt-4o", 0.0, "s", "p"
+    )
@@ -0,0 +1,40 @@
+from app.models.scan import Scan
+from app.services.metrics import forget_candidates, get_rollup, rebuild_rollups, record_scan
+from app.services.scan_writer import ScanWriter
+from tests.test_scan_writer import _row
+
+
+def _snapshot(db_session, scan_id: int) -> dict:
+    return {
+        bucket: (
+            row.scans,
+            row.candidates,
+            row.calls_saved,
+            round(row.score_sum, 6),
+            row.latency_sum,
+        )
+        for bucket, key in (("total", "all"), ("scan", str(scan_id)))
+        if (row := get_rollup(db_session, bucket, key)) is not None
+    }
+
+
+def test_rollups_follow_inserts_and_match_a_rebuild(db_session) -> None:
+    scan = Scan(target_path="/tmp/x")
+    db_session.add(scan)
+    record_scan(db_session)
+    db_session.commit()
+
+    with ScanWriter(db_session, scan, flush_every=4, flush_interval_ms=60_000) as writer:
+        for line in range(10):
+            writer.add_candidate(_row(line))
+
+    incremental = _snapshot(db_session, scan.id)
+    assert incremental["total"] == (1, 10, 10, 5.0, 10.0)
+    assert incremental["scan"] == (0, 10, 10, 5.0, 10.0)
+
+    rebuild_rollups(db_session)
+    assert _snapshot(db_session, scan.id) == incremental
+
+    forget_candidates(db_session, scan.id)
+    db_session.commit()
+    assert _snapshot(db_session, scan.id)["total"] == (1, 0, 0, 0.0, 0.0)
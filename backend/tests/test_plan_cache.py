@@ -0,0 +1,70 @@
+import pytest
+
+from app.engine.intent_inference import infer_output_contract
+from app.engine.refactor_planner import (
+    CandidateContext,
+    DecisionTrace,
+    ProgressiveCertaintyPlanner,
+    RefactorPlan,
+)
+
+
+def _candidate(file_path: str = "service.py") -> CandidateContext:
+    snippet = """resp = client.chat.completions.create(
+    model=\"gpt-4o-mini\",
+    messages=[{\"role\": \"user\", \"content\": prompt}],
+)"""
+    prompt = "Respond with ONLY YES or NO"
+    return CandidateContext(
+        file_path=file_path,
+        snippet=snippet,
+        prompt=prompt,
+        intent="yes_no_classification",
+        language="python",
+        output_contract=infer_output_contract(prompt, snippet),
+        context=prompt,
+    )
+
+
+def test_cached_plan_skips_planning_stages(plan_cache, monkeypatch) -> None:
+    planner = ProgressiveCertaintyPlanner(plan_cache=plan_cache)
+    first = planner.plan(_candidate())
+    assert first.can_apply
+    assert plan_cache.entries() == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("planning stage ran for a cached signature")
+
+    monkeypatch.setattr(planner, "_exact_match_stage", fail)
+    second = planner.plan(_candidate("other/copy.py"))
+    assert second == first
+    assert plan_cache.stats.hits == 1
+
+
+def test_registry_version_change_invalidates_plans(plan_cache, monkeypatch) -> None:
+    planner = ProgressiveCertaintyPlanner(plan_cache=plan_cache)
+    planner.plan(_candidate())
+    assert plan_cache.entries() == 1
+
+    monkeypatch.setattr(planner.registry, "version", planner.registry.version + "-edited")
+    calls = []
+    original = planner._exact_match_stage
+
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(planner, "_exact_match_stage", counting)
+    planner.plan(_candidate())
+    assert len(calls) == 1
+    assert plan_cache.entries() == 1
+
+
+@pytest.mark.parametrize("stage", ["no-match", "llm-synthesis"])
+def test_snippet_specific_plans_are_not_cached(plan_cache, stage) -> None:
+    trace = DecisionTrace(stage=stage)
+    plan = RefactorPlan(
+        False, stage, "return 'YES'", "Add tests.", "Suggestion.", trace, suggestion_only=True
+    )
+    plan_cache.put("key", "v1", plan)
+    assert plan_cache.entries() == 0
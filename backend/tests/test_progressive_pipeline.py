@@ -1,11 +1,11 @@
 from pathlib import Path
 
 from app.engine.intent_inference import infer_output_contract
-from app.engine.refactor_planner import CandidateContext, ProgressiveCertaintyPlanner
 from app.engine.pattern_registry.ast_utils import detect_language
+from app.engine.refactor_planner import CandidateContext, ProgressiveCertaintyPlanner
 
 
-def test_progressive_pipeline_exact_match_yes_no() -> None:
+def _yes_no_candidate() -> CandidateContext:
     root = Path(__file__).resolve().parents[2]
     file_path = root / "samples" / "python_yes_no" / "main.py"
     snippet = """resp = client.chat.completions.create(
@@ -16,7 +16,7 @@ def test_progressive_pipeline_exact_match_yes_no() -> None:
     language = detect_language(file_path=str(file_path))
     output_contract = infer_output_contract(prompt, snippet)
 
-    candidate = CandidateContext(
+    return CandidateContext(
         file_path=str(file_path),
         snippet=snippet,
         prompt=prompt,
@@ -26,9 +26,22 @@ def test_progressive_pipeline_exact_match_yes_no() -> None:
         context=prompt,
     )
 
+
+def test_progressive_pipeline_exact_match_yes_no() -> None:
+    candidate = _yes_no_candidate()
     planner = ProgressiveCertaintyPlanner()
     plan = planner.plan(candidate)
 
     assert plan.can_apply is True
     assert plan.stage in {"exact-match", "similarity-normalized"}
     assert "deterministic" in plan.explanation.lower()
+
+
+def test_plan_many_matches_single_plans() -> None:
+    planner = ProgressiveCertaintyPlanner()
+    candidate = _yes_no_candidate()
+    plans = planner.plan_many([candidate, candidate])
+    single = planner.plan(candidate)
+
+    assert [p.stage for p in plans] == [single.stage, single.stage]
+    assert all(p.can_apply for p in plans)
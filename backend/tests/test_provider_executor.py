@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.analysis.agent import RefactorAgent
+from app.core.config import settings
+from app.engine.llm_orchestrator import executor as executor_module
+from app.engine.llm_orchestrator.executor import (
+    ProviderExecutor,
+    RetryableProviderError,
+    TokenBucket,
+)
+
+
+class FakeOpenAI(BaseHTTPRequestHandler):
+    """Chat completions endpoint that rate-limits the first request for each prompt."""
+
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    requests = 0
+    seen: set[str] = set()
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        cls = type(self)
+        prompt = body["messages"][-1]["content"]
+        with cls.lock:
+            cls.requests += 1
+            number = cls.requests
+            first_attempt = prompt not in cls.seen
+            cls.seen.add(prompt)
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.in_flight -= 1
+
+        if first_attempt:
+            self._reply(
+                429, {"error": {"message": "slow down", "type": "rate_limit"}}, {"Retry-After": "0"}
+            )
+            return
+        content = json.dumps({"echo": prompt})
+        self._reply(
+            200,
+            {
+                "id": f"chatcmpl-{number}",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+            },
+        )
+
+    def _reply(self, status: int, payload: dict, headers: dict | None = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture()
+def fake_openai(monkeypatch):
+    FakeOpenAI.requests, FakeOpenAI.max_in_flight, FakeOpenAI.seen = 0, 0, set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(settings, "openai_base_url", f"http://127.0.0.1:{server.server_port}/v1")
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    yield FakeOpenAI
+    server.shutdown()
+
+
+def test_concurrent_calls_are_capped_and_retried(fake_openai, monkeypatch) -> None:
+    executor = ProviderExecutor(concurrency=3, rate_per_second=0, max_retries=3, backoff_base=0.01)
+    monkeypatch.setattr(executor_module, "_executor", executor)
+    agent = RefactorAgent(api_key="sk-test-0123456789", provider="openai")
+
+    prompts = [f"prompt {i}" for i in range(6)]
+    results = executor.map(agent.complete, prompts)
+
+    assert [json.loads(result)["echo"] for result in results] == prompts
+    assert fake_openai.requests == 12  # every prompt hit one 429 before succeeding
+    assert 1 < fake_openai.max_in_flight <= 3
+
+
+def test_retry_after_is_capped_and_jittered() -> None:
+    delays: list[float] = []
+    executor = ProviderExecutor(
+        rate_per_second=0, backoff_base=0.5, backoff_max=20.0, sleep=delays.append
+    )
+    calls = []
+
+    def throttled() -> str:
+        calls.append(1)
+        if len(calls) < 3:
+            raise RetryableProviderError("rate limited", status_code=429, retry_after=3600)
+        return "ok"
+
+    assert executor.call("openai", throttled) == "ok"
+    assert len(delays) == 2
+    assert all(20.0 <= delay <= 20.5 for delay in delays)
+
+
+def test_token_bucket_limits_rate() -> None:
+    bucket = TokenBucket(rate=50, burst=1)
+    start = time.perf_counter()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.perf_counter() - start >= 0.09
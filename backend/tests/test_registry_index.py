@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.engine.pattern_registry.models import PatternDefinition
+from app.engine.pattern_registry.registry import PatternRegistry
+from app.engine.pattern_registry.snapshot import read_snapshot, write_snapshot
+from app.engine.similarity_engine.engine import SimilarityEngine
+from app.rules.store import Rule, RuleStore
+
+
+def test_registry_indexes_follow_saves_and_overwrites(tmp_path) -> None:
+    registry = PatternRegistry(base_dir=tmp_path)
+    first = PatternDefinition(
+        pattern_id="a", intent="yes_no", language="any", source_ast_signature="call IDENT"
+    )
+    second = PatternDefinition(
+        pattern_id="b", intent="yes_no", language="python", source_ast_signature="call IDENT"
+    )
+    registry.save_pattern(first)
+    registry.save_pattern(second)
+
+    assert registry.find_exact_match("call IDENT", "python").pattern_id == "a"
+    assert registry.find_exact_match("call IDENT", "javascript").pattern_id == "a"
+    assert registry.find_exact_match("call LIT", "python") is None
+    assert registry.get_by_intent("yes_no", "python").pattern_id == "a"
+
+    registry.save_pattern(
+        PatternDefinition(
+            pattern_id="a", intent="extract", language="any", source_ast_signature="call LIT"
+        )
+    )
+    assert registry.find_exact_match("call IDENT", "python").pattern_id == "b"
+    assert registry.find_exact_match("call IDENT", "javascript") is None
+    assert registry.get_by_intent("extract", "typescript").pattern_id == "a"
+
+    registry.refresh()
+    assert registry.find_exact_match("call LIT", "python").pattern_id == "a"
+
+
+def test_registry_snapshot_is_reused_until_sources_change(tmp_path) -> None:
+    registry = PatternRegistry(base_dir=tmp_path)
+    registry.save_pattern(
+        PatternDefinition(
+            pattern_id="a",
+            intent="yes_no",
+            language="any",
+            source_ast_signature="call IDENT",
+            prompt_contract="answer yes or no",
+            output_schema="boolean",
+        )
+    )
+    engine = SimilarityEngine()
+    engine.build_index(registry.all_patterns())
+    registry.store_similarity_state(engine.export_state())
+    assert registry.snapshot_path.exists()
+
+    reloaded = PatternRegistry(base_dir=tmp_path)
+    assert reloaded.version == registry.version
+    assert reloaded.similarity_state is not None
+    assert reloaded.find_exact_match("call IDENT", "python").pattern_id == "a"
+
+    (tmp_path / "public" / "b.json").write_text(
+        '{"pattern_id": "b", "intent": "extract", "language": "python", "source_ast_signature": "call LIT"}'
+    )
+    rebuilt = PatternRegistry(base_dir=tmp_path)
+    assert rebuilt.version != registry.version
+    assert rebuilt.similarity_state is None
+    assert rebuilt.find_exact_match("call LIT", "python").pattern_id == "b"
+
+
+def test_concurrent_snapshot_writes_leave_a_complete_file(tmp_path) -> None:
+    path = tmp_path / "registry.snapshot"
+    states = [{"similarity": {"rows": list(range(20_000)), "writer": idx}} for idx in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda state: write_snapshot(path, "m", state), states))
+
+    snapshot = read_snapshot(path, "m")
+    assert snapshot is not None
+    assert {"similarity": snapshot["similarity"]} in states
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_similarity_state_from_other_code_is_refitted() -> None:
+    patterns = [
+        PatternDefinition(
+            pattern_id="a",
+            intent="yes_no",
+            language="any",
+            source_ast_signature="call IDENT",
+            prompt_contract="answer yes or no",
+            output_schema="boolean",
+        )
+    ]
+    engine = SimilarityEngine()
+    engine.build_index(patterns)
+    state = engine.export_state()
+    assert engine.accepts_state(state)
+
+    stale = {**state, "format": ("SimilarityEngine", 0, "0.0")}
+    assert not engine.accepts_state(stale)
+    assert not engine.accepts_state({key: value for key, value in state.items() if key != "format"})
+
+
+def test_rule_store_intent_index(tmp_path) -> None:
+    store = RuleStore(base_dir=tmp_path)
+    store.save_rule(Rule("r1", "yes_no", [], "python", "def a(): ...", ""))
+    store.save_rule(Rule("r2", "yes_no", [], "python", "def b(): ...", ""))
+    assert store.get_rule_by_intent("yes_no").id == "r1"
+
+    store.save_rule(Rule("r1", "extract", [], "python", "def c(): ...", ""))
+    assert store.get_rule_by_intent("yes_no").id == "r2"
+    assert store.get_rule_by_intent("extract").id == "r1"
+    assert store.get_rule_by_intent("missing") is None
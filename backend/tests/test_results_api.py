@@ -0,0 +1,108 @@
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import get_db
+from app.main import app
+from app.models.candidate import Candidate
+from app.models.scan import Scan
+from app.workers.queue import WorkerPool, _completions
+
+HEADERS = {"X-Local-Auth": "local-dev"}
+
+
+def _seed(db_session) -> int:
+    scan = Scan(target_path="/tmp/x")
+    db_session.add(scan)
+    db_session.commit()
+    for i in range(7):
+        db_session.add(
+            Candidate(
+                scan_id=scan.id,
+                file=f"{'ab'[i % 2]}.py",
+                line_start=i,
+                line_end=i,
+                call_snippet="x" * 1000,
+                provider="openai",
+                inferred_intent="yes_no_classification" if i % 3 else "structured_extraction",
+                rule_solvability_score=i / 10,
+                confidence=0.5,
+                risk_level="low" if i < 4 else "high",
+                estimated_api_calls_saved=1,
+                latency_improvement_ms=1,
+                patch_diff="diff" * 1000,
+            )
+        )
+    db_session.commit()
+    return scan.id
+
+
+def test_candidates_page_with_cursor_and_filters(db_session) -> None:
+    scan_id = _seed(db_session)
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        client = TestClient(app)
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            page = client.get(
+                f"/api/scans/{scan_id}/candidates", params=params, headers=HEADERS
+            ).json()
+            seen.extend((item["file"], item["line_start"]) for item in page["items"])
+            assert all("call_snippet" not in item for item in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == sorted(seen) and len(seen) == 7
+
+        filtered = client.get(
+            f"/api/scans/{scan_id}/candidates",
+            params={"risk": "low", "intent": "yes_no_classification", "view": "full"},
+            headers=HEADERS,
+        ).json()
+        assert [item["line_start"] for item in filtered["items"]] == [2, 1]
+        assert filtered["items"][0]["call_snippet"] == "x" * 1000
+
+        bad = client.get(
+            f"/api/scans/{scan_id}/candidates", params={"cursor": "nope"}, headers=HEADERS
+        )
+        assert bad.status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_shadow_run_waits_for_the_worker(db_session, monkeypatch) -> None:
+    scan_id = _seed(db_session)
+    candidate = db_session.query(Candidate).filter(Candidate.scan_id == scan_id).first()
+    factory = sessionmaker(bind=db_session.get_bind())
+    monkeypatch.setattr("app.api.routes.SessionLocal", factory)
+    monkeypatch.setattr("app.workers.queue.SessionLocal", factory)
+
+    def process(db, job) -> None:
+        job.result = json.dumps(
+            {
+                "candidate_id": job.candidate_id,
+                "total_cases": 3,
+                "match_rate": 1.0,
+                "avg_latency_improvement_ms": 5.0,
+                "notes": "ok",
+            }
+        )
+        job.status = "completed"
+        db.commit()
+        _completions.resolve(job.id, "completed")
+
+    pool = WorkerPool("test", 1, session_factory=factory, process=process, poll_interval=0.05)
+    pool.start()
+    try:
+        client = TestClient(app)
+        response = client.post(f"/api/shadow-run/{scan_id}/{candidate.id}", headers=HEADERS)
+        missing = client.post(f"/api/shadow-run/{scan_id}/999999", headers=HEADERS)
+    finally:
+        pool.stop(wait=True)
+
+    assert response.status_code == 200
+    assert response.json()["candidate_id"] == candidate.id
+    assert missing.status_code == 404
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.scan import Scan
+from app.services.scan_events import scan_events, stream_scan
+from app.services.scan_log import ScanLog, tail_entries
+
+
+def _payload(event: str) -> dict:
+    return json.loads(event.split("data: ", 1)[1])
+
+
+def test_stream_resumes_from_offset_and_pushes_new_lines(db_session) -> None:
+    scan = Scan(target_path="/tmp/x", status="running", progress=10)
+    db_session.add(scan)
+    db_session.commit()
+    log = ScanLog(db_session, scan.id)
+    log.append("first")
+    log.append("second")
+    log.flush()
+    db_session.commit()
+    factory = sessionmaker(bind=db_session.get_bind())
+
+    def advance(message: str, status: str) -> None:
+        with factory() as db:
+            row = db.get(Scan, scan.id)
+            log = ScanLog(db, scan.id)
+            log.append(message)
+            log.flush()
+            row.status = status
+            db.commit()
+        scan_events.publish(scan.id)
+
+    async def collect() -> list[dict]:
+        events = []
+        stream = stream_scan(scan.id, offset=1, session_factory=factory, poll_interval=30)
+        events.append(_payload(await anext(stream)))
+        await asyncio.to_thread(advance, "third", "running")
+        events.append(_payload(await anext(stream)))
+        await asyncio.to_thread(advance, "done", "completed")
+        events.extend([_payload(event) async for event in stream])
+        return events
+
+    events = asyncio.run(asyncio.wait_for(collect(), 5))
+    assert [event["lines"] for event in events] == [["second"], ["third"], ["done"]]
+    assert [event["offset"] for event in events] == [2, 3, 4]
+    assert events[-1]["status"] == "completed"
+
+
+def test_scan_log_tail_pages_backwards(db_session) -> None:
+    scan = Scan(target_path="/tmp/x")
+    db_session.add(scan)
+    db_session.commit()
+    log = ScanLog(db_session, scan.id)
+    for i in range(1, 8):
+        log.append(f"line {i}")
+    log.flush()
+    db_session.commit()
+
+    assert [entry.seq for entry in tail_entries(db_session, scan.id, 3)] == [5, 6, 7]
+    assert [entry.seq for entry in tail_entries(db_session, scan.id, 3, before=5)] == [2, 3, 4]
+    assert ScanLog(db_session, scan.id)._next_seq == 8
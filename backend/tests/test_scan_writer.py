@@ -0,0 +1,51 @@
+import pytest
+
+from app.models.candidate import Candidate
+from app.models.scan import Scan
+from app.services.fingerprints import CARRIED_FIELDS
+from app.services.scan_log import log_text
+from app.services.scan_writer import ScanWriter
+
+
+def _row(line: int) -> dict:
+    row = {name: "" for name in CARRIED_FIELDS}
+    row.update(
+        file="a.py",
+        line_start=line,
+        line_end=line,
+        rule_solvability_score=0.5,
+        confidence=0.5,
+        estimated_api_calls_saved=1,
+        latency_improvement_ms=1,
+        auto_refactor_safe=False,
+    )
+    return row
+
+
+def test_writer_commits_once_per_batch(db_session) -> None:
+    scan = Scan(target_path="/tmp/x")
+    db_session.add(scan)
+    db_session.commit()
+
+    with ScanWriter(db_session, scan, flush_every=10, flush_interval_ms=60_000) as writer:
+        for line in range(25):
+            writer.log.append(f"hit {line}")
+            writer.add_candidate(_row(line))
+        assert writer.commits == 2
+    assert writer.commits == 3
+    assert db_session.query(Candidate).filter(Candidate.scan_id == scan.id).count() == 25
+    assert log_text(db_session, scan.id).count("hit") == 25
+
+
+def test_writer_flushes_buffered_rows_on_error(db_session) -> None:
+    scan = Scan(target_path="/tmp/x")
+    db_session.add(scan)
+    db_session.commit()
+
+    with pytest.raises(RuntimeError):
+        with ScanWriter(db_session, scan, flush_every=10, flush_interval_ms=60_000) as writer:
+            writer.add_candidate(_row(1))
+            writer.log.append("before failure")
+            raise RuntimeError("boom")
+    assert db_session.query(Candidate).filter(Candidate.scan_id == scan.id).count() == 1
+    assert "before failure" in log_text(db_session, scan.id)
@@ -0,0 +1,117 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.upgrade import upgrade_schema
+from app.models.scan import Scan
+from app.services.scan_log import log_text
+from app.workers.queue import claim_job
+
+# Tables as created by the release before scan logs moved to their own table and
+# the job queue gained priorities and leases.
+LEGACY_SCHEMA = [
+    """CREATE TABLE scans (
+        id INTEGER NOT NULL PRIMARY KEY,
+        target_path VARCHAR(1000) NOT NULL,
+        status VARCHAR(50) NOT NULL,
+        progress INTEGER NOT NULL,
+        logs TEXT NOT NULL,
+        created_at DATETIME NOT NULL
+    )""",
+    "INSERT INTO scans (target_path, status, progress, logs, created_at)"
+    " VALUES ('/repo', 'completed', 100, '\nStarted\nDone', '2024-01-01 00:00:00')",
+    """CREATE TABLE jobs (
+        id INTEGER NOT NULL PRIMARY KEY,
+        scan_id INTEGER,
+        candidate_id INTEGER,
+        kind VARCHAR(50) NOT NULL,
+        status VARCHAR(50) NOT NULL,
+        payload TEXT NOT NULL,
+        result TEXT NOT NULL,
+        created_at DATETIME NOT NULL
+    )""",
+    """CREATE TABLE candidates (
+        id INTEGER NOT NULL PRIMARY KEY,
+        scan_id INTEGER NOT NULL REFERENCES scans (id),
+        file VARCHAR(1000) NOT NULL,
+        line_start INTEGER NOT NULL,
+        line_end INTEGER NOT NULL,
+        call_snippet TEXT NOT NULL,
+        provider VARCHAR(100) NOT NULL,
+        inferred_intent VARCHAR(200) NOT NULL,
+        rule_solvability_score FLOAT NOT NULL,
+        confidence FLOAT NOT NULL,
+        explanation TEXT NOT NULL,
+        risk_level VARCHAR(20) NOT NULL,
+        estimated_api_calls_saved INTEGER NOT NULL,
+        latency_improvement_ms INTEGER NOT NULL,
+        fallback_behavior TEXT NOT NULL,
+        patch_diff TEXT NOT NULL,
+        patch_explanation TEXT NOT NULL,
+        tests_to_add TEXT NOT NULL,
+        auto_refactor_safe BOOLEAN NOT NULL
+    )""",
+    "CREATE INDEX ix_candidates_scan_id ON candidates (scan_id)",
+    """CREATE TABLE file_fingerprints (
+        id INTEGER NOT NULL PRIMARY KEY,
+        target_path VARCHAR(1000) NOT NULL,
+        file VARCHAR(1000) NOT NULL,
+        size BIGINT NOT NULL,
+        mtime_ns BIGINT NOT NULL,
+        content_hash VARCHAR(64) NOT NULL,
+        candidates TEXT NOT NULL,
+        updated_at DATETIME NOT NULL
+    )""",
+    "INSERT INTO jobs (kind, status, payload, result, created_at)"
+    " VALUES ('scan', 'queued', '{}', '', '2024-01-01 00:00:00')",
+]
+
+
+def _legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def test_upgrade_adds_new_columns(tmp_path) -> None:
+    engine = _legacy_engine(tmp_path)
+    upgrade_schema(engine)
+    upgrade_schema(engine)  # idempotent
+
+    columns = {column["name"] for column in inspect(engine).get_columns("jobs")}
+    assert {"priority", "attempts", "available_at", "lease_expires_at", "error"} <= columns
+    assert "plan_config" in {
+        column["name"] for column in inspect(engine).get_columns("file_fingerprints")
+    }
+
+    with sessionmaker(bind=engine)() as db:
+        job = claim_job(db)
+        assert job is not None
+        assert job.attempts == 1
+        assert job.priority == 0
+
+
+def test_upgrade_moves_scan_logs_into_entries(tmp_path) -> None:
+    engine = _legacy_engine(tmp_path)
+    upgrade_schema(engine)
+    upgrade_schema(engine)
+
+    assert "logs" not in {column["name"] for column in inspect(engine).get_columns("scans")}
+    with sessionmaker(bind=engine)() as db:
+        assert log_text(db, 1) == "Started\nDone"
+        db.add(Scan(target_path="/repo", status="queued", progress=0))
+        db.commit()
+
+
+def test_upgrade_creates_missing_indexes(tmp_path) -> None:
+    engine = _legacy_engine(tmp_path)
+    upgrade_schema(engine)
+    upgrade_schema(engine)
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("candidates")}
+    assert "ix_candidates_scan_file_line" in indexes
+    assert "ix_candidates_scan_id" not in indexes
+    assert "ix_jobs_claim" in {index["name"] for index in inspect(engine).get_indexes("jobs")}
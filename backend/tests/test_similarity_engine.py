@@ -0,0 +1,154 @@
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.engine.pattern_registry.models import PatternDefinition
+from app.engine.similarity_engine import LSHSimilarityEngine, SimilarityConfig, SimilarityEngine
+from app.engine.similarity_engine.engine import top_k_indices
+
+
+def _patterns() -> list[PatternDefinition]:
+    return [
+        PatternDefinition(
+            pattern_id=f"p{i}",
+            intent=intent,
+            language="python",
+            source_ast_signature=ast,
+            prompt_contract=contract,
+            output_schema=schema,
+        )
+        for i, (intent, ast, contract, schema) in enumerate(
+            [
+                (
+                    "yes_no_classification",
+                    "call attribute IDENT argument_list",
+                    "ONLY YES or NO",
+                    "ENUM: YES|NO",
+                ),
+                (
+                    "structured_extraction",
+                    "call attribute keyword_argument LIT",
+                    "Extract JSON",
+                    "JSON_OBJECT",
+                ),
+                (
+                    "small_domain_label_matching",
+                    "call IDENT list pair",
+                    "choose one label",
+                    "ENUM_OR_LABEL",
+                ),
+                (
+                    "generic_generation",
+                    "module expression_statement",
+                    "write text",
+                    "FREEFORM_TEXT",
+                ),
+            ]
+        )
+    ]
+
+
+def test_sparse_scores_match_dense_cosine() -> None:
+    engine = SimilarityEngine(SimilarityConfig(top_k=4))
+    engine.build_index(_patterns())
+    texts = {
+        "prompt": "yes_no_classification YES or NO",
+        "ast": "call attribute IDENT",
+        "output": "ENUM: YES|NO",
+    }
+
+    matches = engine.score(texts["prompt"], texts["ast"], texts["output"])
+
+    expected = np.zeros(4)
+    for key, weight in engine.config.weights.items():
+        dense = engine._matrices[key].toarray()
+        vector = engine._vectorizers[key].transform([texts[key]]).toarray()
+        expected += cosine_similarity(vector, dense)[0] * weight
+    assert [m.pattern.pattern_id for m in matches][0] == "p0"
+    for match in matches:
+        idx = int(match.pattern.pattern_id[1:])
+        assert abs(match.score - expected[idx]) < 1e-9
+        assert set(match.breakdown) == {"prompt", "ast", "output"}
+
+
+def test_top_k_indices_orders_best_first() -> None:
+    scores = np.array([0.1, 0.9, 0.5, 0.9, 0.2])
+    assert top_k_indices(scores, 3).tolist() == [1, 3, 2]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 2, 4, 0]
+
+
+def test_score_batch_matches_individual_scores() -> None:
+    engine = SimilarityEngine(SimilarityConfig(top_k=2, batch_cells=4))
+    engine.build_index(_patterns())
+    queries = [
+        ("YES or NO", "call attribute IDENT", "ENUM: YES|NO"),
+        ("Extract JSON", "call keyword_argument LIT", "JSON_OBJECT"),
+        ("label", "call list pair", "ENUM_OR_LABEL"),
+    ]
+
+    batched = engine.score_batch(queries)
+
+    assert len(batched) == len(queries)
+    for query, matches in zip(queries, batched):
+        single = engine.score(*query)
+        assert [m.pattern.pattern_id for m in matches] == [m.pattern.pattern_id for m in single]
+        assert [m.score for m in matches] == [m.score for m in single]
+
+
+def test_lsh_engine_finds_exact_top_match() -> None:
+    patterns = [
+        PatternDefinition(
+            pattern_id=f"lsh{i}",
+            intent=f"intent_{i % 7}",
+            language="python",
+            source_ast_signature=" ".join(f"node{(i * 31 + j) % 997}" for j in range(12)),
+            prompt_contract=f"contract {i} token{i % 13}",
+            output_schema=f"SCHEMA_{i % 5}",
+        )
+        for i in range(400)
+    ]
+    exact = SimilarityEngine(SimilarityConfig(top_k=1))
+    exact.build_index(patterns)
+    ann = LSHSimilarityEngine(SimilarityConfig(top_k=1), tables=16, bits=8, exact_below=0)
+    ann.build_index(patterns)
+
+    queries = [
+        (exact._prompt_text(p), p.source_ast_signature, exact._output_text(p))
+        for p in patterns[:50]
+    ]
+    agree = sum(
+        a[0].pattern.pattern_id == e[0].pattern.pattern_id
+        for a, e in zip(ann.score_batch(queries), exact.score_batch(queries))
+        if a
+    )
+    assert agree >= 45
+
+
+def test_lsh_tables_are_reused_from_exported_state(monkeypatch) -> None:
+    patterns = [
+        PatternDefinition(
+            pattern_id=f"lsh{i}",
+            intent=f"intent_{i % 3}",
+            language="python",
+            source_ast_signature=f"node{i} node{i % 11}",
+            prompt_contract=f"contract {i}",
+            output_schema=f"SCHEMA_{i % 5}",
+        )
+        for i in range(60)
+    ]
+    built = LSHSimilarityEngine(tables=4, bits=6, exact_below=0)
+    built.build_index(patterns)
+    state = built.export_state()
+    wider = LSHSimilarityEngine(tables=8, bits=6, exact_below=0)
+    wider.build_index(patterns, state)
+    assert wider._planes["ast"].shape[1] == 8 * 6
+
+    def fail(*args, **kwargs):
+        raise AssertionError("LSH planes were regenerated")
+
+    monkeypatch.setattr(np.random, "default_rng", fail)
+    reused = LSHSimilarityEngine(tables=4, bits=6, exact_below=0)
+    reused.build_index(patterns, state)
+    query = [("contract 7", "node7 node7", "SCHEMA_2")]
+    assert [m.pattern.pattern_id for m in reused.score_batch(query)[0]] == [
+        m.pattern.pattern_id for m in built.score_batch(query)[0]
+    ]
@@ -0,0 +1,17 @@
+from pathlib import Path
+
+from app.analysis.source_unit import load_source_unit
+from app.analysis.treesitter_extractor import extract_calls
+
+
+def test_source_unit_shares_lines_and_tree() -> None:
+    root = Path(__file__).resolve().parents[2]
+    unit = load_source_unit(root / "samples" / "python_yes_no" / "main.py")
+    assert unit is not None
+    assert unit.language == "python"
+    assert unit.line_at(unit.line_offsets[7]) == 8
+    assert "chat.completions.create" in unit.segment(8, 8)
+    assert unit.tree is unit.tree
+
+    calls = extract_calls(unit)
+    assert any(start == 9 for start, _, _ in calls)
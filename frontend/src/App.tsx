@@ -6,7 +6,7 @@ import { CandidateCard } from "./components/CandidateCard";
 import { InputSection } from "./components/InputSection";
 import { Layout } from "./components/Layout";
 import { PatchViewer } from "./components/PatchViewer";
-import type { Candidate, Patch, ShadowResult } from "./types";
+import type { Candidate, Patch, ScanProgress, ShadowResult } from "./types";
 
 function errorMessage(error: unknown): string {
   return error instanceof Error ? error.message : "Unknown error";
@@ -38,29 +38,47 @@ function App() {
 
   useEffect(() => {
     if (!scanId) return;
-    const timer = setInterval(async () => {
-      try {
-        const current = await api.status(scanId);
-        setStatus(current.status);
-        setProgress(current.progress);
-        setLogs(current.logs);
-
-        if (current.status === "completed") {
-          clearInterval(timer);
-          const grouped = await api.results(scanId);
-          setCandidates(grouped);
-          setLeftPaneMode("cases");
-          const first = Object.keys(grouped)[0];
-          if (first && grouped[first].length) {
-            setSelectedId(grouped[first][0].id);
-          }
+    const controller = new AbortController();
+    let offset = 0;
+    let finished = false;
+
+    const onProgress = async (event: ScanProgress) => {
+      setStatus(event.status);
+      setProgress(event.progress);
+      if (event.lines.length) {
+        setLogs((previous) => `${previous}\n${event.lines.join("\n")}`);
+      }
+      offset = event.offset;
+
+      if (event.status === "completed") {
+        finished = true;
+        const grouped = await api.results(scanId);
+        setCandidates(grouped);
+        setLeftPaneMode("cases");
+        const first = Object.keys(grouped)[0];
+        if (first && grouped[first].length) {
+          setSelectedId(grouped[first][0].id);
+        }
+      } else if (event.status === "failed") {
+        finished = true;
+      }
+    };
+
+    (async () => {
+      setLogs("");
+      // Reconnect from the last delivered log line if the stream drops mid-scan.
+      while (!finished && !controller.signal.aborted) {
+        try {
+          await api.streamStatus(scanId, offset, onProgress, controller.signal);
+        } catch (e) {
+          if (controller.signal.aborted) return;
+          console.error(e);
+          await new Promise((resolve) => setTimeout(resolve, 1000));
         }
-      } catch (e) {
-        console.error(e);
       }
-    }, 600);
+    })();
 
-    return () => clearInterval(timer);
+    return () => controller.abort();
   }, [scanId]);
 
   useEffect(() => {
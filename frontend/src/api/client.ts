@@ -1,4 +1,4 @@
-import type { Candidate, Patch, ShadowResult } from "../types";
+import type { Candidate, Patch, ScanProgress, ShadowResult } from "../types";
 
 const BASE = import.meta.env.VITE_API_BASE ?? "http://localhost:8000";
 const AUTH = import.meta.env.VITE_LOCAL_AUTH_TOKEN ?? "local-dev";
@@ -18,6 +18,40 @@ async function req<T>(path: string, init?: RequestInit): Promise<T> {
   return (await res.json()) as T;
 }
 
+// Reads the scan progress event stream until the scan finishes or `signal` aborts.
+// fetch is used instead of EventSource so the auth header can be sent.
+async function streamStatus(
+  scanId: number,
+  offset: number,
+  onProgress: (event: ScanProgress) => void,
+  signal: AbortSignal,
+): Promise<void> {
+  const res = await fetch(`${BASE}/api/status/${scanId}/stream?offset=${offset}`, {
+    headers: { "X-Local-Auth": AUTH },
+    signal,
+  });
+  if (!res.ok || !res.body) {
+    throw new Error(await res.text());
+  }
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += value;
+    let end = buffer.indexOf("\n\n");
+    while (end !== -1) {
+      const block = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      const data = block.split("\n").find((line) => line.startsWith("data: "));
+      if (data && block.includes("event: progress")) {
+        onProgress(JSON.parse(data.slice(6)) as ScanProgress);
+      }
+      end = buffer.indexOf("\n\n");
+    }
+  }
+}
+
 export const api = {
   scan: (path: string, credentials?: { key?: string; provider?: string }) =>
     req<{ scan_id: number; status: string }>("/api/scan", {
@@ -37,6 +71,7 @@ export const api = {
     return req<{ scan_id: number; status: string }>("/api/scan/upload", { method: "POST", body: data });
   },
   status: (scanId: number) => req<{ scan_id: number; status: string; progress: number; logs: string }>(`/api/status/${scanId}`),
+  streamStatus,
   results: (scanId: number) => req<Record<string, Candidate[]>>(`/api/results/${scanId}`),
   patch: (scanId: number, candidateId: number) => req<Patch>(`/api/patch/${scanId}/${candidateId}`),
   shadow: (scanId: number, candidateId: number) => req<ShadowResult>(`/api/shadow-run/${scanId}/${candidateId}`, { method: "POST" }),
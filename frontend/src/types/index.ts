@@ -37,3 +37,10 @@ export interface ShadowResult {
   avg_latency_improvement_ms: number;
   notes: string;
 }
+
+export interface ScanProgress {
+  status: string;
+  progress: number;
+  offset: number;
+  lines: string[];
+}